@@ -10,24 +10,40 @@ __history__ = """ """
 __version__ = "1.1.A19.1 ($Rev: 1 $)"
 
 import json
+import os
 import re
 import threading
-import time
 import uuid
 
-from flask import Flask, jsonify, render_template, json, request
+from flask import Flask, Response, jsonify, render_template, json, request, stream_with_context
 from flask_jwt_extended import JWTManager
+from werkzeug.http import is_resource_modified
 
 from auth_controller.api_authentication import *
 from utilities.Utility import Utility as Util
+from constants.settings import install_reload_signal
 from logger_controller.logger_control import *
 from db_controller.database_backend import *
+from db_controller.unit_of_work import begin_unit_of_work, commit_unit_of_work, end_unit_of_work, \
+    release_unit_of_work_connection
+from utilities.product_import import IMPORT_FILE_FORMATS, get_import_file_format
+from utilities.local_cache import get_local_caches_stats
+from utilities import serializer
 from model.StoreModel import StoreModel
 from model.ProductModel import ProductModel
 
 
 logger = configure_ws_logger()
 
+# Recarga el archivo de constantes con SIGHUP al proceso (worker)
+install_reload_signal()
+
+# Precarga el cache de identificadores de tiendas, si la base de datos no responde se llena bajo demanda
+try:
+    warm_store_id_cache()
+except Exception as warm_error:
+    logger.warning('Store id cache not warmed: %s', warm_error)
+
 
 app = Flask(__name__, static_url_path='/static')
 
@@ -41,17 +57,115 @@ app.config['PROPAGATE_EXCEPTIONS'] = True
 jwt = JWTManager(app)
 
 
+# Detiene el barrido de apartados cuando termina el worker
+_sweep_stop = threading.Event()
+
+
 # Se inicializa la App con un hilo para evitar problemas de ejecución
 # (Falta validacion para cuando ya exista hilo corriendo)
 @app.before_first_request
 def activate_job():
     def run_job():
-        while True:
-            time.sleep(2)
+        cfg = Util.get_config_constant_file()
 
-    thread = threading.Thread(target=run_job)
+        # Expira los apartados de inventario vencidos y libera sus unidades
+        while not _sweep_stop.wait(int(cfg['STOCK_RESERVATION']['SWEEP_INTERVAL_SECONDS'])):
+            try:
+                expire_stock_reservations()
+            except Exception as sweep_error:
+                logger.exception('Stock reservations sweep failed: %s', sweep_error)
+
+    # Hilo daemon: no detiene la salida del proceso, un barrido interrumpido se deshace (rollback)
+    thread = threading.Thread(target=run_job, name='stock-reservation-sweep', daemon=True)
     thread.start()
 
+    # Escucha los cambios hechos por otros workers y nodos para invalidar los caches locales
+    try:
+        get_cache_event_listener()
+    except Exception as listener_error:
+        logger.exception('Cache event listener not started: %s', listener_error)
+
+
+def stop_background_jobs():
+    r"""
+    Stop the reservations sweep, write the stock changes buffered and stop the cache event listener of
+    the worker. Called by the worker_exit hook of gunicorn (gunicorn.conf.py).
+    """
+
+    _sweep_stop.set()
+
+    close_background_work()
+
+
+# Cada request usa una sola conexion y una sola transaccion a base de datos (unit of work),
+# se hace commit una vez al terminar el endpoint sin errores.
+@app.before_request
+def open_unit_of_work():
+    begin_unit_of_work()
+
+
+@app.after_request
+def commit_request_unit_of_work(response):
+    if response.status_code < 400:
+        commit_unit_of_work()
+
+    return response
+
+
+@app.teardown_request
+def close_unit_of_work(error=None):
+    end_unit_of_work(error)
+
+
+def json_response(data, status=200):
+    r"""
+    Encode the data returned by the backend (native structures) once, as the body of the response.
+
+    :param data: Serializable data.
+    :param status: HTTP status code.
+    :return response: Response object with mimetype application/json.
+    """
+
+    return Response(serializer.dumps_bytes(data), status=status, mimetype='application/json')
+
+
+def conditional_response(entity_version, representation, build_response):
+    r"""
+    Answer a GET with 304 Not Modified when the client already has the current version (If-None-Match),
+    without reading or encoding the data; otherwise build the full response.
+    Both carry ETag, Last-Modified and Cache-Control (CONDITIONAL_GET.CACHE_CONTROL).
+
+    If-Modified-Since is not evaluated: last_update_date has one second resolution and is the start time
+    of the writing transaction, so a write of the same second (or committed later) would be answered
+    with 304. Last-Modified is informative only.
+
+    :param entity_version: Version probed on the database (Version, LastModified), None if the data not exists.
+    :param representation: Name of the encoding of the body, part of the ETag (the bytes differ between them).
+    :param build_response: Function without arguments that returns the full response.
+    :return response: Response object.
+    """
+
+    if entity_version is None:
+        return build_response()
+
+    cfg = Util.get_config_constant_file()
+
+    etag = '{}-{}'.format(entity_version['Version'], representation)
+    last_modified = entity_version['LastModified']
+
+    # Solo se compara el ETag, sin last_modified se ignora If-Modified-Since
+    if is_resource_modified(request.environ, etag=etag):
+        response = build_response()
+    else:
+        response = Response(status=304)
+
+    if response.status_code in (200, 304):
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.headers['Cache-Control'] = cfg['CONDITIONAL_GET']['CACHE_CONTROL']
+
+    return response
+
 
 # Contiene la llamada al HTML que soporta la documentacion de la API,
 # sus metodos, y endpoints con los modelos de datos I/O
@@ -65,9 +179,7 @@ def get_stock_all_stores_by_product(product_sku):
 
     stock_list = []
 
-    stock_in_stores = select_all_stock_in_product(product_sku)
-
-    stock_list = json.loads(stock_in_stores)
+    stock_list = select_all_stock_in_product(product_sku)
 
     if stock_list:
 
@@ -100,12 +212,16 @@ def endpoint_list_stock_all_stores():
 
             product_sku = data['product_sku']
 
-            json_data = get_stock_all_stores_by_product(product_sku)
-
             if not product_sku:
                 return request_conflict()
 
-            return json.dumps(json_data)
+            # Con "aggregate" se regresan los totales calculados en la base de datos (una fila por SKU)
+            if data.get('aggregate'):
+                json_data = get_stock_totals_by_products([product_sku], data.get('store_codes'))[0]
+            else:
+                json_data = get_stock_all_stores_by_product(product_sku)
+
+            return json_response(json_data)
 
         else:
             return not_found()
@@ -115,9 +231,7 @@ def get_stock_by_store_by_product(product_sku, store_code):
 
     stock_list = []
 
-    stock_in_store = select_stock_in_product(store_code, product_sku)
-
-    stock_list = json.loads(stock_in_store)
+    stock_list = select_stock_in_product(store_code, product_sku)
 
     if stock_list:
 
@@ -156,7 +270,128 @@ def endpoint_detailed_stock_by_sku():
             if not product_sku:
                 return request_conflict()
 
-            return json.dumps(json_data)
+            return json_response(json_data)
+
+        else:
+            return not_found()
+
+
+def get_stock_by_products(product_skus, store_codes):
+
+    stock_batch = []
+
+    stock_batch = select_stock_in_products(product_skus, store_codes)
+
+    logger.info('List Stock batch by SKUs: {} in Stores: {}'.format(len(stock_batch), store_codes or 'all'))
+
+    return stock_batch
+
+
+def get_stock_totals_by_products(product_skus, store_codes):
+
+    stock_totals = []
+
+    stock_totals = select_stock_totals_in_products(product_skus, store_codes)
+
+    logger.info('Stock totals by SKUs: {} in Stores: {}'.format(len(stock_totals), store_codes or 'all'))
+
+    return stock_totals
+
+
+@app.route('/api/ecommerce/stock/batch/',  methods=['GET', 'POST', 'OPTIONS'])
+@jwt_required
+def endpoint_stock_batch_by_skus():
+
+    headers = request.headers
+    auth = headers.get('Authorization')
+
+    if not auth and 'Bearer' not in auth:
+        return request_unauthorized()
+    else:
+        if request.method == 'OPTIONS':
+            headers = {
+                'Access-Control-Allow-Methods': 'POST, GET, OPTIONS',
+                'Access-Control-Max-Age': 1000,
+                'Access-Control-Allow-Headers': 'origin, x-csrftoken, content-type, accept',
+            }
+            return '', 200, headers
+
+        elif request.method in ('GET', 'POST'):
+
+            cfg = Util.get_config_constant_file()
+
+            data = request.get_json(force=True)
+
+            product_skus = data.get('product_skus')
+            store_codes = data.get('store_codes')
+
+            # Un solo query por pagina del catalogo, con un limite de SKUs por peticion
+            if not product_skus or not isinstance(product_skus, list):
+                return request_conflict()
+
+            if len(product_skus) > int(cfg['BATCH_STOCK']['MAX_SKUS']):
+                return request_conflict()
+
+            if store_codes is not None and not isinstance(store_codes, list):
+                return request_conflict()
+
+            if data.get('aggregate'):
+                json_data = get_stock_totals_by_products(product_skus, store_codes)
+            else:
+                json_data = get_stock_by_products(product_skus, store_codes)
+
+            return json_response(json_data)
+
+        else:
+            return not_found()
+
+
+def get_availability_by_products(product_skus):
+
+    availability = []
+
+    availability = select_stock_availability(product_skus)
+
+    logger.info('Availability by SKUs: {}'.format(len(availability)))
+
+    return availability
+
+
+@app.route('/api/ecommerce/stock/availability/',  methods=['GET', 'POST', 'OPTIONS'])
+@jwt_required
+def endpoint_stock_availability():
+
+    headers = request.headers
+    auth = headers.get('Authorization')
+
+    if not auth and 'Bearer' not in auth:
+        return request_unauthorized()
+    else:
+        if request.method == 'OPTIONS':
+            headers = {
+                'Access-Control-Allow-Methods': 'POST, GET, OPTIONS',
+                'Access-Control-Max-Age': 1000,
+                'Access-Control-Allow-Headers': 'origin, x-csrftoken, content-type, accept',
+            }
+            return '', 200, headers
+
+        elif request.method in ('GET', 'POST'):
+
+            cfg = Util.get_config_constant_file()
+
+            data = request.get_json(force=True)
+
+            product_skus = data.get('product_skus')
+
+            if not product_skus or not isinstance(product_skus, list):
+                return request_conflict()
+
+            if len(product_skus) > int(cfg['BATCH_STOCK']['MAX_SKUS']):
+                return request_conflict()
+
+            json_data = get_availability_by_products(product_skus)
+
+            return json_response(json_data)
 
         else:
             return not_found()
@@ -166,9 +401,7 @@ def add_stock_by_store_by_product(stock, product_sku, store_code):
 
     stock_add = []
 
-    stock_in_product = update_product_store_stock(stock, product_sku, store_code)
-
-    stock_add = json.loads(stock_in_product)
+    stock_add = update_product_store_stock(stock, product_sku, store_code)
 
     if stock_add:
 
@@ -198,7 +431,7 @@ def endpoint_update_stock():
             }
             return '', 200, headers
 
-        elif request.method == 'GET':
+        elif request.method == 'POST':
 
             data = request.get_json(force=True)
 
@@ -206,12 +439,302 @@ def endpoint_update_stock():
             product_sku = data['product_sku']
             store_code = data['store_code']
 
-            json_data = add_stock_by_store_by_product(stock, product_sku, store_code)
+            stock_write_buffer = get_stock_write_buffer()
+
+            # Modo write-behind: el cambio se acumula en memoria y se escribe en lote (respuesta 202)
+            if stock_write_buffer is not None:
+                # Se valida antes de encolar, un cambio invalido haria fallar el lote completo
+                if not Util.is_valid_stock_key(store_code, product_sku) or not Util.is_valid_stock(stock):
+                    return request_conflict()
+
+                stock_write_buffer.set_stock(store_code, product_sku, stock)
+
+                return json_response({
+                    "StoreCode": store_code,
+                    "ProductSku": product_sku,
+                    "ProductStock": str(stock),
+                    "Message": "Product Stock Update Queued",
+                }, status=202)
+
+            try:
+                json_data = add_stock_by_store_by_product(stock, product_sku, store_code)
+            except mvc_exc.IntegrityError as error:
+                logger.error('Stock Update rejected: %s', error)
+                return request_conflict()
 
             if not product_sku and not store_code and not stock:
                 return request_conflict()
 
-            return json.dumps(json_data)
+            return json_response(json_data)
+
+        else:
+            return not_found()
+
+
+def add_stock_bulk(stock_items):
+
+    stock_bulk = {}
+
+    stock_bulk = update_bulk_product_store_stock(stock_items)
+
+    logger.info('Bulk Stock: Received: {}, Updated: {}, Rows per second: {}'.format(stock_bulk.get('RowsReceived'),
+                                                                                   stock_bulk.get('RowsUpdated'),
+                                                                                   stock_bulk.get('RowsPerSecond')))
+
+    return stock_bulk
+
+
+@app.route('/api/ecommerce/stock/bulk/',  methods=['POST', 'OPTIONS'])
+@jwt_required
+def endpoint_update_stock_bulk():
+
+    headers = request.headers
+    auth = headers.get('Authorization')
+
+    if not auth and 'Bearer' not in auth:
+        return request_unauthorized()
+    else:
+        if request.method == 'OPTIONS':
+            headers = {
+                'Access-Control-Allow-Methods': 'POST, OPTIONS',
+                'Access-Control-Max-Age': 1000,
+                'Access-Control-Allow-Headers': 'origin, x-csrftoken, content-type, accept',
+            }
+            return '', 200, headers
+
+        elif request.method == 'POST':
+
+            data = request.get_json(force=True)
+
+            stock_items = data if isinstance(data, list) else data.get('stock_items')
+
+            if not stock_items or not isinstance(stock_items, list):
+                return request_conflict()
+
+            json_data = add_stock_bulk(stock_items)
+
+            return json_response(json_data)
+
+        else:
+            return not_found()
+
+
+def adjust_stock_deltas(stock_deltas, guard):
+
+    stock_adjusted = {}
+
+    stock_adjusted = adjust_product_store_stock(stock_deltas, guard)
+
+    logger.info('Stock Adjust: Items: {}, Guard: {}, Applied: {}'.format(len(stock_adjusted.get('Results')),
+                                                                          stock_adjusted.get('Guard'),
+                                                                          stock_adjusted.get('Applied')))
+
+    return stock_adjusted
+
+
+@app.route('/api/ecommerce/stock/adjust/',  methods=['POST', 'OPTIONS'])
+@jwt_required
+def endpoint_adjust_stock():
+
+    headers = request.headers
+    auth = headers.get('Authorization')
+
+    if not auth and 'Bearer' not in auth:
+        return request_unauthorized()
+    else:
+        if request.method == 'OPTIONS':
+            headers = {
+                'Access-Control-Allow-Methods': 'POST, OPTIONS',
+                'Access-Control-Max-Age': 1000,
+                'Access-Control-Allow-Headers': 'origin, x-csrftoken, content-type, accept',
+            }
+            return '', 200, headers
+
+        elif request.method == 'POST':
+
+            cfg = Util.get_config_constant_file()
+
+            data = request.get_json(force=True)
+
+            # Un solo ajuste o un lote de ajustes que se aplica completo o no se aplica
+            if isinstance(data, dict) and 'adjustments' not in data:
+                stock_deltas = [data]
+            else:
+                stock_deltas = data if isinstance(data, list) else data.get('adjustments')
+
+            guard = data.get('guard', 'none') if isinstance(data, dict) else 'none'
+
+            if not stock_deltas or not isinstance(stock_deltas, list):
+                return request_conflict()
+
+            if len(stock_deltas) > int(cfg['STOCK_ADJUST']['MAX_ITEMS']):
+                return request_conflict()
+
+            stock_write_buffer = get_stock_write_buffer()
+
+            # Modo write-behind: sin guarda los ajustes solo se suman, se acumulan y se escriben en lote
+            if stock_write_buffer is not None and guard == 'none':
+                stock_changes = [(stock_delta.get('store_code'), stock_delta.get('product_sku'), None,
+                                  Util.parse_stock_delta(stock_delta.get('delta')))
+                                 for stock_delta in stock_deltas if isinstance(stock_delta, dict)]
+
+                # Se valida antes de encolar, un cambio invalido haria fallar el lote completo
+                if len(stock_changes) != len(stock_deltas) or not all(
+                        Util.is_valid_stock_key(stock_change[0], stock_change[1]) and stock_change[3] is not None
+                        for stock_change in stock_changes):
+                    return request_conflict()
+
+                stock_write_buffer.enqueue(stock_changes)
+
+                return json_response({
+                    "Applied": False,
+                    "Queued": True,
+                    "Guard": guard,
+                    "Results": [{
+                        "StoreCode": stock_change[0],
+                        "ProductSku": stock_change[1],
+                        "StockDelta": stock_change[3],
+                        "Status": "queued",
+                    } for stock_change in stock_changes],
+                }, status=202)
+
+            try:
+                json_data = adjust_stock_deltas(stock_deltas, guard)
+            except mvc_exc.IntegrityError as error:
+                logger.error('Stock Adjust rejected: %s', error)
+                return request_conflict()
+
+            # Si un ajuste no se puede aplicar no se aplica ninguno, el estatus de cada uno indica la causa
+            return json_response(json_data, status=200 if json_data.get('Applied') else 409)
+
+        else:
+            return not_found()
+
+
+def get_reservation_id(data):
+
+    try:
+        return uuid.UUID(str(data.get('reservation_id')))
+    except (AttributeError, ValueError):
+        return None
+
+
+@app.route('/api/ecommerce/stock/reservation/',  methods=['POST', 'OPTIONS'])
+@jwt_required
+def endpoint_create_stock_reservation():
+
+    headers = request.headers
+    auth = headers.get('Authorization')
+
+    if not auth and 'Bearer' not in auth:
+        return request_unauthorized()
+    else:
+        if request.method == 'OPTIONS':
+            headers = {
+                'Access-Control-Allow-Methods': 'POST, OPTIONS',
+                'Access-Control-Max-Age': 1000,
+                'Access-Control-Allow-Headers': 'origin, x-csrftoken, content-type, accept',
+            }
+            return '', 200, headers
+
+        elif request.method == 'POST':
+
+            cfg = Util.get_config_constant_file()
+
+            data = request.get_json(force=True)
+
+            if not isinstance(data, dict):
+                return request_conflict()
+
+            reservation_items = data.get('items')
+
+            if not reservation_items or not isinstance(reservation_items, list):
+                return request_conflict()
+
+            if len(reservation_items) > int(cfg['STOCK_RESERVATION']['MAX_ITEMS']):
+                return request_conflict()
+
+            try:
+                json_data = create_stock_reservation(reservation_items, data.get('ttl_seconds'),
+                                                     data.get('order_reference'))
+            except mvc_exc.IntegrityError as error:
+                logger.error('Stock Reservation rejected: %s', error)
+                return request_conflict()
+
+            # Si un producto no se puede apartar no se aparta ninguno, el estatus de cada uno indica la causa
+            return json_response(json_data, status=200 if json_data.get('ReservationStatus') == 'held' else 409)
+
+        else:
+            return not_found()
+
+
+@app.route('/api/ecommerce/stock/reservation/confirm/',  methods=['POST', 'OPTIONS'])
+@jwt_required
+def endpoint_confirm_stock_reservation():
+
+    headers = request.headers
+    auth = headers.get('Authorization')
+
+    if not auth and 'Bearer' not in auth:
+        return request_unauthorized()
+    else:
+        if request.method == 'OPTIONS':
+            headers = {
+                'Access-Control-Allow-Methods': 'POST, OPTIONS',
+                'Access-Control-Max-Age': 1000,
+                'Access-Control-Allow-Headers': 'origin, x-csrftoken, content-type, accept',
+            }
+            return '', 200, headers
+
+        elif request.method == 'POST':
+
+            reservation_id = get_reservation_id(request.get_json(force=True))
+
+            if reservation_id is None:
+                return request_conflict()
+
+            json_data = confirm_stock_reservation(reservation_id)
+
+            if json_data is None:
+                return not_found()
+
+            return json_response(json_data, status=200 if json_data.get('Finished') else 409)
+
+        else:
+            return not_found()
+
+
+@app.route('/api/ecommerce/stock/reservation/release/',  methods=['POST', 'OPTIONS'])
+@jwt_required
+def endpoint_release_stock_reservation():
+
+    headers = request.headers
+    auth = headers.get('Authorization')
+
+    if not auth and 'Bearer' not in auth:
+        return request_unauthorized()
+    else:
+        if request.method == 'OPTIONS':
+            headers = {
+                'Access-Control-Allow-Methods': 'POST, OPTIONS',
+                'Access-Control-Max-Age': 1000,
+                'Access-Control-Allow-Headers': 'origin, x-csrftoken, content-type, accept',
+            }
+            return '', 200, headers
+
+        elif request.method == 'POST':
+
+            reservation_id = get_reservation_id(request.get_json(force=True))
+
+            if reservation_id is None:
+                return request_conflict()
+
+            json_data = release_stock_reservation(reservation_id)
+
+            if json_data is None:
+                return not_found()
+
+            return json_response(json_data, status=200 if json_data.get('Finished') else 409)
 
         else:
             return not_found()
@@ -227,8 +750,8 @@ def manage_store_requested_data(store_data):
 
         store_code = store_data.get("store_code")
         store_name = store_data.get("store_name")
-        store_street_address = store_data("street_address")
-        store_external_number = store_data("external_number_address")
+        store_street_address = store_data.get("street_address")
+        store_external_number = store_data.get("external_number_address")
         store_suburb_address = store_data.get("suburb_address")
         store_city_address = store_data.get("city_address")
         store_country_address = store_data.get("country_address")
@@ -238,9 +761,7 @@ def manage_store_requested_data(store_data):
         store_obj = StoreModel(store_code, store_name, store_external_number, store_street_address, store_suburb_address,
                                store_city_address, store_country_address, store_zippostal_code, store_min_inventory)
 
-        store_data = store_model_db.manage_store_data(store_obj)
-
-        store_data_manage = json.loads(store_data)
+        store_data_manage = store_model_db.manage_store_data(store_obj)
 
         if len(store_data_manage) != 0:
             logger.info('Response Store Data: %s', str(store_data_manage))
@@ -259,9 +780,7 @@ def get_stores_by_code(store_code):
 
     store_list_data = {}
 
-    store_get_list_data = select_by_store_code(store_code)
-
-    store_list_data = json.loads(store_get_list_data)
+    store_list_data = select_by_store_code(store_code)
 
     if store_list_data:
 
@@ -307,23 +826,19 @@ def endpoint_processing_store_data():
 
             json_store_response = manage_store_requested_data(data)
 
-            return json.dumps(json_store_response)
+            return json_response(json_store_response)
 
         elif request.method == 'GET':
             data = request.get_json(force=True)
 
             store_code = data['store_code']
 
-            json_data = []
-
-            json_data = get_stores_by_code(store_code)
-
-            logger.info('Stores List data by Code: %s', str(json_data))
-
             if not store_code:
                 return request_conflict()
 
-            return json.dumps(json_data)
+            # La version de la tienda se consulta antes, si el cliente ya la tiene se responde 304
+            return conditional_response(select_store_version(store_code), 'json',
+                                        lambda: json_response(get_stores_by_code(store_code)))
 
         elif request.method == 'PUT':
 
@@ -344,7 +859,7 @@ def endpoint_processing_store_data():
 
             logger.info('Store updated Info: %s', str(json_data))
 
-            return json_data
+            return json_response(json_data)
 
         elif request.method == 'DELETE':
             data = request.get_json(force=True)
@@ -362,7 +877,7 @@ def endpoint_processing_store_data():
 
             logger.info('Store deleted: %s', json_data)
 
-            return json.dumps(json_data)
+            return json_response(json_data)
 
         else:
             return not_found()
@@ -405,9 +920,7 @@ def manage_product_requested_data(product_data):
                                    product_status, product_published, manage_stock, product_length, product_width,
                                    product_height, product_weight)
 
-        data_product = product_model_db.manage_product_data(product_obj)
-
-        product_data_manage = json.loads(data_product)
+        product_data_manage = product_model_db.manage_product_data(product_obj)
 
         if len(product_data_manage) != 0:
             logger.info('Response Product Data: %s', str(product_data_manage))
@@ -422,19 +935,60 @@ def manage_product_requested_data(product_data):
         )
 
 
+def stream_json_array(items, chunk_items=None):
+    r"""
+    Encode an iterable as a JSON array, a chunk of items at a time.
+
+    :param items: Iterable of serializable items.
+    :param chunk_items: Items encoded per chunk, STREAMING.ITERSIZE by default.
+    :return chunks: Generator of strings that concatenated are the JSON array.
+    """
+
+    cfg = Util.get_config_constant_file()
+
+    chunk_items = chunk_items or int(cfg['STREAMING']['ITERSIZE'])
+
+    chunk = []
+    separator = '['
+
+    for item in items:
+        chunk.append(separator + serializer.dumps(item))
+        separator = ','
+
+        if len(chunk) >= chunk_items:
+            yield ''.join(chunk)
+            chunk = []
+
+    if separator == '[':
+        chunk.append('[')
+
+    chunk.append(']')
+
+    yield ''.join(chunk)
+
+
 def get_products_by_sku(product_sku):
 
-    product_list_data = {}
+    cfg = Util.get_config_constant_file()
+
+    # El documento JSON se construye en Postgres y se envia sin decodificarlo
+    if cfg['PRODUCT_QUERY']['JSON_IN_DATABASE']:
+        logger.info('Product data by SKU built on database: {}'.format(product_sku))
 
-    product_get_list_data = select_by_product_sku(product_sku)
+        json_products = select_by_product_sku_json(product_sku)
 
-    product_list_data = json.loads(product_get_list_data)
+        return Response(json_products, mimetype='application/json')
 
-    if product_list_data:
+    # La respuesta se envia por partes mientras se leen las filas del cursor del servidor,
+    # la memoria usada no depende del numero de tiendas del producto
+    logger.info('Stream Product data by SKU: {}'.format(product_sku))
 
-        logger.info('List Product data by SKU: {}: {}: '.format(product_sku, product_list_data))
+    # Las filas se leen en una conexion propia, la del unit of work se libera antes de enviar la respuesta
+    release_unit_of_work_connection()
 
-        return product_list_data
+    products_by_sku = iter_products_by_sku(product_sku)
+
+    return Response(stream_with_context(stream_json_array(products_by_sku)), mimetype='application/json')
 
 
 @app.route('/api/ecommerce/manage/product/', methods=['POST', 'GET', 'PUT', 'DELETE', 'OPTIONS'])
@@ -464,25 +1018,29 @@ def endpoint_processing_product_data():
 
             logger.info('Data Json Store to Manage on DB: %s', str(data))
 
-            json_store_response = manage_product_requested_data(data)
+            try:
+                json_store_response = manage_product_requested_data(data)
+            except mvc_exc.IntegrityError as error:
+                logger.error('Product rejected: %s', error)
+                return request_conflict()
 
-            return json.dumps(json_store_response)
+            return json_response(json_store_response)
 
         elif request.method == 'GET':
             data = request.get_json(force=True)
 
             product_sku = data['product_sku']
 
-            json_data = []
-
-            json_data = get_products_by_sku(product_sku)
-
-            logger.info('Product List data by SKU: %s', str(json_data))
-
             if not product_sku:
                 return request_conflict()
 
-            return json.dumps(json_data)
+            cfg = Util.get_config_constant_file()
+
+            representation = 'json-db' if cfg['PRODUCT_QUERY']['JSON_IN_DATABASE'] else 'json'
+
+            # La version del SKU se consulta antes, si el cliente ya la tiene se responde 304
+            return conditional_response(select_product_version(product_sku), representation,
+                                        lambda: get_products_by_sku(product_sku))
 
         elif request.method == 'PUT':
 
@@ -498,7 +1056,11 @@ def endpoint_processing_product_data():
 
             json_data = dict()
 
-            json_data = update_product_data(data_store)
+            try:
+                json_data = update_product_data(data_store)
+            except mvc_exc.IntegrityError as error:
+                logger.error('Product Update rejected: %s', error)
+                return request_conflict()
 
             logger.info('Data to update Product: %s',
                         "Product SKU: {0}, "
@@ -508,7 +1070,7 @@ def endpoint_processing_product_data():
 
             logger.info('Product updated Info: %s', str(json_data))
 
-            return json_data
+            return json_response(json_data)
 
         elif request.method == 'DELETE':
             data = request.get_json(force=True)
@@ -527,7 +1089,179 @@ def endpoint_processing_product_data():
 
             logger.info('Product deleted: %s', json_data)
 
-            return json.dumps(json_data)
+            return json_response(json_data)
+
+        else:
+            return not_found()
+
+
+def list_products_by_store(store_code, page_size, page_cursor, product_status, product_published):
+
+    products_page = {}
+
+    products_page = select_products_by_store(store_code, page_size, page_cursor, product_status,
+                                                  product_published)
+
+    logger.info('Products page by Store: {}: {} products'.format(store_code, products_page.get('PageSize')))
+
+    return products_page
+
+
+@app.route('/api/ecommerce/manage/product/list/', methods=['GET', 'OPTIONS'])
+@jwt_required
+def endpoint_list_products_by_store():
+
+    headers = request.headers
+    auth = headers.get('Authorization')
+
+    if not auth and 'Bearer' not in auth:
+        return request_unauthorized()
+    else:
+        if request.method == 'OPTIONS':
+            headers = {
+                'Access-Control-Allow-Methods': 'GET, OPTIONS',
+                'Access-Control-Max-Age': 1000,
+                'Access-Control-Allow-Headers': 'origin, x-csrftoken, content-type, accept',
+            }
+            return '', 200, headers
+
+        elif request.method == 'GET':
+
+            cfg = Util.get_config_constant_file()
+
+            # Los filtros y el cursor llegan como parametros del query string
+            store_code = request.args.get('store_code')
+            page_cursor = request.args.get('cursor')
+            product_status = request.args.get('status')
+            product_published = request.args.get('published')
+
+            if not store_code:
+                return request_conflict()
+
+            if product_status is not None and product_status not in cfg['PRODUCT_STATUS_CHECK_LIST']:
+                return request_conflict()
+
+            if product_published is not None:
+                product_published = product_published.lower() in ('1', 'true', 't', 'yes')
+
+            try:
+                page_size = int(request.args.get('page_size', cfg['PRODUCT_LISTING']['PAGE_SIZE']))
+            except ValueError:
+                return request_conflict()
+
+            if page_size < 1 or page_size > int(cfg['PRODUCT_LISTING']['MAX_PAGE_SIZE']):
+                return request_conflict()
+
+            try:
+                json_data = list_products_by_store(store_code, page_size, page_cursor, product_status,
+                                                   product_published)
+            except (ValueError, mvc_exc.ItemNotStored) as error:
+                logger.error('Products page not valid: %s', error)
+                return request_conflict()
+
+            return json_response(json_data)
+
+        else:
+            return not_found()
+
+
+def import_products_file(file_storage, file_format):
+
+    products_import = {}
+
+    try:
+        # Se lee el archivo desde el stream de la peticion, sin cargarlo completo en memoria
+        products_import = import_products_from_file(file_storage.stream, file_format)
+
+        logger.info('Products Import: Received: {}, Inserted: {}, Updated: {}, Rejected: {}'.format(
+            products_import.get('RowsReceived'), products_import.get('RowsInserted'),
+            products_import.get('RowsUpdated'), products_import.get('RowsRejected')))
+
+        return products_import
+
+    except SQLAlchemyError as error:
+        raise mvc_exc.ConnectionError(
+            'Can\'t connect to database, verify data connection to "{}".\nOriginal Exception raised: {}'.format(
+                ProductModelDb.__tablename__, error
+            )
+        )
+
+
+@app.route('/api/ecommerce/manage/product/import/', methods=['POST', 'OPTIONS'])
+@jwt_required
+def endpoint_import_products():
+
+    headers = request.headers
+    auth = headers.get('Authorization')
+
+    if not auth and 'Bearer' not in auth:
+        return request_unauthorized()
+    else:
+        if request.method == 'OPTIONS':
+            headers = {
+                'Access-Control-Allow-Methods': 'POST, OPTIONS',
+                'Access-Control-Max-Age': 1000,
+                'Access-Control-Allow-Headers': 'origin, x-csrftoken, content-type, accept',
+            }
+            return '', 200, headers
+
+        elif request.method == 'POST':
+
+            file_storage = request.files.get('file')
+
+            if file_storage is None:
+                return request_conflict()
+
+            file_format = request.form.get('format') or get_import_file_format(file_storage.filename,
+                                                                               file_storage.mimetype)
+
+            if file_format not in IMPORT_FILE_FORMATS:
+                return request_conflict()
+
+            try:
+                json_data = import_products_file(file_storage, file_format)
+            except mvc_exc.DatabaseError as error:
+                logger.error('Products Import rejected: %s', error)
+                return request_conflict()
+
+            return json_response(json_data)
+
+        else:
+            return not_found()
+
+
+@app.route('/api/ecommerce/cache/stats/', methods=['GET', 'OPTIONS'])
+@jwt_required
+def endpoint_local_caches_stats():
+
+    headers = request.headers
+    auth = headers.get('Authorization')
+
+    if not auth and 'Bearer' not in auth:
+        return request_unauthorized()
+    else:
+        if request.method == 'OPTIONS':
+            headers = {
+                'Access-Control-Allow-Methods': 'GET, OPTIONS',
+                'Access-Control-Max-Age': 1000,
+                'Access-Control-Allow-Headers': 'origin, x-csrftoken, content-type, accept',
+            }
+            return '', 200, headers
+
+        elif request.method == 'GET':
+
+            # Contadores del proceso (worker) que atiende la peticion
+            stock_write_buffer = get_stock_write_buffer()
+            cache_event_listener = get_cache_event_listener()
+
+            json_data = {
+                "ProcessId": os.getpid(),
+                "Caches": get_local_caches_stats(),
+                "StockWriteBuffer": stock_write_buffer.stats() if stock_write_buffer is not None else None,
+                "CacheEvents": cache_event_listener.stats() if cache_event_listener is not None else None,
+            }
+
+            return json_response(json_data)
 
         else:
             return not_found()
@@ -571,9 +1305,7 @@ def get_authentication():
 
             json_token = user_registration(user_name, password)
 
-            json_token = json.dumps(json_token)
-
-            return json_token
+            return json_response(json_token)
 
         else:
             return request_conflict()
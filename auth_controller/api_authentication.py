@@ -13,7 +13,7 @@ from passlib.hash import pbkdf2_sha256 as sha256
 from flask_jwt_extended import (create_access_token, create_refresh_token, jwt_required, jwt_refresh_token_required,
                                 get_jwt_identity, get_raw_jwt)
 from db_controller.database_backend import *
-import uuid
+from utilities.identifiers import uuid7
 
 
 logger = configure_ws_logger()
@@ -39,7 +39,7 @@ def user_registration(user_name, user_password):
 
             refresh_token = create_refresh_token(identity=user_name)
 
-            id_user = uuid.uuid1()
+            id_user = uuid7()
 
             UsersAuth.manage_user_authentication(id_user.int, user_name, user_password, password_hash)
 
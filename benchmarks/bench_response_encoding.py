@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+
+CPU cost of encoding a product list response.
+
+Compares the former path, where the backend returned a JSON string that app.py parsed and encoded
+again (json.dumps -> json.loads -> json.dumps), with the current one, where the backend returns
+the native structure and json_response encodes it once with utilities.serializer (orjson when it
+is installed). The rows carry Decimal, datetime and UUID values, as returned by psycopg2.
+
+Usage: python benchmarks/bench_response_encoding.py [products] [repetitions]
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A19.1 ($Rev: 1 $)"
+
+import datetime
+import decimal
+import json
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utilities import serializer  # noqa: E402
+
+
+def build_products(products_count):
+    return [{
+        "Product": {
+            "IdProduct": uuid.uuid4(),
+            "SKUProduct": "SKU-{:08d}".format(index),
+            "UNSPC": "43211503",
+            "NameProduct": "Product {}".format(index),
+            "TitleProduct": "Product title {}".format(index),
+            "BrandProduct": "Brand",
+            "UOMProduct": "PZA",
+            "CategoryIdProduct": 10,
+            "ParentCategoryIdProduct": 1,
+            "StockProduct": decimal.Decimal(index % 500),
+            "CodeStore": "A-{:02d}".format(index % 100),
+            "NameStore": "Store {}".format(index % 100),
+            "LongDescriptionProduct": "Long description of the product " * 4,
+            "PhotoProduct": "https://cdn.example.com/products/{}.jpg".format(index),
+            "Prices": {
+                "PriceProduct": decimal.Decimal('199.90'),
+                "TaxPriceProduct": decimal.Decimal('31.98'),
+                "CurrencyPriceProduct": "MXN",
+            },
+            "StatusProduct": "Activo",
+            "PublishedProduct": True,
+            "ManageStockProduct": True,
+            "Volumetry": {
+                "LengthProduct": 10.5,
+                "WidthProduct": 20.0,
+                "HeightProduct": 5.25,
+                "WeightProduct": 700.0,
+            },
+            "CreationDate": datetime.datetime(2021, 3, 1, 10, 0, 0),
+            "LastUpdateDate": datetime.datetime(2021, 3, 2, 11, 30, 0),
+        }
+    } for index in range(products_count)]
+
+
+def double_encoding(products):
+    backend_response = json.dumps(products, default=serializer.encode_default)
+    app_data = json.loads(backend_response)
+
+    return json.dumps(app_data)
+
+
+def single_encoding(products):
+    return json.dumps(products, default=serializer.encode_default)
+
+
+def serializer_encoding(products):
+    return serializer.dumps_bytes(products)
+
+
+def measure(function, products, repetitions):
+    started_at = time.process_time()
+
+    for _ in range(repetitions):
+        function(products)
+
+    return (time.process_time() - started_at) / repetitions
+
+
+if __name__ == "__main__":
+    products_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    products_list = build_products(products_count)
+
+    double_seconds = measure(double_encoding, products_list, repetitions)
+    single_seconds = measure(single_encoding, products_list, repetitions)
+    serializer_seconds = measure(serializer_encoding, products_list, repetitions)
+
+    print('Products per response: {}'.format(products_count))
+    print('dumps -> loads -> dumps: {:.2f} ms CPU per response'.format(double_seconds * 1000))
+    print('dumps once:              {:.2f} ms CPU per response'.format(single_seconds * 1000))
+    print('CPU saved:               {:.2f} ms per response ({:.0%})'.format(
+        (double_seconds - single_seconds) * 1000, 1 - single_seconds / double_seconds))
+    print('{:<25}{:.2f} ms CPU per response'.format('serializer ({}):'.format(serializer.JSON_BACKEND),
+                                                     serializer_seconds * 1000))
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+
+Insert throughput and primary key size with random (version 4) and time ordered (version 7) UUIDs.
+
+Loads the same number of rows, in batches as the bulk importers do, into two tables with a uuid
+primary key and reports the rows per second and the size of each primary key index. Runs against
+the database of the constants file; the tables are created and dropped in a transaction that is
+rolled back.
+
+Usage: python benchmarks/bench_uuid_keys.py [rows] [batch_size]
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A19.1 ($Rev: 1 $)"
+
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from psycopg2 import extras  # noqa: E402
+
+from db_controller.connection_pool import get_connection_pool  # noqa: E402
+from utilities.identifiers import uuid7  # noqa: E402
+
+ID_GENERATORS = (('uuid4', uuid.uuid4), ('uuid7', uuid7))
+
+
+def load_rows(cursor, table_name, id_generator, rows_count, batch_size):
+    cursor.execute("CREATE TABLE {} (id uuid PRIMARY KEY, payload varchar NOT NULL)".format(table_name))
+
+    started_at = time.perf_counter()
+
+    for batch_start in range(0, rows_count, batch_size):
+        batch_rows = [(id_generator(), 'product {}'.format(index))
+                      for index in range(batch_start, min(batch_start + batch_size, rows_count))]
+
+        extras.execute_values(cursor, "INSERT INTO {} (id, payload) VALUES %s".format(table_name), batch_rows,
+                              page_size=batch_size)
+
+    elapsed_seconds = time.perf_counter() - started_at
+
+    cursor.execute("SELECT pg_relation_size('{}_pkey')".format(table_name))
+
+    return elapsed_seconds, cursor.fetchone()[0]
+
+
+if __name__ == "__main__":
+    rows_total = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    rows_per_batch = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    pool_obj = get_connection_pool()
+    conn = pool_obj.getconn()
+
+    try:
+        with conn.cursor() as bench_cursor:
+            print('Rows: {}, batch size: {}'.format(rows_total, rows_per_batch))
+
+            for generator_name, generator in ID_GENERATORS:
+                seconds, index_bytes = load_rows(bench_cursor, 'bench_keys_{}'.format(generator_name), generator,
+                                                 rows_total, rows_per_batch)
+
+                print('{}: {:.0f} rows/s, primary key {:.1f} MB'.format(generator_name, rows_total / seconds,
+                                                                      index_bytes / 1024 / 1024))
+    finally:
+        conn.rollback()
+        pool_obj.putconn(conn)
@@ -1,3 +1 @@
 # -*- coding: utf-8 -*-
-
-from . import constants
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+
+Process-wide configuration.
+
+The constants file is parsed once per process and served from an immutable in-memory object,
+so reading the configuration never touches the disk on the request path.
+
+Documentation:
+    - The file is read from ECOMMERCE_CONSTANTS_FILE or, by default, constants.yml of this package.
+    - Any value can be overridden with an environment variable named ECOMMERCE__<SECTION>__<KEY>,
+      for example: ECOMMERCE__DB_RDS__HOST_DB=db.internal or ECOMMERCE__DB_POOL__MAX_CONNECTIONS=20.
+      The value is parsed as YAML, so numbers, booleans and lists keep their type.
+    - reload_settings() (or the signal installed with install_reload_signal) parses the file again
+      and swaps the configuration atomically. Values already captured at import time, like the
+      table names of the SQLAlchemy models, need a restart.
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A19.1 ($Rev: 1 $)"
+
+import os
+import signal
+import threading
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Tuple
+
+import yaml
+
+CONSTANTS_FILE_ENV = 'ECOMMERCE_CONSTANTS_FILE'
+ENV_OVERRIDE_PREFIX = 'ECOMMERCE__'
+DEFAULT_CONSTANTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'constants.yml')
+
+_settings_lock = threading.Lock()
+_settings = None
+
+
+class DatabaseSettings(NamedTuple):
+    driver: str
+    user: str
+    password: str
+    host: str
+    port: str
+    name: str
+
+
+class PoolSettings(NamedTuple):
+    min_connections: int
+    max_connections: int
+    checkout_timeout: float
+    connect_timeout: int
+    pre_ping: bool
+    recycle_seconds: int
+
+
+class LogSettings(NamedTuple):
+    file_extension: str
+    ws_file_log_name: str
+    db_file_log_name: str
+    app_file_log_name: str
+    directory_log_files: str
+
+
+class Settings(NamedTuple):
+    r"""
+    Immutable view of the constants file.
+
+    raw keeps the original sections (read-only) for the code that reads cfg['SECTION']['KEY'].
+    """
+
+    raw: Mapping
+    source_file: str
+    db: DatabaseSettings
+    db_pool: PoolSettings
+    log: LogSettings
+    store_table: str
+    product_table: str
+    users_auth_table: str
+    store_columns: Mapping[str, str]
+    product_columns: Mapping[str, str]
+    user_auth_columns: Mapping[str, str]
+    product_status_list: Tuple[str, ...]
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+
+    return value
+
+
+def _apply_env_overrides(cfg, environ):
+    for env_name, env_value in environ.items():
+        if not env_name.startswith(ENV_OVERRIDE_PREFIX):
+            continue
+
+        path = env_name[len(ENV_OVERRIDE_PREFIX):].split('__')
+        section = cfg
+
+        for key in path[:-1]:
+            section = section.setdefault(key, {})
+
+        section[path[-1]] = yaml.safe_load(env_value)
+
+    return cfg
+
+
+def build_settings(cfg, source_file=''):
+    r"""
+    Build the immutable Settings object from the parsed constants.
+
+    :param cfg: Dictionary with the sections of the constants file (overrides already applied).
+    :param source_file: Path of the file parsed.
+    :return settings: Settings object.
+    """
+
+    frozen = _freeze(cfg)
+
+    db_cfg = frozen['DB_RDS']
+    pool_cfg = frozen['DB_POOL']
+    log_cfg = frozen['LOG_RESOURCE']
+
+    return Settings(
+        raw=frozen,
+        source_file=source_file,
+        db=DatabaseSettings(driver=db_cfg['SQL_DRIVER'],
+                            user=db_cfg['USER_DB'],
+                            password=db_cfg['PASSWORD_DB'],
+                            host=db_cfg['HOST_DB'],
+                            port=str(db_cfg['PORT_DB']),
+                            name=db_cfg['DATABASE_NAME']),
+        db_pool=PoolSettings(min_connections=int(pool_cfg['MIN_CONNECTIONS']),
+                             max_connections=int(pool_cfg['MAX_CONNECTIONS']),
+                             checkout_timeout=float(pool_cfg['CHECKOUT_TIMEOUT']),
+                             connect_timeout=int(pool_cfg['CONNECT_TIMEOUT']),
+                             pre_ping=bool(pool_cfg['PRE_PING']),
+                             recycle_seconds=int(pool_cfg['RECYCLE_SECONDS'])),
+        log=LogSettings(file_extension=log_cfg['FILE_EXTENSION'],
+                        ws_file_log_name=log_cfg['WS_FILE_LOG_NAME'],
+                        db_file_log_name=log_cfg['DB_FILE_LOG_NAME'],
+                        app_file_log_name=log_cfg['APP_FILE_LOG_NAME'],
+                        directory_log_files=log_cfg['DIRECTORY_LOG_FILES']),
+        store_table=frozen['DB_OBJECTS']['STORE_TABLE'],
+        product_table=frozen['DB_OBJECTS']['PRODUCT_TABLE'],
+        users_auth_table=frozen['DB_AUTH_OBJECT']['USERS_AUTH'],
+        store_columns=frozen['DB_COLUMNS_DATA']['STORE_API'],
+        product_columns=frozen['DB_COLUMNS_DATA']['PRODUCT_API'],
+        user_auth_columns=frozen['DB_AUTH_COLUMNS_DATA']['USER_AUTH'],
+        product_status_list=frozen['PRODUCT_STATUS_CHECK_LIST'],
+    )
+
+
+def load_settings(constants_file=None, environ=None):
+    r"""
+    Parse the constants file and apply the environment overrides.
+
+    :param constants_file: Path of the constants file, by default the one of ECOMMERCE_CONSTANTS_FILE.
+    :param environ: Mapping of environment variables, by default os.environ.
+    :return settings: Settings object.
+    """
+
+    environ = os.environ if environ is None else environ
+    constants_file = constants_file or environ.get(CONSTANTS_FILE_ENV, DEFAULT_CONSTANTS_FILE)
+
+    try:
+        with open(constants_file, 'r') as ymlfile:
+            cfg = yaml.safe_load(ymlfile) or {}
+
+    except yaml.YAMLError as exc:
+        raise ValueError(
+            'Your settings file {} contain invalid YAML syntax! Please fix and restart!, {}'.format(constants_file,
+                                                                                                    exc)
+        )
+
+    return build_settings(_apply_env_overrides(cfg, environ), constants_file)
+
+
+def get_settings():
+    r"""
+    Get the configuration of the process, parsing the constants file only the first time.
+
+    :return settings: Settings object.
+    """
+
+    settings = _settings
+
+    if settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _set_settings(load_settings())
+            settings = _settings
+
+    return settings
+
+
+def reload_settings():
+    r"""
+    Parse the constants file again and replace the configuration of the process.
+    If the new file is not valid the current configuration is kept.
+
+    :return settings: Settings object loaded.
+    """
+
+    settings = load_settings()
+
+    with _settings_lock:
+        _set_settings(settings)
+
+    return settings
+
+
+def install_reload_signal(signum=signal.SIGHUP):
+    r"""
+    Reload the configuration when the process receives signum.
+    Only possible from the main thread; it is ignored elsewhere.
+
+    :param signum: Signal number that triggers the reload.
+    """
+
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    def handle_reload(received_signum, frame):
+        reload_settings()
+
+    signal.signal(signum, handle_reload)
+
+
+def _set_settings(settings):
+    global _settings
+
+    _settings = settings
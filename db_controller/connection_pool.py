@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+
+PostgreSQL connection pool.
+
+Keeps a bounded set of open connections per process (one pool per gunicorn worker) so the backend
+does not pay the TCP/authentication handshake on every transaction.
+
+Documentation:
+    - The pool size is configured on the DB_POOL section of the constants file.
+    - A checkout waits up to CHECKOUT_TIMEOUT seconds for a free connection and then raises TimeoutError.
+    - A connection is validated with a cheap ping before it is handed out (PRE_PING) and is closed and
+      replaced once it is older than RECYCLE_SECONDS.
+    - The pool is rebuilt automatically when the process id changes (after a fork).
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A19.1 ($Rev: 1 $)"
+
+import atexit
+import os
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions, extras
+
+from db_controller import mvc_exceptions as mvc_exc
+from logger_controller.logger_control import *
+from constants.settings import get_settings
+
+logger = configure_db_logger()
+
+# uuid.UUID parameters are sent as uuid and the uuid columns are read as uuid.UUID
+extras.register_uuid()
+
+_pool_lock = threading.Lock()
+_pool_instance = None
+
+
+class ConnectionPool:
+    r"""
+    Thread safe pool of PostgreSQL connections with checkout timeout, pre-ping and recycling.
+
+    Idle connections are kept on a LIFO list, so the most recently used (and warmest) connection is
+    reused first; the semaphore bounds the number of connections open at the same time.
+    """
+
+    def __init__(self, min_size, max_size, checkout_timeout, pre_ping, recycle_seconds, **connect_kwargs):
+        self.pid = os.getpid()
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.pre_ping = pre_ping
+        self.recycle_seconds = recycle_seconds
+
+        self._connect_kwargs = connect_kwargs
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._created_at = dict()
+
+        for _ in range(min_size):
+            self._idle.append(self._connect())
+
+    def getconn(self):
+        r"""
+        Checkout a connection from the pool.
+
+        :return connection: Live connection, validated and not older than the recycle time.
+        """
+
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            logger.error('Timeout waiting for a database connection from the pool (max size: %s)', self.max_size)
+            raise mvc_exc.TimeoutError(
+                'Can not checkout a database connection after {} seconds, the pool is exhausted.'.format(
+                    self.checkout_timeout
+                )
+            )
+
+        try:
+            conn = None
+
+            while conn is None:
+                with self._lock:
+                    idle_conn = self._idle.pop() if self._idle else None
+
+                if idle_conn is None:
+                    conn = self._connect()
+                elif self._is_expired(idle_conn) or not self._is_alive(idle_conn):
+                    self._discard(idle_conn)
+                else:
+                    conn = idle_conn
+
+        except Exception:
+            self._slots.release()
+            raise
+
+        return conn
+
+    def putconn(self, conn):
+        r"""
+        Return a connection to the pool, rolling back any transaction left open.
+
+        :param conn: Connection obtained from getconn.
+        """
+
+        try:
+            if conn.closed or conn.get_transaction_status() == extensions.TRANSACTION_STATUS_UNKNOWN:
+                self._discard(conn)
+                return
+
+            if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+
+            with self._lock:
+                self._idle.append(conn)
+
+        except psycopg2.Error as error:
+            logger.warning('Discarding a broken database connection: %s', error)
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+    def closeall(self):
+        r"""
+        Close every idle connection of the pool, only for the process that created it.
+        """
+
+        if self.pid != os.getpid():
+            return
+
+        with self._lock:
+            idle_conns, self._idle = self._idle, []
+
+        for conn in idle_conns:
+            self._discard(conn)
+
+    def _connect(self):
+        conn = psycopg2.connect(**self._connect_kwargs)
+        self._created_at[id(conn)] = time.monotonic()
+
+        return conn
+
+    def _discard(self, conn):
+        self._created_at.pop(id(conn), None)
+
+        if not conn.closed:
+            conn.close()
+
+    def _is_expired(self, conn):
+        created_at = self._created_at.get(id(conn))
+
+        if not self.recycle_seconds or created_at is None:
+            return False
+
+        return time.monotonic() - created_at > self.recycle_seconds
+
+    def _is_alive(self, conn):
+        if conn.closed:
+            return False
+
+        if not self.pre_ping:
+            return True
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            conn.rollback()
+
+        except psycopg2.Error:
+            logger.warning('Database connection failed the pre-ping, reconnecting')
+            return False
+
+        return True
+
+
+def init_connection_pool():
+    r"""
+    Build the connection pool of the current process with the data of the constants file.
+
+    :return pool_obj: ConnectionPool instance.
+    """
+
+    settings = get_settings()
+
+    db_cfg = settings.db
+    pool_cfg = settings.db_pool
+
+    try:
+        pool_obj = ConnectionPool(pool_cfg.min_connections,
+                                  pool_cfg.max_connections,
+                                  pool_cfg.checkout_timeout,
+                                  pool_cfg.pre_ping,
+                                  pool_cfg.recycle_seconds,
+                                  user=db_cfg.user,
+                                  password=db_cfg.password,
+                                  host=db_cfg.host,
+                                  port=db_cfg.port,
+                                  database=db_cfg.name,
+                                  connect_timeout=pool_cfg.connect_timeout)
+
+    except (Exception, psycopg2.Error) as error:
+        logger.exception('Can not create the connection pool to database %s', db_cfg.name)
+        raise mvc_exc.ConnectionError(
+            '"{}" Can not connect to database, verify data connection to "{}".\nOriginal Exception raised: {}'.format(
+                db_cfg.host, db_cfg.name, error
+            )
+        )
+
+    logger.info('Connection pool created for process %s: min %s, max %s connections',
+                pool_obj.pid, pool_cfg.min_connections, pool_cfg.max_connections)
+
+    return pool_obj
+
+
+def open_dedicated_connection():
+    r"""
+    Open a connection outside the pool, with the data of the constants file, for the work that keeps
+    it for the whole life of the process (LISTEN).
+
+    :return conn: New psycopg2 connection, closed by the caller.
+    """
+
+    settings = get_settings()
+
+    db_cfg = settings.db
+
+    return psycopg2.connect(user=db_cfg.user,
+                            password=db_cfg.password,
+                            host=db_cfg.host,
+                            port=db_cfg.port,
+                            database=db_cfg.name,
+                            connect_timeout=settings.db_pool.connect_timeout)
+
+
+def get_connection_pool():
+    r"""
+    Get the connection pool of the current process, creating it on first use or after a fork.
+
+    The connections inherited from the parent process are never closed by the child, because
+    they share the same sockets with the parent.
+
+    :return pool_obj: ConnectionPool instance of this process.
+    """
+
+    global _pool_instance
+
+    pool_obj = _pool_instance
+
+    if pool_obj is None or pool_obj.pid != os.getpid():
+        with _pool_lock:
+            if _pool_instance is None or _pool_instance.pid != os.getpid():
+                _pool_instance = init_connection_pool()
+            pool_obj = _pool_instance
+
+    return pool_obj
+
+
+def close_connection_pool():
+    r"""
+    Close all the connections of the pool of the current process.
+    """
+
+    global _pool_instance
+
+    with _pool_lock:
+        if _pool_instance is not None:
+            _pool_instance.closeall()
+            _pool_instance = None
+
+
+atexit.register(close_connection_pool)
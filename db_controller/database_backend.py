@@ -27,20 +27,34 @@ __license__ = ""
 __history__ = """ """
 __version__ = "1.1.A19.1 ($Rev: 1 $)"
 
+import atexit
 import json
 import logging
+import os
+import threading
+import time
+import uuid
 from datetime import datetime
 
 import psycopg2
+from psycopg2 import extras
+from psycopg2.errors import CheckViolation
 from sqlalchemy import Column, String, Numeric, Boolean
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.declarative import declarative_base
 
 from db_controller import mvc_exceptions as mvc_exc
+from db_controller.connection_pool import get_connection_pool, open_dedicated_connection
+from db_controller.unit_of_work import current_unit_of_work, run_after_commit
 from logger_controller.logger_control import *
 from model.StoreModel import StoreModel
 from model.ProductModel import ProductModel
 from utilities.Utility import Utility as Util
+from utilities.local_cache import MISSING, get_local_cache
+from utilities.product_import import CopyRowsStream, IMPORT_PRODUCT_COLUMNS, read_import_rows
+from utilities.identifiers import uuid7
+from utilities.stock_write_buffer import StockWriteBuffer
+from utilities.cache_events import CacheEventListener, publish_cache_events
 
 logging.basicConfig()
 logging.getLogger('sqlalchemy.engine').setLevel(logging.DEBUG)
@@ -48,6 +62,103 @@ logging.getLogger('sqlalchemy.engine').setLevel(logging.DEBUG)
 Base = declarative_base()
 logger = configure_db_logger()
 
+_cache_cfg = Util.get_config_constant_file()['LOCAL_CACHE']
+
+# Cache store_code -> id_store, the stores almost never change
+store_id_cache = get_local_cache('store_id',
+                                 int(_cache_cfg['STORE_ID']['MAX_SIZE']),
+                                 int(_cache_cfg['STORE_ID']['TTL_SECONDS']))
+
+# Cache of the stock lookups, keyed by (sku) and (sku, store_code) and grouped by sku.
+# The values are shared by the threads of the worker, they are never modified once cached.
+stock_cache = get_local_cache('stock',
+                              int(_cache_cfg['STOCK']['MAX_SIZE']),
+                              int(_cache_cfg['STOCK']['TTL_SECONDS']))
+
+
+def invalidate_stock_cache(product_sku=None):
+    r"""
+    Invalidate the stock cached of a product, or of all the products when product_sku is None.
+    It is done right away and again when the transaction ends, so a read made before the commit
+    (or of data rolled back) does not stay cached.
+
+    :param product_sku: SKU of the product changed.
+    """
+
+    def invalidate():
+        if product_sku is None:
+            stock_cache.clear()
+        else:
+            stock_cache.invalidate_group(product_sku)
+
+    invalidate()
+    run_after_commit(invalidate, on_rollback=True)
+
+
+def notify_cache_change(cursor, entity, keys=None):
+    r"""
+    Publish to the other workers and nodes (CACHE_EVENTS) that some keys of an entity changed.
+    It is called before the commit, so the event is sent only if the transaction is committed.
+
+    :param cursor: Cursor of the transaction that writes the data.
+    :param entity: Entity changed: stock (keys are SKUs) or store (keys are store codes).
+    :param keys: Keys changed, None for all the entries of the entity.
+    """
+
+    cfg = Util.get_config_constant_file()
+
+    if not cfg['CACHE_EVENTS']['ENABLED']:
+        return
+
+    publish_cache_events(cursor, cfg['CACHE_EVENTS']['CHANNEL'], entity, keys)
+
+
+def _invalidate_stock_event(product_sku):
+    if product_sku is None:
+        stock_cache.clear()
+    else:
+        stock_cache.invalidate_group(product_sku)
+
+
+def _invalidate_store_event(store_code):
+    if store_code is None:
+        store_id_cache.clear()
+    else:
+        store_id_cache.delete(store_code)
+
+
+_cache_event_listener_lock = threading.Lock()
+_cache_event_listener = None
+
+
+def get_cache_event_listener():
+    r"""
+    Get the cache event listener of the process (CACHE_EVENTS.ENABLED), started on the first use.
+
+    :return cache_event_listener: CacheEventListener object, None when the events are disabled.
+    """
+
+    global _cache_event_listener
+
+    cfg = Util.get_config_constant_file()
+
+    if not cfg['CACHE_EVENTS']['ENABLED']:
+        return None
+
+    with _cache_event_listener_lock:
+        # The thread of the parent process does not exist on a forked one
+        if _cache_event_listener is None or _cache_event_listener.pid != os.getpid():
+            _cache_event_listener = CacheEventListener(open_dedicated_connection,
+                                                       cfg['CACHE_EVENTS']['CHANNEL'],
+                                                       int(cfg['CACHE_EVENTS']['RECONNECT_SECONDS']))
+            _cache_event_listener.register('stock', _invalidate_stock_event)
+            _cache_event_listener.register('store', _invalidate_store_event)
+            _cache_event_listener.start()
+
+            atexit.register(_cache_event_listener.close)
+
+        return _cache_event_listener
+
 
 # Datos de conecxion a base de datos
 def init_connect_db():
@@ -78,27 +189,29 @@ def session_to_db():
     r"""
     Get and manage the session connect to the database engine.
 
+    The connection is checked out from the connection pool of the current process and must be
+    returned with disconnect_from_db. When a unit of work is active (an API request), the connection
+    of the unit of work is returned, so every function of the request shares one transaction.
+
     :return connection: Object to connect to the database and transact on it.
     """
 
-    data_bd_connection = init_connect_db()
-
     connection = None
 
-    try:
-
-        if data_bd_connection:
+    unit_of_work = current_unit_of_work()
 
-            connection = psycopg2.connect(user=data_bd_connection[1],
-                                          password=data_bd_connection[2],
-                                          host=data_bd_connection[0],
-                                          port=data_bd_connection[3],
-                                          database=data_bd_connection[4])
+    try:
 
+        if unit_of_work is not None:
+            connection = unit_of_work.connection()
         else:
-            logger.error('Some data is not established to connect PostgreSQL DB. Please verify it!')
+            connection = get_connection_pool().getconn()
 
+    except mvc_exc.TimeoutError:
+        raise
     except (Exception, psycopg2.Error) as error:
+        data_bd_connection = init_connect_db()
+
         logger.exception('Can not connect to database, verify data connection to %s', data_bd_connection[4],
                          error, exc_info=True)
         raise mvc_exc.ConnectionError(
@@ -127,13 +240,14 @@ def scrub(input_string):
 def create_cursor(conn):
     r"""
     Create an object statement to transact to the database and manage his data.
+    The rows fetched can be read by column name or by position.
 
     :param conn: Object to connect to the database.
     :return cursor: Object statement to transact to the database with the connection.
 
     """
     try:
-        cursor = conn.cursor()
+        cursor = conn.cursor(cursor_factory=extras.DictCursor)
 
     except (Exception, psycopg2.Error) as error:
         logger.exception('Can not create the cursor object, verify database connection', error, exc_info=True)
@@ -148,249 +262,237 @@ def create_cursor(conn):
 
 def disconnect_from_db(conn):
     r"""
-    Generate close session to the database through the disconnection of the conn object.
+    Generate close session to the database, returning the conn object to the connection pool.
+    The connection of an active unit of work is kept open until the unit of work ends.
 
     :param conn: Object connector to close session.
     """
 
-    if conn is not None:
-        conn.close()
+    unit_of_work = current_unit_of_work()
 
+    if conn is not None and (unit_of_work is None or not unit_of_work.owns(conn)):
+        get_connection_pool().putconn(conn)
 
-def close_cursor(cursor):
+
+def commit_transaction(conn):
     r"""
-    Generate close statement to the database through the disconnection of the cursor object.
+    Commit the transaction of the conn object.
+    Inside a unit of work the commit is deferred until the unit of work ends.
 
-    :param cursor: Object cursor to close statement.
+    :param conn: Object connector to commit.
     """
 
-    if cursor is not None:
-        cursor.close()
+    unit_of_work = current_unit_of_work()
+
+    if conn is not None and (unit_of_work is None or not unit_of_work.owns(conn)):
+        conn.commit()
 
 
-def get_datenow_from_db():
+def rollback_transaction(conn):
     r"""
-    Get the current date and hour from the database server to set to the row registered or updated.
+    Rollback the transaction of the conn object, the whole unit of work when one is active.
 
-    :return last_updated_date: The current day with hour to set the date value.
+    :param conn: Object connector to rollback.
     """
 
-    conn = None
-    cursor = None
-    last_updated_date = None
-    sql_nowdate = ''
-
-    try:
-
-        sql_nowdate = 'SELECT now()'
-
-        conn = session_to_db()
-        cursor = create_cursor(conn)
+    if conn is not None and not conn.closed:
+        conn.rollback()
 
-        cursor.execute(sql_nowdate)
 
-        result = cursor.fetchall()
+def close_cursor(cursor):
+    r"""
+    Generate close statement to the database through the disconnection of the cursor object.
 
-        if result is not None:
-            last_updated_date = result
+    :param cursor: Object cursor to close statement.
+    """
 
+    if cursor is not None:
         cursor.close()
 
-    except SQLAlchemyError as error:
-        conn.rollback()
-        logger.exception('An exception occurred while execute transaction: %s', error)
-        raise SQLAlchemyError(
-            "A SQL Exception {} occurred while transacting with the database.".format(error)
-        )
-    finally:
-        disconnect_from_db(conn)
 
-    return last_updated_date
+# CHECK of product_api that keeps the units reserved within the stock of the product (migration V007)
+RESERVED_STOCK_CONSTRAINT = 'product_api_reserved_stock_check'
 
 
-def exists_row_registered(table_name, column_name, data_find):
+def reserved_stock_error(error, product_sku, store_code):
     r"""
-    Looking for a user by name on the database to valid authentication.
+    Translate the violation of the reserved stock CHECK to the error answered with a conflict by the API.
 
-    :param table_name:
-    :param column_name: The column name to valid existence on the db.
-    :param data_find: The data to filter and looking for if a row exists registered.
-    :return result: Boolean to valid if the data exists on the table.
+    :param error: CheckViolation raised by a write of product_stock.
+    :param product_sku: SKU of the product written.
+    :param store_code: Store code of the product written.
+    :return error: mvc_exc.IntegrityError for RESERVED_STOCK_CONSTRAINT, the same error for any other CHECK.
     """
 
-    conn = session_to_db()
-
-    cursor = create_cursor(conn)
-
-    sql_check = "SELECT EXISTS(SELECT 1 FROM {} WHERE {} = {} LIMIT 1)".format(table_name, column_name, data_find)
+    if error.diag.constraint_name != RESERVED_STOCK_CONSTRAINT:
+        return error
 
-    cursor.execute(sql_check)
+    logger.error('Stock rejected, lower than the units reserved: %s', 'SKU: {}, Store: {}'.format(product_sku,
+                                                                                                 store_code))
 
-    result = cursor.fetchone()[0]
-
-    close_cursor(cursor)
-    disconnect_from_db(conn)
-
-    return result
+    return mvc_exc.IntegrityError(
+        'The stock of the product "{}" in the store "{}" can not be lower than the units reserved'.format(
+            product_sku, store_code
+        )
+    )
 
 
-def exists_data_row(table_name, column_name, column_filter1, value1, column_filter2, value2):
+class StoreModelDb(Base):
     r"""
-    Transaction that validates the existence and searches for a certain record in the database.
-
-    :param table_name: The table name to looking for data.
-    :param column_name: The name of the column to find existence.
-    :param column_filter1: The name of the first column filter to looking for data.
-    :param value1: The value of the first filter to looking for data.
-    :param column_filter2: The name of the next column filter to looking for data.
-    :param value2: The value of the next filter to looking for data.
-    :return row_data: The data if row exists.
+    Class to instance the data of a Store on the database.
+    Transactions:
+     - Insert: Add Van data to the database if not exists.
+     - Update: Update Van data on the database if exists.
     """
 
-    conn = None
-    cursor = None
-    row_data = None
-
-    try:
-        conn = session_to_db()
-        cursor = create_cursor(conn)
-
-        sql_exists = f"SELECT {column_name} FROM {table_name} " \
-                     f"WHERE {column_filter1} = {value1} AND {column_filter2} = '{value2}'"
-
-        cursor.execute(sql_exists)
-
-        row_exists = cursor.fetchall()
+    cfg = Util.get_config_constant_file()
 
-        for r_e in row_exists:
+    __tablename__ = cfg['DB_OBJECTS']['STORE_TABLE']
 
-            logger.info('Row Info in Query: %s', str(r_e))
+    id_store = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['ID_STORE'], Numeric, primary_key=True)
+    name_store = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['STORE_NAME'], String)
+    code_store = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['STORE_CODE'], String)
+    street_store = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['STORE_STREET_ADDRESS'], String)
+    external_number_store = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['STORE_NUMBER_EXT_ADDRESS'], String)
+    suburb_store = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['STORE_SUBURB_ADDRESS'], String)
+    city_store = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['STORE_CITY_ADDRESS'], String)
+    country_store = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['STORE_COUNTRY_ADDRESS'], String)
+    postal_code_store = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['STORE_POSTAL_CODE'], String)
+    minimum_stock = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['STORE_MIN_STOCK'], Numeric)
+    creation_date = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['CREATION_DATE'], String)
+    last_update_date = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['LAST_UPDATE_DATE'], String)
 
-            if r_e is None:
-                r_e = None
-            else:
-                row_data = r_e[column_name]
+    def manage_store_data(self, store_obj):
 
-            # row_exists.close()
+        store_data = {}
 
-            close_cursor(cursor)
+        store_dict = Util.set_data_input_store_dict(store_obj)
 
-    except SQLAlchemyError as error:
-        conn.rollback()
-        logger.exception('An exception occurred while execute transaction: %s', error)
-        raise SQLAlchemyError(
-            "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, table_name)
-        )
-    finally:
-        disconnect_from_db(conn)
+        store_data = upsert_store_data(store_dict)
 
-    return row_data
+        return store_data
 
 
-def validate_transaction(table_name,
-                         column_name,
-                         column_filter1, value1,
-                         column_filter2, value2,
-                         column_filter3, value3):
+# Insert or update the Store data in a single statement
+def upsert_store_data(data_store):
     r"""
-    Transaction that validates the existence and searches for a certain record in the database.
-
-    :param table_name: The table name to looking for data.
-    :param column_name: The name of the column to find existence.
-    :param column_filter1: The name of the first column filter to looking for data.
-    :param value1: The value of the first filter to looking for data.
-    :param column_filter2: The name of the next column filter to looking for data.
-    :param value2: The value of the next filter to looking for data.
-    :param column_filter3: The name of the next column filter to looking for data.
-    :param value3: The value of the next filter to looking for data.
-    :return row_data: The data if row exists.
+    Transaction to add a store or update it when his code is already registered on database.
+    Uses INSERT ... ON CONFLICT (store_code) DO UPDATE, one statement for both cases.
+
+    :param data_store: Dictionary of all data store to add or update.
+    :return store_data_upserted: Dictionary that contains Store data inserted or updated on db.
     """
 
     conn = None
     cursor = None
-    row_data = None
-
-    try:
-        conn = session_to_db()
-        cursor = create_cursor(conn)
+    store_data_upserted = dict()
 
-        sql_exists = 'SELECT {} FROM {} WHERE {} = {} AND {} = {} AND {} = {}'.format(column_name, table_name,
-                                                                                      column_filter1, value1,
-                                                                                      column_filter2,
-                                                                                      "'" + value2 + "'",
-                                                                                      column_filter3,
-                                                                                      "'" + value3 + "'")
+    cfg = Util.get_config_constant_file()
 
-        cursor.execute(sql_exists)
+    table_name = cfg['DB_OBJECTS']['STORE_TABLE']
 
-        row_exists = cursor.fetchall()
+    try:
+        conn = session_to_db()
 
-        for r_e in row_exists:
+        cursor = create_cursor(conn)
 
-            logger.info('Row Info in Query: %s', str(r_e))
+        store_id = data_store.get("store_id")
+        store_code = data_store.get("store_code")
+        store_name = data_store.get("store_name")
+        store_street_address = data_store.get("street_address")
+        store_external_number = data_store.get("external_number_address")
+        store_suburb_address = data_store.get("suburb_address")
+        store_city_address = data_store.get("city_address")
+        store_country_address = data_store.get("country_address")
+        store_zippostal_code = data_store.get("zip_postal_code_address")
+        store_min_inventory = data_store.get("minimum_inventory")
 
-            if r_e is None:
-                r_e = None
-            else:
-                row_data = r_e[column_name]
+        if not Util.validate_store_code_syntax(store_code):
+            logger.error('Can not read the recordset: {}, because the store code is not valid: {}'.format(store_code,
+                                                                                                          table_name))
+            raise mvc_exc.ItemNotStored(
+                'Can\'t read "{}" because it\'s not stored in table "{}. SQL Exception"'.format(
+                    store_code, table_name
+                )
+            )
 
-            close_cursor(cursor)
+        data_upsert = (store_id, store_name, store_code, store_street_address, store_external_number,
+                       store_suburb_address, store_city_address, store_country_address, store_zippostal_code,
+                       store_min_inventory,)
 
-    except SQLAlchemyError as error:
-        conn.rollback()
-        logger.exception('An exception occurred while execute transaction: %s', error)
-        raise SQLAlchemyError(
-            "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, table_name)
-        )
-    finally:
-        disconnect_from_db(conn)
+        sql_store_upsert = 'INSERT INTO {} ' \
+                           '(id_store, ' \
+                           'store_name, ' \
+                           'store_code, ' \
+                           'store_street_address, ' \
+                           'store_external_number, ' \
+                           'store_suburb_address, ' \
+                           'store_city_address, ' \
+                           'store_country_address, ' \
+                           'store_zippostal_code, ' \
+                           'store_min_inventory, ' \
+                           'creation_date, ' \
+                           'last_update_date) VALUES(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, now(), now()) ' \
+                           'ON CONFLICT (store_code) DO UPDATE ' \
+                           'SET store_name=EXCLUDED.store_name, ' \
+                           'store_street_address=EXCLUDED.store_street_address, ' \
+                           'store_external_number=EXCLUDED.store_external_number, ' \
+                           'store_suburb_address=EXCLUDED.store_suburb_address, ' \
+                           'store_city_address=EXCLUDED.store_city_address, ' \
+                           'store_country_address=EXCLUDED.store_country_address, ' \
+                           'store_zippostal_code=EXCLUDED.store_zippostal_code, ' \
+                           'store_min_inventory=EXCLUDED.store_min_inventory, ' \
+                           'last_update_date=now() ' \
+                           'RETURNING id_store, creation_date, last_update_date, ' \
+                           '          (xmax = 0) AS inserted'.format(table_name)
 
-    return row_data
+        cursor.execute(sql_store_upsert, data_upsert)
 
+        store_row = cursor.fetchone()
 
-class StoreModelDb(Base):
-    r"""
-    Class to instance the data of a Store on the database.
-    Transactions:
-     - Insert: Add Van data to the database if not exists.
-     - Update: Update Van data on the database if exists.
-    """
+        notify_cache_change(cursor, 'store', [store_code])
+        notify_cache_change(cursor, 'stock')
 
-    cfg = Util.get_config_constant_file()
+        commit_transaction(conn)
 
-    __tablename__ = cfg['DB_OBJECTS']['STORE_TABLE']
+        invalidate_stock_cache()
 
-    id_store = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['ID_STORE'], Numeric, primary_key=True)
-    name_store = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['STORE_NAME'], String)
-    code_store = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['STORE_CODE'], String)
-    street_store = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['STORE_STREET_ADDRESS'], String)
-    external_number_store = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['STORE_NUMBER_EXT_ADDRESS'], String)
-    suburb_store = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['STORE_SUBURB_ADDRESS'], String)
-    city_store = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['STORE_CITY_ADDRESS'], String)
-    country_store = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['STORE_COUNTRY_ADDRESS'], String)
-    postal_code_store = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['STORE_POSTAL_CODE'], String)
-    minimum_stock = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['STORE_MIN_STOCK'], Numeric)
-    creation_date = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['CREATION_DATE'], String)
-    last_update_date = Column(cfg['DB_COLUMNS_DATA']['STORE_API']['LAST_UPDATE_DATE'], String)
+        run_after_commit(lambda: store_id_cache.set(store_code, store_row['id_store']))
 
-    def manage_store_data(self, store_obj):
+        close_cursor(cursor)
 
-        store_data = {}
+        address_store = Util.format_store_address(store_street_address,
+                                                  store_external_number,
+                                                  store_suburb_address,
+                                                  store_zippostal_code,
+                                                  store_city_address,
+                                                  store_country_address)
 
-        store_dict = Util.set_data_input_store_dict(store_obj)
+        store_data_upserted = {
+            "IdStore": store_row['id_store'],
+            "CodeStore": store_code,
+            "NameStore": store_name,
+            "AddressStore": address_store,
+            "MinimumStock": store_min_inventory,
+            "CreationDate": store_row['creation_date'],
+            "LastUpdateDate": store_row['last_update_date'],
+            "Message": "Store Inserted Successful" if store_row['inserted'] else "Store Updated Successful",
+        }
 
-        if exists_data_row(self.__tablename__,
-                           self.id_store,
-                           self.id_store,
-                           store_dict.get("store_id"),
-                           self.code_store,
-                           store_dict.get("store_code")):
+        logger.info('Store upserted %s', "{0}, Code: {1}, Name: {2}".format(store_row['id_store'],
+                                                                           store_code,
+                                                                           store_name))
 
-            store_data = update_store_data(store_dict)
-        else:
-            store_data = insert_new_store(store_dict)
+    except SQLAlchemyError as error:
+        rollback_transaction(conn)
+        logger.exception('An exception was occurred while execute transaction: %s', error)
+        raise SQLAlchemyError(
+            "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, table_name)
+        )
+    finally:
+        disconnect_from_db(conn)
 
-        return store_data
+    return store_data_upserted
 
 
 # Add Store data to insert the row on the database
@@ -416,14 +518,11 @@ def insert_new_store(data_store):
 
         table_name = cfg['DB_OBJECTS']['STORE_TABLE']
 
-        created_at = get_datenow_from_db()
-        last_update_date = get_datenow_from_db()
-
         store_id = data_store.get("store_id")
         store_code = data_store.get("store_code")
         store_name = data_store.get("store_name")
-        store_street_address = data_store("street_address")
-        store_external_number = data_store("external_number_address")
+        store_street_address = data_store.get("street_address")
+        store_external_number = data_store.get("external_number_address")
         store_suburb_address = data_store.get("suburb_address")
         store_city_address = data_store.get("city_address")
         store_country_address = data_store.get("country_address")
@@ -439,7 +538,7 @@ def insert_new_store(data_store):
                 )
             )
 
-        data_insert = (store_id, store_code, store_name, store_external_number, store_street_address,
+        data_insert = (store_id, store_name, store_code, store_street_address, store_external_number,
                        store_suburb_address, store_city_address, store_country_address, store_zippostal_code,
                        store_min_inventory,)
 
@@ -455,22 +554,25 @@ def insert_new_store(data_store):
                            'store_zippostal_code, ' \
                            'store_min_inventory, ' \
                            'creation_date, ' \
-                           'last_update_date) VALUES(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)'.format(table_name)
+                           'last_update_date) VALUES(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, now(), now()) ' \
+                           'ON CONFLICT DO NOTHING ' \
+                           'RETURNING creation_date, last_update_date'.format(table_name)
 
         cursor.execute(sql_store_insert, data_insert)
 
-        conn.commit()
+        store_dates = cursor.fetchone()
+
+        created_at = store_dates['creation_date'] if store_dates else None
+
+        commit_transaction(conn)
+
+        if store_dates is not None:
+            run_after_commit(lambda: store_id_cache.set(store_code, store_id))
 
         logger.info('Store inserted %s', "{0}, Code: {1}, Name: {2}".format(store_id, store_code, store_name))
 
         close_cursor(cursor)
 
-        row_exists = validate_transaction(table_name,
-                                          'id_store',
-                                          'id_store', store_id,
-                                          'store_code', store_code,
-                                          'store_name', store_name)
-
         address_store = Util.format_store_address(store_street_address,
                                                   store_external_number,
                                                   store_suburb_address,
@@ -488,7 +590,7 @@ def insert_new_store(data_store):
             "Message": "Store Inserted Successful",
         }
 
-        if not str(store_id) not in str(row_exists):
+        if store_dates is None:
             store_data_inserted = {
                 "IdStore": store_id,
                 "CodeStore": store_code,
@@ -500,7 +602,7 @@ def insert_new_store(data_store):
             }
 
     except SQLAlchemyError as error:
-        conn.rollback()
+        rollback_transaction(conn)
         logger.exception('An exception was occurred while execute transaction: %s', error)
         raise SQLAlchemyError(
             "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, table_name)
@@ -508,7 +610,7 @@ def insert_new_store(data_store):
     finally:
         disconnect_from_db(conn)
 
-    return json.dumps(store_data_inserted)
+    return store_data_inserted
 
 
 # Update Store data registered
@@ -532,15 +634,13 @@ def update_store_data(data_store):
 
         cursor = create_cursor(conn)
 
-        last_update_date = get_datenow_from_db()
-
         table_name = cfg['DB_OBJECTS']['STORE_TABLE']
 
         # store_id = data_store.get("store_id")
         store_code = data_store.get("store_code")
         store_name = data_store.get("store_name")
-        street_address = data_store("street_address")
-        external_number_address = data_store("external_number_address")
+        street_address = data_store.get("street_address")
+        external_number_address = data_store.get("external_number_address")
         suburb_address = data_store.get("suburb_address")
         city_address = data_store.get("city_address")
         country_address = data_store.get("country_address")
@@ -559,8 +659,9 @@ def update_store_data(data_store):
                            'store_country_address=%s, ' \
                            'store_zippostal_code=%s, ' \
                            'store_min_inventory=%s, ' \
-                           'last_update_date=%s ' \
-                           'WHERE id_store=%s AND store_code=%s'.format(table_name)
+                           'last_update_date=now() ' \
+                           'WHERE id_store=%s AND store_code=%s ' \
+                           'RETURNING last_update_date'.format(table_name)
 
         cursor.execute(sql_update_store, (store_name,
                                           street_address,
@@ -569,7 +670,19 @@ def update_store_data(data_store):
                                           city_address,
                                           country_address,
                                           zip_postal_code_address,
-                                          minimum_stock,))
+                                          minimum_stock,
+                                          store_id,
+                                          store_code,))
+
+        store_dates = cursor.fetchone()
+
+        last_update_date = store_dates['last_update_date'] if store_dates else None
+        rows_updated = cursor.rowcount
+
+        if rows_updated == 0:
+            store_id_cache.delete(store_code)
+        else:
+            run_after_commit(lambda: store_id_cache.set(store_code, store_id))
 
         address_store = Util.format_store_address(street_address,
                                                   external_number_address,
@@ -578,15 +691,14 @@ def update_store_data(data_store):
                                                   city_address,
                                                   country_address)
 
-        conn.commit()
+        notify_cache_change(cursor, 'store', [store_code])
+        notify_cache_change(cursor, 'stock')
 
-        close_cursor(cursor)
+        commit_transaction(conn)
 
-        row_exists = validate_transaction(table_name,
-                                          'id_store',
-                                          'id_store', store_id,
-                                          'store_code', store_code,
-                                          'store_name', store_name)
+        invalidate_stock_cache()
+
+        close_cursor(cursor)
 
         store_data_updated = {
             "IdStore": store_id,
@@ -598,7 +710,7 @@ def update_store_data(data_store):
             "Message": "Store Updated Successful",
         }
 
-        if not str(store_id) in str(row_exists):
+        if rows_updated == 0:
             store_data_updated = {
                 "IdStore": store_id,
                 "CodeStore": store_code,
@@ -616,7 +728,7 @@ def update_store_data(data_store):
             )
 
     except SQLAlchemyError as error:
-        conn.rollback()
+        rollback_transaction(conn)
         logger.exception('An exception occurred while execute transaction: %s', error)
         raise SQLAlchemyError(
             "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, table_name)
@@ -624,7 +736,7 @@ def update_store_data(data_store):
     finally:
         disconnect_from_db(conn)
 
-    return json.dumps(store_data_updated)
+    return store_data_updated
 
 
 # Delete store registered by id
@@ -652,11 +764,21 @@ def delete_store_data(store_code):
         store_id = select_store_id(store_code)
 
         # delete row to database
-        sql_delete_van = "DELETE FROM {} WHERE id_store=%s AND store_code=%s".format(table_name)
+        sql_delete_van = "DELETE FROM {} WHERE id_store=%s AND store_code=%s RETURNING id_store".format(table_name)
 
         cursor.execute(sql_delete_van, (store_id, store_code,))
 
-        conn.commit()
+        rows_deleted = cursor.rowcount
+
+        notify_cache_change(cursor, 'store', [store_code])
+        notify_cache_change(cursor, 'stock')
+
+        commit_transaction(conn)
+
+        invalidate_stock_cache()
+
+        store_id_cache.delete(store_code)
+        run_after_commit(lambda: store_id_cache.delete(store_code))
 
         close_cursor(cursor)
 
@@ -666,12 +788,7 @@ def delete_store_data(store_code):
             "Message": "Store Deleted Successful",
         }
 
-        row_exists = exists_data_row(table_name,
-                                     'id_store',
-                                     'id_store', store_id,
-                                     'store_code', store_code)
-
-        if str(store_id) in str(row_exists):
+        if rows_deleted == 0:
             store_data_deleted = {
                 "IdStore": store_id,
                 "CodeStore": store_code,
@@ -679,7 +796,7 @@ def delete_store_data(store_code):
             }
 
     except SQLAlchemyError as error:
-        conn.rollback()
+        rollback_transaction(conn)
         logger.exception('An exception occurred while execute transaction: %s', error)
         raise SQLAlchemyError(
             "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, table_name)
@@ -687,7 +804,7 @@ def delete_store_data(store_code):
     finally:
         disconnect_from_db(conn)
 
-    return json.dumps(store_data_deleted)
+    return store_data_deleted
 
 
 # Select all data store by store code from db
@@ -769,8 +886,8 @@ def select_by_store_code(store_code):
             country_address = store_data['store_country_address']
             zip_postal_code_address = store_data['store_zippostal_code']
             minimum_stock = store_data['store_min_inventory']
-            fecha_creacion = datetime.strptime(str(store_data['creation_date']), "%Y-%m-%d %H:%M:%S")
-            fecha_actualizacion = datetime.strptime(str(store_data['last_update_date']), "%Y-%m-%d %H:%M:%S")
+            fecha_creacion = store_data['creation_date']
+            fecha_actualizacion = store_data['last_update_date']
 
             address_store = Util.format_store_address(street_address,
                                                       external_number_address,
@@ -805,10 +922,10 @@ def select_by_store_code(store_code):
 
         close_cursor(cursor)
 
-        data_store_all = json.dumps(store_data_by_code)
+        data_store_all = store_data_by_code
 
     except SQLAlchemyError as error:
-        conn.rollback()
+        rollback_transaction(conn)
         logger.exception('An exception occurred while execute transaction: %s', error)
         raise SQLAlchemyError(
             "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, table_name)
@@ -819,17 +936,72 @@ def select_by_store_code(store_code):
     return data_store_all
 
 
-# Select stock in specific product by store code
-def select_stock_in_product(store_code, product_sku):
+def select_store_version(store_code):
     r"""
-    Get the store stock in a single product looking for by product sku.
+    Get the version of the data of a store, a cheap probe for the conditional GET (ETag/Last-Modified).
 
-    :param product_sku: SKU of product to find stock in a store.
-    :param store_code: The store code to looking for stock by product sku
-    :return data_van_by_status: Dictionary that contains all the Van's data by specific status.
-    """
+    The version changes with every write of the row: it is a hash of the id, the last update date and
+    the row version of Postgres (xmin), because last_update_date only has second precision.
 
-    cfg = Util.get_config_constant_file()
+    :param store_code: The code of the store.
+    :return store_version: Dictionary with Version (hash) and LastModified (UTC), None if the store not exists.
+    """
+
+    conn = None
+    cursor = None
+
+    store_version = None
+
+    cfg = Util.get_config_constant_file()
+
+    table_name = cfg['DB_OBJECTS']['STORE_TABLE']
+
+    try:
+
+        conn = session_to_db()
+
+        cursor = create_cursor(conn)
+
+        sql_store_version = " SELECT md5(concat_ws(':', id_store, xmin, last_update_date)) AS version, " \
+                            "        last_update_date::timestamptz AT TIME ZONE 'UTC' AS last_modified " \
+                            " FROM {} " \
+                            " WHERE store_code = %s".format(table_name)
+
+        cursor.execute(sql_store_version, (store_code,))
+
+        version_row = cursor.fetchone()
+
+        close_cursor(cursor)
+
+        if version_row is not None:
+            store_version = {
+                "Version": version_row['version'],
+                "LastModified": version_row['last_modified'],
+            }
+
+    except SQLAlchemyError as error:
+        rollback_transaction(conn)
+        logger.exception('An exception occurred while execute transaction: %s', error)
+        raise SQLAlchemyError(
+            "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, table_name)
+        )
+    finally:
+        disconnect_from_db(conn)
+
+    return store_version
+
+
+# Select stock in specific product by store code
+def select_stock_in_product(store_code, product_sku):
+    r"""
+    Get the store stock in a single product looking for by product sku.
+
+    :param product_sku: SKU of product to find stock in a store.
+    :param store_code: The store code to looking for stock by product sku
+    :return data_van_by_status: Dictionary that contains all the Van's data by specific status.
+    """
+
+    cfg = Util.get_config_constant_file()
 
     conn = None
     cursor = None
@@ -839,6 +1011,14 @@ def select_stock_in_product(store_code, product_sku):
 
     store_table = cfg['DB_OBJECTS']['STORE_TABLE']
     product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+    available_stock_view = cfg['DB_OBJECTS']['AVAILABLE_STOCK_VIEW']
+
+    data_stock_all = stock_cache.get((product_sku, store_code))
+
+    if data_stock_all is not MISSING:
+        return data_stock_all
+
+    cache_generation = stock_cache.generation()
 
     try:
 
@@ -850,11 +1030,13 @@ def select_stock_in_product(store_code, product_sku):
                            "   store.store_code, " \
                            "   store.store_name, " \
                            "   prod.product_sku, " \
-                           "   prod.product_stock " \
+                           "   prod.product_stock, " \
+                           "   prod.product_reserved_stock, " \
+                           "   prod.available_stock " \
                            " FROM {} store, {} prod " \
                            " WHERE store.id_store = prod.product_store_id " \
                            " AND store.store_code = %s " \
-                           " AND prod.product_sku = %s".format(store_table, product_table)
+                           " AND prod.product_sku = %s".format(store_table, available_stock_view)
 
         cursor.execute(sql_stock_by_sku, (store_code, product_sku,))
 
@@ -890,15 +1072,19 @@ def select_stock_in_product(store_code, product_sku):
                     "NameStore": name_store,
                     "SKU": sku_product,
                     "Stock": stock_product,
+                    "ReservedStock": stock_data['product_reserved_stock'],
+                    "AvailableStock": stock_data['available_stock'],
                 }
             }]
 
         close_cursor(cursor)
 
-        data_stock_all = json.dumps(stock_data_by_sku)
+        data_stock_all = stock_data_by_sku
+
+        stock_cache.set((product_sku, store_code), data_stock_all, group=product_sku, generation=cache_generation)
 
     except SQLAlchemyError as error:
-        conn.rollback()
+        rollback_transaction(conn)
         logger.exception('An exception occurred while execute transaction: %s', error)
         raise SQLAlchemyError(
             "A SQL Exception {} occurred while transacting with the database on table {} - {}.".format(error,
@@ -930,6 +1116,14 @@ def select_all_stock_in_product(product_sku):
 
     store_table = cfg['DB_OBJECTS']['STORE_TABLE']
     product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+    available_stock_view = cfg['DB_OBJECTS']['AVAILABLE_STOCK_VIEW']
+
+    data_stock_all = stock_cache.get((product_sku,))
+
+    if data_stock_all is not MISSING:
+        return data_stock_all
+
+    cache_generation = stock_cache.generation()
 
     try:
 
@@ -941,10 +1135,12 @@ def select_all_stock_in_product(product_sku):
                            "   store.store_code, " \
                            "   store.store_name, " \
                            "   prod.product_sku, " \
-                           "   prod.product_stock " \
+                           "   prod.product_stock, " \
+                           "   prod.product_reserved_stock, " \
+                           "   prod.available_stock " \
                            " FROM {} store, {} prod " \
                            " WHERE store.id_store = prod.product_store_id " \
-                           " AND prod.product_sku = %s".format(store_table, product_table)
+                           " AND prod.product_sku = %s".format(store_table, available_stock_view)
 
         cursor.execute(sql_stock_by_sku, (product_sku,))
 
@@ -977,15 +1173,19 @@ def select_all_stock_in_product(product_sku):
                     "CodeStore": code_store,
                     "NameStore": name_store,
                     "Stock": stock_product,
+                    "ReservedStock": stock_data['product_reserved_stock'],
+                    "AvailableStock": stock_data['available_stock'],
                 }
             }]
 
         close_cursor(cursor)
 
-        data_stock_all = json.dumps(stock_data_by_sku)
+        data_stock_all = stock_data_by_sku
+
+        stock_cache.set((product_sku,), data_stock_all, group=product_sku, generation=cache_generation)
 
     except SQLAlchemyError as error:
-        conn.rollback()
+        rollback_transaction(conn)
         logger.exception('An exception occurred while execute transaction: %s', error)
         raise SQLAlchemyError(
             "A SQL Exception {} occurred while transacting with the database on table {} - {}.".format(error,
@@ -998,6 +1198,281 @@ def select_all_stock_in_product(product_sku):
     return data_stock_all
 
 
+# Select the stock of many products at once
+def select_stock_in_products(product_skus, store_codes=None):
+    r"""
+    Get the store stock of many products with a single query (product_sku = ANY(...)).
+
+    :param product_skus: List of SKUs of the products to find the stock.
+    :param store_codes: Optional list of store codes to limit the stores.
+    :return data_stock_batch: List with the stores stock grouped per SKU, in the order requested.
+    """
+
+    cfg = Util.get_config_constant_file()
+
+    conn = None
+    cursor = None
+
+    store_table = cfg['DB_OBJECTS']['STORE_TABLE']
+    product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+    available_stock_view = cfg['DB_OBJECTS']['AVAILABLE_STOCK_VIEW']
+
+    product_skus = list(dict.fromkeys(product_skus))
+
+    stock_by_sku = {product_sku: [] for product_sku in product_skus}
+
+    sql_stock_by_skus = " SELECT " \
+                        "   store.store_code, " \
+                        "   store.store_name, " \
+                        "   prod.product_sku, " \
+                        "   prod.product_stock, " \
+                        "   prod.product_reserved_stock, " \
+                        "   prod.available_stock " \
+                        " FROM {} store, {} prod " \
+                        " WHERE store.id_store = prod.product_store_id " \
+                        " AND prod.product_sku = ANY(%s)".format(store_table, available_stock_view)
+
+    data_stock_skus = (product_skus,)
+
+    if store_codes:
+        sql_stock_by_skus += " AND store.store_code = ANY(%s)"
+        data_stock_skus += (list(store_codes),)
+
+    sql_stock_by_skus += " ORDER BY prod.product_sku, store.store_code"
+
+    try:
+
+        conn = session_to_db()
+
+        cursor = create_cursor(conn)
+
+        cursor.execute(sql_stock_by_skus, data_stock_skus)
+
+        for stock_data in cursor:
+            stock_by_sku[stock_data['product_sku']].append({
+                "CodeStore": stock_data['store_code'],
+                "NameStore": stock_data['store_name'],
+                "Stock": stock_data['product_stock'],
+                "ReservedStock": stock_data['product_reserved_stock'],
+                "AvailableStock": stock_data['available_stock'],
+            })
+
+        close_cursor(cursor)
+
+    except SQLAlchemyError as error:
+        rollback_transaction(conn)
+        logger.exception('An exception occurred while execute transaction: %s', error)
+        raise SQLAlchemyError(
+            "A SQL Exception {} occurred while transacting with the database on table {} - {}.".format(error,
+                                                                                                       store_table,
+                                                                                                       product_table)
+        )
+    finally:
+        disconnect_from_db(conn)
+
+    data_stock_batch = [{
+        "SKU": product_sku,
+        "ProductStock": stock_stores,
+    } for product_sku, stock_stores in stock_by_sku.items()]
+
+    logger.info('Product Stock batch: %s', 'SKUs: {}, Stores: {}'.format(len(product_skus),
+                                                                        len(store_codes) if store_codes else 'all'))
+
+    return data_stock_batch
+
+
+# Select the stock totals of many products, computed on the database
+def select_stock_totals_in_products(product_skus, store_codes=None):
+    r"""
+    Get the stock totals per product: sum of the stock, reserved and available stock, number of stores,
+    stores with available stock and stores whose available stock is under their minimum inventory.
+    Read from the available stock view and aggregated by the database (GROUP BY product_sku), so the
+    answer has one row per SKU whatever the number of stores.
+
+    The totals of all the stores are cached per SKU, only the SKUs not cached are queried.
+
+    :param product_skus: List of SKUs of the products.
+    :param store_codes: Optional list of store codes to limit the stores (not cached).
+    :return data_stock_totals: List with the stock totals per SKU, in the order requested.
+    """
+
+    cfg = Util.get_config_constant_file()
+
+    conn = None
+    cursor = None
+
+    store_table = cfg['DB_OBJECTS']['STORE_TABLE']
+    product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+    available_stock_view = cfg['DB_OBJECTS']['AVAILABLE_STOCK_VIEW']
+
+    product_skus = list(dict.fromkeys(product_skus))
+
+    stock_totals = dict()
+
+    cache_generation = stock_cache.generation()
+
+    if not store_codes:
+        for product_sku in product_skus:
+            stock_total = stock_cache.get(('total', product_sku))
+
+            if stock_total is not MISSING:
+                stock_totals[product_sku] = stock_total
+
+    skus_to_query = [product_sku for product_sku in product_skus if product_sku not in stock_totals]
+
+    sql_stock_totals = " SELECT " \
+                       "   prod.product_sku, " \
+                       "   SUM(prod.product_stock) AS total_stock, " \
+                       "   SUM(prod.product_reserved_stock) AS total_reserved_stock, " \
+                       "   SUM(prod.available_stock) AS total_available_stock, " \
+                       "   COUNT(*) AS stores_count, " \
+                       "   COUNT(*) FILTER (WHERE prod.available_stock > 0) AS stores_with_stock, " \
+                       "   COUNT(*) FILTER (WHERE prod.available_stock < store.store_min_inventory) " \
+                       "     AS stores_below_minimum " \
+                       " FROM {} store, {} prod " \
+                       " WHERE store.id_store = prod.product_store_id " \
+                       " AND prod.product_sku = ANY(%s)".format(store_table, available_stock_view)
+
+    data_stock_totals = (skus_to_query,)
+
+    if store_codes:
+        sql_stock_totals += " AND store.store_code = ANY(%s)"
+        data_stock_totals += (list(store_codes),)
+
+    sql_stock_totals += " GROUP BY prod.product_sku"
+
+    try:
+
+        if skus_to_query:
+            conn = session_to_db()
+
+            cursor = create_cursor(conn)
+
+            cursor.execute(sql_stock_totals, data_stock_totals)
+
+            queried_totals = {stock_row['product_sku']: {
+                "TotalStock": stock_row['total_stock'],
+                "TotalReservedStock": stock_row['total_reserved_stock'],
+                "TotalAvailableStock": stock_row['total_available_stock'],
+                "StoresCount": stock_row['stores_count'],
+                "StoresWithStock": stock_row['stores_with_stock'],
+                "StoresBelowMinimum": stock_row['stores_below_minimum'],
+            } for stock_row in cursor}
+
+            close_cursor(cursor)
+
+            for product_sku in skus_to_query:
+                stock_total = queried_totals.get(product_sku, {
+                    "TotalStock": 0,
+                    "TotalReservedStock": 0,
+                    "TotalAvailableStock": 0,
+                    "StoresCount": 0,
+                    "StoresWithStock": 0,
+                    "StoresBelowMinimum": 0,
+                })
+
+                stock_totals[product_sku] = stock_total
+
+                if not store_codes:
+                    stock_cache.set(('total', product_sku), stock_total, group=product_sku,
+                                    generation=cache_generation)
+
+    except SQLAlchemyError as error:
+        rollback_transaction(conn)
+        logger.exception('An exception occurred while execute transaction: %s', error)
+        raise SQLAlchemyError(
+            "A SQL Exception {} occurred while transacting with the database on table {} - {}.".format(error,
+                                                                                                       store_table,
+                                                                                                       product_table)
+        )
+    finally:
+        disconnect_from_db(conn)
+
+    data_stock_totals = [dict(SKU=product_sku, **stock_totals[product_sku]) for product_sku in product_skus]
+
+    logger.info('Product Stock totals: %s', 'SKUs: {}, Queried: {}'.format(len(product_skus), len(skus_to_query)))
+
+    return data_stock_totals
+
+
+# Select the availability of many products from the stock summary
+def select_stock_availability(product_skus):
+    r"""
+    Get the availability of many products from the stock summary table, maintained by the database
+    triggers, so each SKU is a primary key lookup instead of an aggregate over all the stores.
+
+    :param product_skus: List of SKUs of the products.
+    :return data_availability: List with the availability per SKU, in the order requested.
+    """
+
+    cfg = Util.get_config_constant_file()
+
+    conn = None
+    cursor = None
+
+    summary_table = cfg['DB_OBJECTS']['STOCK_SUMMARY_TABLE']
+
+    product_skus = list(dict.fromkeys(product_skus))
+
+    availability_by_sku = dict()
+
+    sql_availability = " SELECT " \
+                       "   product_sku, " \
+                       "   total_stock, " \
+                       "   total_reserved_stock, " \
+                       "   stores_count, " \
+                       "   stores_with_stock, " \
+                       "   stores_below_minimum, " \
+                       "   last_update_date " \
+                       " FROM {} " \
+                       " WHERE product_sku = ANY(%s)".format(summary_table)
+
+    try:
+
+        conn = session_to_db()
+
+        cursor = create_cursor(conn)
+
+        cursor.execute(sql_availability, (product_skus,))
+
+        for summary_row in cursor:
+            availability_by_sku[summary_row['product_sku']] = {
+                "Available": summary_row['total_stock'] - summary_row['total_reserved_stock'] > 0,
+                "TotalStock": summary_row['total_stock'],
+                "TotalReservedStock": summary_row['total_reserved_stock'],
+                "TotalAvailableStock": summary_row['total_stock'] - summary_row['total_reserved_stock'],
+                "StoresCount": summary_row['stores_count'],
+                "StoresWithStock": summary_row['stores_with_stock'],
+                "StoresBelowMinimum": summary_row['stores_below_minimum'],
+                "LastUpdateDate": summary_row['last_update_date'],
+            }
+
+        close_cursor(cursor)
+
+    except SQLAlchemyError as error:
+        rollback_transaction(conn)
+        logger.exception('An exception occurred while execute transaction: %s', error)
+        raise SQLAlchemyError(
+            "A SQL Exception {} occurred while transacting with the database on table {}.".format(error,
+                                                                                                  summary_table)
+        )
+    finally:
+        disconnect_from_db(conn)
+
+    data_availability = [dict(SKU=product_sku, **availability_by_sku.get(product_sku, {
+        "Available": False,
+        "TotalStock": 0,
+        "TotalReservedStock": 0,
+        "TotalAvailableStock": 0,
+        "StoresCount": 0,
+        "StoresWithStock": 0,
+        "StoresBelowMinimum": 0,
+        "LastUpdateDate": None,
+    })) for product_sku in product_skus]
+
+    return data_availability
+
+
 class ProductModelDb(Base):
     r"""
     Class to instance the data of a Van on the database.
@@ -1043,52 +1518,37 @@ class ProductModelDb(Base):
 
         product_input_dic = Util.set_data_input_product_dict(product_obj)
 
-        product_sku = product_input_dic.get("product_sku")
-        product_store_code = product_input_dic.get("product_store_code")
-
-        product_store_id = select_store_id(product_store_code)
-        product_id = select_product_id(product_sku, product_store_code)
-
-        if exists_data_row(self.__tablename__,
-                           self.id_product,
-                           self.id_product,
-                           product_id,
-                           self.store_id_product,
-                           product_store_id):
-
-            product_data = update_product_data(product_input_dic)
-        else:
-            product_data = insert_new_product(product_input_dic)
+        product_data = upsert_product_data(product_input_dic)
 
         return product_data
 
 
-# Add Product data to insert the row on the database
-def insert_new_product(data_product):
+# Insert or update the Product data of a store in a single statement
+def upsert_product_data(data_product):
     r"""
-    Transaction to add data of a product and inserted on database.
-    The data that you can insert are:
+    Transaction to add a product to a store or update it when his SKU is already registered in the store.
+    Uses INSERT ... SELECT ... ON CONFLICT (product_sku, product_store_id) DO UPDATE, the store id is
+    resolved by the same statement from the store code.
 
-    :param data_product: Dictionary of all data product to insert.
-    :return product_data_inserted: Dictionary that contains product data inserted on db.
+    :param data_product: Dictionary of all data product to add or update.
+    :return product_data_upserted: List that contains the Product data inserted or updated on db.
     """
 
     conn = None
     cursor = None
-    product_data_inserted = dict()
+    product_data_upserted = []
 
     cfg = Util.get_config_constant_file()
 
+    table_name = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+    store_table = cfg['DB_OBJECTS']['STORE_TABLE']
+
     try:
         conn = session_to_db()
 
         cursor = create_cursor(conn)
 
-        table_name = cfg['DB_OBJECTS']['PRODUCT_TABLE']
-
-        creation_date = get_datenow_from_db()
-        last_update_date = get_datenow_from_db()
-
+        product_id = data_product.get('product_id') or uuid7()
         product_sku = data_product.get('product_sku')
         product_unspc = data_product.get('product_unspc')
         product_brand = data_product.get('product_brand')
@@ -1112,10 +1572,7 @@ def insert_new_product(data_product):
         product_height = data_product.get('product_height')
         product_weight = data_product.get('product_weight')
 
-        product_store_id = select_store_id(product_store_code)
-        product_id = select_product_id(product_sku, product_store_id)
-
-        sql_product_insert = 'INSERT INTO {} ' \
+        sql_product_upsert = 'INSERT INTO {} ' \
                              '    (product_id, ' \
                              '     product_sku, ' \
                              '     product_unspc, ' \
@@ -1141,50 +1598,83 @@ def insert_new_product(data_product):
                              '     product_weight, ' \
                              '     creation_date, ' \
                              '     last_update_date) ' \
-                             'VALUES(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, ' \
-                             '%s, %s, %s, %s, %d)'.format(table_name)
-
-        data_add_product = (product_id,
-                            product_sku,
-                            product_unspc,
-                            product_brand,
-                            product_category_id,
-                            product_parent_category_id,
-                            product_uom,
-                            product_stock,
-                            product_store_id,
-                            product_name,
-                            product_title,
-                            product_long_description,
-                            product_photo,
-                            product_price,
-                            product_tax,
-                            product_currency,
-                            product_status,
-                            product_published,
-                            product_manage_stock,
-                            product_length,
-                            product_width,
-                            product_height,
-                            product_weight,
-                            creation_date,
-                            last_update_date)
-
-        cursor.execute(sql_product_insert, data_add_product)
+                             'SELECT %s, %s, %s, %s, %s, %s, %s, %s, store.id_store, %s, %s, %s, %s, %s, %s, %s, %s, ' \
+                             '       %s, %s, %s, %s, %s, %s, now(), now() ' \
+                             'FROM {} store ' \
+                             'WHERE store.store_code = %s ' \
+                             'ON CONFLICT (product_sku, product_store_id) DO UPDATE ' \
+                             'SET product_unspc=EXCLUDED.product_unspc, ' \
+                             '    product_brand=EXCLUDED.product_brand, ' \
+                             '    category_id=EXCLUDED.category_id, ' \
+                             '    parent_category_id=EXCLUDED.parent_category_id, ' \
+                             '    unit_of_measure=EXCLUDED.unit_of_measure, ' \
+                             '    product_stock=EXCLUDED.product_stock, ' \
+                             '    product_name=EXCLUDED.product_name, ' \
+                             '    product_title=EXCLUDED.product_title, ' \
+                             '    product_long_description=EXCLUDED.product_long_description, ' \
+                             '    product_photo=EXCLUDED.product_photo, ' \
+                             '    product_price=EXCLUDED.product_price, ' \
+                             '    product_tax=EXCLUDED.product_tax, ' \
+                             '    product_currency=EXCLUDED.product_currency, ' \
+                             '    product_status=EXCLUDED.product_status, ' \
+                             '    product_published=EXCLUDED.product_published, ' \
+                             '    product_manage_stock=EXCLUDED.product_manage_stock, ' \
+                             '    product_length=EXCLUDED.product_length, ' \
+                             '    product_width=EXCLUDED.product_width, ' \
+                             '    product_height=EXCLUDED.product_height, ' \
+                             '    product_weight=EXCLUDED.product_weight, ' \
+                             '    last_update_date=now() ' \
+                             'RETURNING product_id, creation_date, last_update_date, ' \
+                             '          (xmax = 0) AS inserted'.format(table_name, store_table)
+
+        data_upsert_product = (product_id,
+                               product_sku,
+                               product_unspc,
+                               product_brand,
+                               product_category_id,
+                               product_parent_category_id,
+                               product_uom,
+                               product_stock,
+                               product_name,
+                               product_title,
+                               product_long_description,
+                               product_photo,
+                               product_price,
+                               product_tax,
+                               product_currency,
+                               product_status,
+                               product_published,
+                               product_manage_stock,
+                               product_length,
+                               product_width,
+                               product_height,
+                               product_weight,
+                               product_store_code)
+
+        cursor.execute(sql_product_upsert, data_upsert_product)
+
+        product_row = cursor.fetchone()
+
+        if product_row is None:
+            logger.error('Can not read the recordset: {}, because is not stored on table: {}'.format(product_store_code,
+                                                                                                     store_table))
+            raise mvc_exc.ItemNotStored(
+                'Can\'t add product "{}" because the store "{}" is not stored in table "{}"'.format(
+                    product_sku, product_store_code, store_table
+                )
+            )
 
-        conn.commit()
+        notify_cache_change(cursor, 'stock', [product_sku])
 
-        logger.info('Product inserted %s', "{0}, Code: {1}, Name: {2}".format(table_name, product_sku, product_name))
+        commit_transaction(conn)
 
-        close_cursor(cursor)
+        invalidate_stock_cache(product_sku)
 
-        row_exists = exists_data_row(table_name, 'product_id',
-                                     'product_id', product_id,
-                                     'product_store_id', product_store_id)
+        close_cursor(cursor)
 
-        product_data_inserted += [{
+        product_data_upserted += [{
             "Product": {
-                "IdProduct": product_id,
+                "IdProduct": product_row['product_id'],
                 "SKUProduct": product_sku,
                 "UNSPC": product_unspc,
                 "NameProduct": product_name,
@@ -1211,48 +1701,21 @@ def insert_new_product(data_product):
                     "HeightProduct": product_height,
                     "WeightProduct": product_weight,
                 },
-                "CreationDate": creation_date,
-                "LastUpdateDate": last_update_date,
+                "CreationDate": product_row['creation_date'],
+                "LastUpdateDate": product_row['last_update_date'],
+                "Message": "Product Inserted Successful" if product_row['inserted'] else "Product Updated Successful",
             }
         }]
 
-        if not str(product_id) not in str(row_exists):
-            product_data_inserted += [{
-                "Product": {
-                    "IdProduct": product_id,
-                    "SKUProduct": product_sku,
-                    "UNSPC": product_unspc,
-                    "NameProduct": product_name,
-                    "TitleProduct": product_title,
-                    "BrandProduct": product_brand,
-                    "UOMProduct": product_uom,
-                    "CategoryIdProduct": product_category_id,
-                    "ParentCategoryIdProduct": product_parent_category_id,
-                    "StockProduct": product_stock,
-                    "CodeStore": product_store_code,
-                    "LongDescriptionProduct": product_long_description,
-                    "PhotoProduct": product_photo,
-                    "Prices": {
-                        "PriceProduct": product_price,
-                        "TaxPriceProduct": product_tax,
-                        "CurrencyPriceProduct": product_currency,
-                    },
-                    "StatusProduct": product_status,
-                    "PublishedProduct": product_published,
-                    "ManageStockProduct": product_manage_stock,
-                    "Volumetry": {
-                        "LengthProduct": product_length,
-                        "WidthProduct": product_width,
-                        "HeightProduct": product_height,
-                        "WeightProduct": product_weight,
-                    },
-                    "CreationDate": creation_date,
-                    "LastUpdateDate": last_update_date,
-                }
-            }]
+        logger.info('Product upserted %s', "{0}, SKU: {1}, Store: {2}".format(product_row['product_id'],
+                                                                             product_sku,
+                                                                             product_store_code))
 
+    except CheckViolation as error:
+        rollback_transaction(conn)
+        raise reserved_stock_error(error, product_sku, product_store_code)
     except SQLAlchemyError as error:
-        conn.rollback()
+        rollback_transaction(conn)
         logger.exception('An exception was occurred while execute transaction: %s', error)
         raise SQLAlchemyError(
             "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, table_name)
@@ -1260,7 +1723,7 @@ def insert_new_product(data_product):
     finally:
         disconnect_from_db(conn)
 
-    return json.dumps(product_data_inserted)
+    return product_data_upserted
 
 
 # Update Product data registered
@@ -1284,9 +1747,8 @@ def update_product_data(data_product):
 
         cursor = create_cursor(conn)
 
-        last_update_date = get_datenow_from_db()
-
         product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+        store_table = cfg['DB_OBJECTS']['STORE_TABLE']
 
         product_sku = data_product.get('product_sku')
         category_id = data_product.get('category_id')
@@ -1304,11 +1766,8 @@ def update_product_data(data_product):
         product_published = data_product.get('product_published')
         manage_stock = data_product.get('product_manage_stock')
 
-        product_store_id = select_store_id(product_store_code)
-        product_id = select_product_id(product_sku, product_store_id)
-
-        # update row to database
-        sql_update_product = ' UPDATE {} ' \
+        # update row to database, the store is resolved by the same statement from the store code
+        sql_update_product = ' UPDATE {} prod ' \
                              ' SET product_sku=%s, ' \
                              '     category_id=%s, ' \
                              '     parent_category_id=%s, ' \
@@ -1322,11 +1781,13 @@ def update_product_data(data_product):
                              '     product_currency=%s, ' \
                              '     product_status=%s, ' \
                              '     product_published=%s, ' \
-                             '     product_manage_stock=%s ' \
-                             '     last_update_date=%s' \
-                             ' WHERE product_id={} AND product_store_id={}'.format(product_table,
-                                                                                   product_id,
-                                                                                   product_store_id)
+                             '     product_manage_stock=%s, ' \
+                             '     last_update_date=now()' \
+                             ' FROM {} store' \
+                             ' WHERE store.store_code=%s' \
+                             ' AND prod.product_store_id=store.id_store' \
+                             ' AND prod.product_sku=%s' \
+                             ' RETURNING prod.product_id, prod.last_update_date'.format(product_table, store_table)
 
         cursor.execute(sql_update_product, (product_sku,
                                             category_id,
@@ -1342,17 +1803,22 @@ def update_product_data(data_product):
                                             product_status,
                                             product_published,
                                             manage_stock,
-                                            last_update_date,))
+                                            product_store_code,
+                                            product_sku,))
 
-        conn.commit()
+        product_dates = cursor.fetchone()
 
-        close_cursor(cursor)
+        product_id = product_dates['product_id'] if product_dates else None
+        last_update_date = product_dates['last_update_date'] if product_dates else None
+        rows_updated = cursor.rowcount
+
+        notify_cache_change(cursor, 'stock', [product_sku])
 
-        row_exists = validate_transaction(product_table,
-                                          'product_id',
-                                          'product_id', product_id,
-                                          'product_store_id', product_store_id,
-                                          'product_sku', product_sku)
+        commit_transaction(conn)
+
+        invalidate_stock_cache(product_sku)
+
+        close_cursor(cursor)
 
         product_data_updated = {
             "Product": {
@@ -1379,7 +1845,7 @@ def update_product_data(data_product):
             }
         }
 
-        if str(product_id) not in str(row_exists):
+        if rows_updated == 0:
             product_data_updated = {
                 "Product": {
                     "IdProduct": product_id,
@@ -1411,8 +1877,11 @@ def update_product_data(data_product):
                 "Can\'t read data because it\'s not stored in table {}. SQL Exception".format(product_table)
             )
 
+    except CheckViolation as error:
+        rollback_transaction(conn)
+        raise reserved_stock_error(error, product_sku, product_store_code)
     except SQLAlchemyError as error:
-        conn.rollback()
+        rollback_transaction(conn)
         logger.exception('An exception occurred while execute transaction: %s', error)
         raise SQLAlchemyError(
             "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, product_table)
@@ -1420,7 +1889,7 @@ def update_product_data(data_product):
     finally:
         disconnect_from_db(conn)
 
-    return json.dumps(product_data_updated)
+    return product_data_updated
 
 
 # Delete Product registered by id and code
@@ -1445,16 +1914,26 @@ def delete_product_data(product_sku, product_store_code):
         cursor = create_cursor(conn)
 
         product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+        store_table = cfg['DB_OBJECTS']['STORE_TABLE']
 
-        product_store_id = select_store_id(product_store_code)
-        product_id = select_product_id(product_sku, product_store_id)
+        # delete row to database, the store is resolved by the same statement from the store code
+        sql_delete_van = "DELETE FROM {} prod USING {} store " \
+                         "WHERE store.store_code=%s AND prod.product_store_id=store.id_store " \
+                         "AND prod.product_sku=%s " \
+                         "RETURNING prod.product_id".format(product_table, store_table)
 
-        # delete row to database
-        sql_delete_van = "DELETE FROM {} WHERE product_id=%s AND product_store_id=%s".format(product_table)
+        cursor.execute(sql_delete_van, (product_store_code, product_sku,))
 
-        cursor.execute(sql_delete_van, (product_id, product_store_id,))
+        product_row = cursor.fetchone()
 
-        conn.commit()
+        product_id = product_row['product_id'] if product_row else None
+        rows_deleted = cursor.rowcount
+
+        notify_cache_change(cursor, 'stock', [product_sku])
+
+        commit_transaction(conn)
+
+        invalidate_stock_cache(product_sku)
 
         close_cursor(cursor)
 
@@ -1465,12 +1944,7 @@ def delete_product_data(product_sku, product_store_code):
             "Message": "Product Deleted Successful",
         }
 
-        row_exists = exists_data_row(product_table,
-                                     'product_id',
-                                     'product_id', product_id,
-                                     'product_store_id', product_store_id)
-
-        if str(product_id) in str(row_exists):
+        if rows_deleted == 0:
             product_data_deleted = {
                 "IdProduct": product_id,
                 "SKUProduct": product_sku,
@@ -1479,7 +1953,7 @@ def delete_product_data(product_sku, product_store_code):
             }
 
     except SQLAlchemyError as error:
-        conn.rollback()
+        rollback_transaction(conn)
         logger.exception('An exception occurred while execute transaction: %s', error)
         raise SQLAlchemyError(
             "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, product_table)
@@ -1487,7 +1961,79 @@ def delete_product_data(product_sku, product_store_code):
     finally:
         disconnect_from_db(conn)
 
-    return json.dumps(product_data_deleted)
+    return product_data_deleted
+
+
+SQL_PRODUCT_COLUMNS = " prod.product_id, " \
+                      " prod.product_sku, " \
+                      " prod.product_unspc, " \
+                      " prod.product_brand, " \
+                      " prod.category_id, " \
+                      " prod.parent_category_id, " \
+                      " prod.unit_of_measure, " \
+                      " prod.product_stock, " \
+                      " store.store_code, " \
+                      " store.store_name, " \
+                      " prod.product_name, " \
+                      " prod.product_title, " \
+                      " prod.product_long_description, " \
+                      " prod.product_photo, " \
+                      " prod.product_price, " \
+                      " prod.product_tax, " \
+                      " prod.product_currency, " \
+                      " prod.product_status, " \
+                      " prod.product_published, " \
+                      " prod.product_manage_stock, " \
+                      " prod.product_length, " \
+                      " prod.product_width, " \
+                      " prod.product_height, " \
+                      " prod.product_weight, " \
+                      " prod.creation_date, " \
+                      " prod.last_update_date "
+
+
+def format_product_row(product_data):
+    r"""
+    Build the Product dictionary of the API from a row selected with SQL_PRODUCT_COLUMNS.
+
+    :param product_data: Row of the product joined with his store.
+    :return product_dict: Dictionary with the Product data.
+    """
+
+    return {
+        "Product": {
+            "IdProduct": product_data['product_id'],
+            "SKUProduct": product_data['product_sku'],
+            "UNSPC": product_data['product_unspc'],
+            "NameProduct": product_data['product_name'],
+            "TitleProduct": product_data['product_title'],
+            "BrandProduct": product_data['product_brand'],
+            "UOMProduct": product_data['unit_of_measure'],
+            "CategoryIdProduct": product_data['category_id'],
+            "ParentCategoryIdProduct": product_data['parent_category_id'],
+            "StockProduct": product_data['product_stock'],
+            "CodeStore": product_data['store_code'],
+            "NameStore": product_data['store_name'],
+            "LongDescriptionProduct": product_data['product_long_description'],
+            "PhotoProduct": product_data['product_photo'],
+            "Prices": {
+                "PriceProduct": product_data['product_price'],
+                "TaxPriceProduct": product_data['product_tax'],
+                "CurrencyPriceProduct": product_data['product_currency'],
+            },
+            "StatusProduct": product_data['product_status'],
+            "PublishedProduct": product_data['product_published'],
+            "ManageStockProduct": product_data['product_manage_stock'],
+            "Volumetry": {
+                "LengthProduct": product_data['product_length'],
+                "WidthProduct": product_data['product_width'],
+                "HeightProduct": product_data['product_height'],
+                "WeightProduct": product_data['product_weight'],
+            },
+            "CreationDate": product_data['creation_date'],
+            "LastUpdateDate": product_data['last_update_date'],
+        }
+    }
 
 
 # Select all products by sku from db
@@ -1507,235 +2053,1683 @@ def select_by_product_sku(product_sku):
 
     cfg = Util.get_config_constant_file()
 
+    product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+    store_table = cfg['DB_OBJECTS']['STORE_TABLE']
+
     try:
 
         conn = session_to_db()
 
         cursor = create_cursor(conn)
 
-        product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
-        store_table = cfg['DB_OBJECTS']['STORE_TABLE']
-
-        sql_product_by_sku = " SELECT " \
-                             "   prod.product_id, " \
-                             "   prod.product_sku," \
-                             "   prod.product_unspc," \
-                             "   prod.product_brand," \
-                             "   prod.category_id," \
-                             "   prod.parent_category_id," \
-                             "   prod.unit_of_measure," \
-                             "   prod.product_stock," \
-                             "   store.store_code," \
-                             "   store.store_name" \
-                             "   prod.product_name," \
-                             "   prod.product_title," \
-                             "   prod.product_long_description," \
-                             "   prod.product_photo," \
-                             "   prod.product_price," \
-                             "   prod.product_tax," \
-                             "   prod.product_currency," \
-                             "   prod.product_status," \
-                             "   prod.product_published," \
-                             "   prod.product_manage_stock," \
-                             "   prod.product_length," \
-                             "   prod.product_width," \
-                             "   prod.product_height," \
-                             "   prod.product_weight," \
-                             "   prod.creation_date," \
-                             "   prod.last_update_date" \
+        sql_product_by_sku = " SELECT {} " \
                              " FROM {} prod, {} store " \
                              " WHERE store.id_store = prod.product_store_id " \
-                             " AND prod.product_sku = %s;".format(product_table, store_table)
+                             " AND prod.product_sku = %s".format(SQL_PRODUCT_COLUMNS, product_table, store_table)
 
         cursor.execute(sql_product_by_sku, (product_sku,))
 
-        result = cursor.fetchall()
+        for product_data in cursor:
+            product_data_by_sku.append(format_product_row(product_data))
 
-        if result is None:
-            logger.error('Can not read the recordset, because is not stored: %s', product_sku)
-            raise mvc_exc.ItemNotStored(
-                'Can\'t read "{}" because it\'s not stored in table "{}. SQL Exception"'.format(
-                    product_sku, product_table
-                )
-            )
+        close_cursor(cursor)
 
-        for product_data in result:
-            if product_data is None:
-                logger.error('Can not read the recordset: {}, '
-                             'because is not stored on table: {}'.format(product_sku, product_table))
-                raise SQLAlchemyError(
-                    "Can\'t read data because it\'s not stored in table {}. SQL Exception".format(product_sku)
+        logger.info('Products Registered by SKU: %s', 'SKUProduct: {}, Stores: {}'.format(product_sku,
+                                                                                         len(product_data_by_sku)))
+
+        data_product_all = product_data_by_sku
+
+    except SQLAlchemyError as error:
+        rollback_transaction(conn)
+        logger.exception('An exception occurred while execute transaction: %s', error)
+        raise SQLAlchemyError(
+            "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, product_table)
+        )
+    finally:
+        disconnect_from_db(conn)
+
+    return data_product_all
+
+
+# Same shape as format_product_row, built by Postgres (json keeps the key order, numbers stay numbers
+# and the timestamps are rendered in ISO 8601, as the serializer does)
+SQL_PRODUCT_JSON = " json_build_object('Product', json_build_object( " \
+                   " 'IdProduct', prod.product_id, " \
+                   " 'SKUProduct', prod.product_sku, " \
+                   " 'UNSPC', prod.product_unspc, " \
+                   " 'NameProduct', prod.product_name, " \
+                   " 'TitleProduct', prod.product_title, " \
+                   " 'BrandProduct', prod.product_brand, " \
+                   " 'UOMProduct', prod.unit_of_measure, " \
+                   " 'CategoryIdProduct', prod.category_id, " \
+                   " 'ParentCategoryIdProduct', prod.parent_category_id, " \
+                   " 'StockProduct', prod.product_stock, " \
+                   " 'CodeStore', store.store_code, " \
+                   " 'NameStore', store.store_name, " \
+                   " 'LongDescriptionProduct', prod.product_long_description, " \
+                   " 'PhotoProduct', prod.product_photo, " \
+                   " 'Prices', json_build_object( " \
+                   "     'PriceProduct', prod.product_price, " \
+                   "     'TaxPriceProduct', prod.product_tax, " \
+                   "     'CurrencyPriceProduct', prod.product_currency), " \
+                   " 'StatusProduct', prod.product_status, " \
+                   " 'PublishedProduct', prod.product_published, " \
+                   " 'ManageStockProduct', prod.product_manage_stock, " \
+                   " 'Volumetry', json_build_object( " \
+                   "     'LengthProduct', prod.product_length, " \
+                   "     'WidthProduct', prod.product_width, " \
+                   "     'HeightProduct', prod.product_height, " \
+                   "     'WeightProduct', prod.product_weight), " \
+                   " 'CreationDate', prod.creation_date, " \
+                   " 'LastUpdateDate', prod.last_update_date)) "
+
+
+def select_by_product_sku_json(product_sku):
+    r"""
+    Get all the product data of a SKU as the JSON document of the response, built by the database.
+
+    Postgres builds every Product object and aggregates them in an array, the document is read as
+    text (psycopg2 does not parse it) and forwarded as it is, so no Python object is created per row.
+
+    :param product_sku: SKU of the product.
+    :return json_products: JSON array (text) with the Product data in all the stores.
+    """
+
+    conn = None
+    cursor = None
+
+    json_products = '[]'
+
+    cfg = Util.get_config_constant_file()
+
+    product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+    store_table = cfg['DB_OBJECTS']['STORE_TABLE']
+
+    try:
+
+        conn = session_to_db()
+
+        cursor = create_cursor(conn)
+
+        sql_product_by_sku = " SELECT COALESCE(json_agg({} ORDER BY store.store_code), '[]'::json)::text " \
+                             " FROM {} prod, {} store " \
+                             " WHERE store.id_store = prod.product_store_id " \
+                             " AND prod.product_sku = %s".format(SQL_PRODUCT_JSON, product_table, store_table)
+
+        cursor.execute(sql_product_by_sku, (product_sku,))
+
+        json_products = cursor.fetchone()[0]
+
+        close_cursor(cursor)
+
+        logger.info('Products Registered by SKU (JSON): %s', 'SKUProduct: {}, Bytes: {}'.format(product_sku,
+                                                                                               len(json_products)))
+
+    except SQLAlchemyError as error:
+        rollback_transaction(conn)
+        logger.exception('An exception occurred while execute transaction: %s', error)
+        raise SQLAlchemyError(
+            "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, product_table)
+        )
+    finally:
+        disconnect_from_db(conn)
+
+    return json_products
+
+
+def select_product_version(product_sku):
+    r"""
+    Get the version of the product data of a SKU, a cheap probe for the conditional GET (ETag/Last-Modified).
+
+    The version is a hash of the id, last update date and row version (xmin) of every product row and of
+    its store (the response has the store name), in the order of the response, so it changes with any
+    write, insert or delete of them.
+
+    :param product_sku: SKU of the product.
+    :return product_version: Dictionary with Version (hash) and LastModified (UTC), None if the SKU not exists.
+    """
+
+    conn = None
+    cursor = None
+
+    product_version = None
+
+    cfg = Util.get_config_constant_file()
+
+    product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+    store_table = cfg['DB_OBJECTS']['STORE_TABLE']
+
+    try:
+
+        conn = session_to_db()
+
+        cursor = create_cursor(conn)
+
+        sql_product_version = " SELECT md5(string_agg(concat_ws(':', prod.product_id, prod.xmin, " \
+                              "                                     prod.last_update_date, " \
+                              "                                     store.xmin, store.last_update_date), " \
+                              "                           ',' ORDER BY store.store_code)) AS version, " \
+                              "        max(GREATEST(prod.last_update_date, store.last_update_date))::timestamptz " \
+                              "            AT TIME ZONE 'UTC' AS last_modified " \
+                              " FROM {} prod, {} store " \
+                              " WHERE store.id_store = prod.product_store_id " \
+                              " AND prod.product_sku = %s".format(product_table, store_table)
+
+        cursor.execute(sql_product_version, (product_sku,))
+
+        version_row = cursor.fetchone()
+
+        close_cursor(cursor)
+
+        if version_row is not None and version_row['version'] is not None:
+            product_version = {
+                "Version": version_row['version'],
+                "LastModified": version_row['last_modified'],
+            }
+
+    except SQLAlchemyError as error:
+        rollback_transaction(conn)
+        logger.exception('An exception occurred while execute transaction: %s', error)
+        raise SQLAlchemyError(
+            "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, product_table)
+        )
+    finally:
+        disconnect_from_db(conn)
+
+    return product_version
+
+
+def iter_query_rows(sql_query, data_query=None, itersize=None):
+    r"""
+    Generator over the rows of a query read with a named (server-side) cursor, fetching itersize rows
+    per round trip, so the result is never held complete in memory.
+
+    The rows are read on a connection of their own, in a read-only transaction that does not belong
+    to the unit of work: a streamed response is consumed after the request has been committed.
+    The connection goes back to the pool when the generator is exhausted or closed.
+
+    :param sql_query: SELECT statement.
+    :param data_query: Parameters of the statement.
+    :param itersize: Rows fetched per round trip, STREAMING.ITERSIZE by default.
+    :return rows: Generator of rows (readable by column name).
+    """
+
+    cfg = Util.get_config_constant_file()
+
+    pool_obj = get_connection_pool()
+    conn = pool_obj.getconn()
+
+    try:
+        with conn.cursor() as transaction_cursor:
+            transaction_cursor.execute("SET TRANSACTION READ ONLY")
+
+        cursor = conn.cursor(name='stream_{}'.format(uuid.uuid4().hex), cursor_factory=extras.DictCursor)
+        cursor.itersize = itersize or int(cfg['STREAMING']['ITERSIZE'])
+
+        try:
+            cursor.execute(sql_query, data_query)
+
+            for row in cursor:
+                yield row
+        finally:
+            cursor.close()
+
+    finally:
+        try:
+            conn.rollback()
+        finally:
+            pool_obj.putconn(conn)
+
+
+def iter_products_by_sku(product_sku, itersize=None):
+    r"""
+    Stream the product data of a SKU in all the stores, one Product dictionary at a time.
+
+    :param product_sku: SKU of the product.
+    :param itersize: Rows fetched per round trip.
+    :return products: Generator of Product dictionaries.
+    """
+
+    cfg = Util.get_config_constant_file()
+
+    product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+    store_table = cfg['DB_OBJECTS']['STORE_TABLE']
+
+    sql_product_by_sku = " SELECT {} " \
+                         " FROM {} prod, {} store " \
+                         " WHERE store.id_store = prod.product_store_id " \
+                         " AND prod.product_sku = %s " \
+                         " ORDER BY store.store_code".format(SQL_PRODUCT_COLUMNS, product_table, store_table)
+
+    for product_data in iter_query_rows(sql_product_by_sku, (product_sku,), itersize):
+        yield format_product_row(product_data)
+
+
+# List the products of a store by pages
+def select_products_by_store(store_code, page_size, page_cursor=None, product_status=None, product_published=None):
+    r"""
+    Get a page of the products of a store, ordered by SKU.
+
+    Uses keyset pagination on (product_store_id, product_sku): the cursor holds the last key read and
+    the next page starts right after it with an index range scan, so a deep page costs the same as
+    the first one (no OFFSET).
+
+    :param store_code: Code of the store to list.
+    :param page_size: Maximum number of products of the page.
+    :param page_cursor: Opaque cursor returned as NextCursor by the previous page, None for the first one.
+    :param product_status: Optional status to filter the products.
+    :param product_published: Optional published flag to filter the products.
+    :return data_products_page: Dictionary with the products of the page and the cursor of the next one.
+    """
+
+    cfg = Util.get_config_constant_file()
+
+    conn = None
+    cursor = None
+
+    store_table = cfg['DB_OBJECTS']['STORE_TABLE']
+    product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+
+    store_id = select_store_id(store_code)
+
+    sql_products_page = " SELECT {} " \
+                        " FROM {} prod, {} store " \
+                        " WHERE store.id_store = prod.product_store_id " \
+                        " AND prod.product_store_id = %s".format(SQL_PRODUCT_COLUMNS, product_table, store_table)
+
+    data_products_page = [store_id]
+
+    if page_cursor:
+        last_store_id, last_sku = Util.decode_page_cursor(page_cursor)
+
+        if str(last_store_id) != str(store_id):
+            raise mvc_exc.ItemNotStored('The page cursor does not belong to the store "{}"'.format(store_code))
+
+        sql_products_page += " AND (prod.product_store_id, prod.product_sku) > (%s, %s)"
+        data_products_page += [last_store_id, last_sku]
+
+    if product_status is not None:
+        sql_products_page += " AND prod.product_status = %s"
+        data_products_page.append(product_status)
+
+    if product_published is not None:
+        sql_products_page += " AND prod.product_published = %s"
+        data_products_page.append(product_published)
+
+    # One row more than the page tells if there is a next page
+    sql_products_page += " ORDER BY prod.product_store_id, prod.product_sku LIMIT %s"
+    data_products_page.append(page_size + 1)
+
+    try:
+
+        conn = session_to_db()
+
+        cursor = create_cursor(conn)
+
+        cursor.execute(sql_products_page, data_products_page)
+
+        products_rows = cursor.fetchall()
+
+        close_cursor(cursor)
+
+    except SQLAlchemyError as error:
+        rollback_transaction(conn)
+        logger.exception('An exception occurred while execute transaction: %s', error)
+        raise SQLAlchemyError(
+            "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, product_table)
+        )
+    finally:
+        disconnect_from_db(conn)
+
+    next_cursor = None
+
+    if len(products_rows) > page_size:
+        products_rows = products_rows[:page_size]
+        next_cursor = Util.encode_page_cursor(str(store_id), products_rows[-1]['product_sku'])
+
+    products_page = {
+        "CodeStore": store_code,
+        "PageSize": len(products_rows),
+        "NextCursor": next_cursor,
+        "Products": [format_product_row(product_data) for product_data in products_rows],
+    }
+
+    logger.info('Products page of Store: %s', 'Code: {}, Products: {}, Next: {}'.format(store_code,
+                                                                                        len(products_rows),
+                                                                                        next_cursor is not None))
+
+    return products_page
+
+
+# Update stock by product sku and store_code
+def update_product_store_stock(stock, product_sku, store_code):
+    r"""
+    Transaction to update the stock/inventory of a product registered on database.
+
+    :param stock: The number of stock or inventory to assign to the product.
+    :param product_sku: The SKU identifier to setup the stock updated.
+    :param store_code: The store code to looking for the store to update the inventory product.
+
+    :return product_stock_updated: The dictionary to view on the front of a product stock updated.
+    """
+
+    cfg = Util.get_config_constant_file()
+
+    conn = None
+    cursor = None
+    product_stock_updated = dict()
+
+    try:
+        conn = session_to_db()
+
+        cursor = create_cursor(conn)
+
+        store_table = cfg['DB_OBJECTS']['STORE_TABLE']
+        product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+
+        if not Util.validate_store_code_syntax(store_code):
+            logger.error('Can not read the recordset: {}, because the store code is not valid: {}'.format(store_code,
+                                                                                                          store_table))
+            raise mvc_exc.ItemNotStored(
+                'Can\'t read "{}" because it\'s not stored in table "{}. SQL Exception"'.format(
+                    store_code, store_table
                 )
+            )
+
+        sql_update_stock = " UPDATE {}" \
+                           " SET    product_stock = %s, " \
+                           "        last_update_date = now() " \
+                           " WHERE product_store_id = (" \
+                           "        SELECT store.id_store " \
+                           "        FROM {} store" \
+                           "        WHERE store.store_code = %s)" \
+                           " AND product_sku = %s" \
+                           " RETURNING last_update_date".format(product_table, store_table)
+
+        cursor.execute(sql_update_stock, (stock, store_code, product_sku,))
+
+        stock_dates = cursor.fetchone()
+
+        last_update_date = stock_dates['last_update_date'] if stock_dates else None
+        rows_updated = cursor.rowcount
+
+        notify_cache_change(cursor, 'stock', [product_sku])
+
+        commit_transaction(conn)
+
+        invalidate_stock_cache(product_sku)
+
+        close_cursor(cursor)
+
+        product_stock_updated = {
+            "StoreCode": store_code,
+            "ProductSku": product_sku,
+            "ProductStock": str(stock),
+            "LastUpdateDate": last_update_date,
+            "Message": "Product Stock Updated Successful",
+        }
+
+        if rows_updated == 0:
+            product_stock_updated = {
+                "StoreCode": store_code,
+                "ProductSku": product_sku,
+                "ProductStock": str(stock),
+                "LastUpdateDate": last_update_date,
+                "Message": "Store or Product not exists",
+            }
+
+            logger.error('Can not read the recordset: {}, because is not stored on table: {}'.format(store_code,
+                                                                                                     store_table))
+            raise SQLAlchemyError(
+                "Can\'t read data because it\'s not stored in table {}. SQL Exception".format(store_table)
+            )
+
+    except CheckViolation as error:
+        rollback_transaction(conn)
+        raise reserved_stock_error(error, product_sku, store_code)
+    except SQLAlchemyError as error:
+        rollback_transaction(conn)
+        logger.exception('An exception occurred while execute transaction: %s', error)
+        raise SQLAlchemyError(
+            "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, product_table)
+        )
+    finally:
+        disconnect_from_db(conn)
+
+    return product_stock_updated
+
+
+# Order in which every transaction that writes the stock of many rows locks them. The same total order
+# everywhere means two of them wait for each other instead of deadlocking. The SKU is compared byte by byte
+# ("C" collation), so the chunks sorted in Python (Util.chunk_by_product_sku) follow it too.
+SQL_STOCK_LOCK_ORDER = 'prod.product_sku COLLATE "C", prod.product_store_id'
+
+
+# Update stock of many products and stores with set-based statements
+def update_bulk_product_store_stock(stock_items):
+    r"""
+    Transaction to update the stock/inventory of many products in many stores.
+    Each chunk of items is applied with a single UPDATE ... FROM (VALUES ...) statement, and all the
+    chunks are committed together. The chunks are sorted by SKU and their rows are locked in
+    SQL_STOCK_LOCK_ORDER before the UPDATE, so concurrent bulk syncs do not deadlock.
+
+    When the same product and store comes more than once, the last item wins and the previous ones
+    are reported as superseded. An item whose stock is lower than the units reserved of the product is
+    not applied and is reported as below_reserved. Items that are not dictionaries, with a store_code or
+    product_sku that is not text, or with a stock that is not a finite number not negative are reported
+    as invalid.
+
+    :param stock_items: List of dictionaries with store_code, product_sku and stock.
+    :return bulk_stock_updated: Dictionary with the status of each item and the rows per second achieved.
+    """
+
+    cfg = Util.get_config_constant_file()
+
+    conn = None
+    cursor = None
+
+    store_table = cfg['DB_OBJECTS']['STORE_TABLE']
+    product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+    chunk_size = int(cfg['BULK_STOCK']['CHUNK_SIZE'])
+
+    stock_results = []
+    latest_item_index = dict()
+
+    for item_index, stock_item in enumerate(stock_items):
+        if not isinstance(stock_item, dict):
+            stock_item = dict()
+
+        store_code = stock_item.get('store_code')
+        product_sku = stock_item.get('product_sku')
+        stock = stock_item.get('stock')
+
+        stock_results.append({
+            "StoreCode": store_code,
+            "ProductSku": product_sku,
+            "ProductStock": str(stock),
+            "Status": "invalid",
+        })
+
+        # Items that are not dictionaries or keys that are not text are invalid: the chunks sort the SKUs
+        if not Util.is_valid_stock_key(store_code, product_sku) or not Util.is_valid_stock(stock):
+            continue
+
+        previous_index = latest_item_index.get((store_code, product_sku))
+
+        if previous_index is not None:
+            stock_results[previous_index]["Status"] = "superseded"
+
+        latest_item_index[(store_code, product_sku)] = item_index
+
+    stock_values = [(item_index, key[0], key[1], stock_items[item_index].get('stock'))
+                    for key, item_index in latest_item_index.items()]
+
+    sql_lock_bulk_stock = " WITH stock_input (item_index, store_code, product_sku, product_stock) AS (VALUES %s) " \
+                          " SELECT prod.product_id " \
+                          " FROM   {} prod " \
+                          " JOIN   {} store ON store.id_store = prod.product_store_id " \
+                          " JOIN   stock_input ON stock_input.store_code = store.store_code " \
+                          "                   AND stock_input.product_sku = prod.product_sku " \
+                          " ORDER BY {} " \
+                          " FOR UPDATE OF prod".format(product_table, store_table, SQL_STOCK_LOCK_ORDER)
+
+    sql_bulk_stock = " WITH stock_input (item_index, store_code, product_sku, product_stock) AS (VALUES %s), " \
+                     " stock_updated AS (" \
+                     "   UPDATE {} prod " \
+                     "   SET    product_stock = stock_input.product_stock, " \
+                     "          last_update_date = now() " \
+                     "   FROM   stock_input " \
+                     "   JOIN   {} store ON store.store_code = stock_input.store_code " \
+                     "   WHERE  prod.product_store_id = store.id_store " \
+                     "   AND    prod.product_sku = stock_input.product_sku " \
+                     "   AND    (prod.product_reserved_stock = 0 " \
+                     "           OR stock_input.product_stock >= prod.product_reserved_stock) " \
+                     "   RETURNING stock_input.item_index) " \
+                     " SELECT stock_input.item_index, " \
+                     "        CASE WHEN stock_updated.item_index IS NOT NULL THEN 'updated' " \
+                     "             WHEN store.id_store IS NULL THEN 'unknown_store' " \
+                     "             WHEN prod.product_id IS NULL THEN 'unknown_sku' " \
+                     "             ELSE 'below_reserved' END AS status " \
+                     " FROM stock_input " \
+                     " LEFT JOIN stock_updated ON stock_updated.item_index = stock_input.item_index " \
+                     " LEFT JOIN {} store ON store.store_code = stock_input.store_code " \
+                     " LEFT JOIN {} prod ON prod.product_store_id = store.id_store " \
+                     "                  AND prod.product_sku = stock_input.product_sku".format(product_table,
+                                                                                           store_table,
+                                                                                           store_table,
+                                                                                           product_table)
+
+    started_at = time.perf_counter()
+
+    try:
+        conn = session_to_db()
+
+        cursor = create_cursor(conn)
+
+        stock_template = '(%s::integer, %s::varchar, %s::varchar, %s::numeric)'
+
+        for stock_chunk in Util.chunk_by_product_sku(stock_values, 2, chunk_size):
+            extras.execute_values(cursor, sql_lock_bulk_stock, stock_chunk, template=stock_template,
+                                  page_size=len(stock_chunk))
+
+            chunk_status = extras.execute_values(cursor,
+                                                 sql_bulk_stock,
+                                                 stock_chunk,
+                                                 template=stock_template,
+                                                 page_size=len(stock_chunk),
+                                                 fetch=True)
+
+            for status_row in chunk_status:
+                stock_results[status_row['item_index']]["Status"] = status_row['status']
+
+        notify_cache_change(cursor, 'stock', {stock_key[1] for stock_key in latest_item_index})
+
+        commit_transaction(conn)
+
+        for product_sku in {stock_key[1] for stock_key in latest_item_index}:
+            invalidate_stock_cache(product_sku)
+
+        close_cursor(cursor)
+
+    except SQLAlchemyError as error:
+        rollback_transaction(conn)
+        logger.exception('An exception occurred while execute transaction: %s', error)
+        raise SQLAlchemyError(
+            "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, product_table)
+        )
+    finally:
+        disconnect_from_db(conn)
+
+    elapsed_seconds = time.perf_counter() - started_at
+
+    rows_updated = sum(1 for stock_result in stock_results if stock_result["Status"] == "updated")
+
+    logger.info('Bulk stock updated: %s', 'Received: {}, Updated: {}, Seconds: {:.3f}'.format(len(stock_items),
+                                                                                            rows_updated,
+                                                                                            elapsed_seconds))
+
+    bulk_stock_updated = {
+        "RowsReceived": len(stock_items),
+        "RowsUpdated": rows_updated,
+        "ElapsedSeconds": round(elapsed_seconds, 6),
+        "RowsPerSecond": round(len(stock_items) / elapsed_seconds, 2) if elapsed_seconds else None,
+        "Results": stock_results,
+    }
+
+    return bulk_stock_updated
+
+
+# Conditions checked on each row before a decrement is applied. The guards compare the available stock
+# (stock - reserved), and no guard lets a decrement take the units held by the reservations.
+STOCK_ADJUST_GUARDS = {
+    'none': "(stock_input.stock_delta >= 0 OR prod.product_reserved_stock = 0 "
+            " OR prod.product_stock + stock_input.stock_delta >= prod.product_reserved_stock)",
+    'non_negative': "(stock_input.stock_delta >= 0 "
+                    " OR prod.product_stock - prod.product_reserved_stock + stock_input.stock_delta >= 0)",
+    'min_inventory': "(stock_input.stock_delta >= 0 "
+                     " OR prod.product_stock - prod.product_reserved_stock + stock_input.stock_delta "
+                     "    >= COALESCE(store.store_min_inventory, 0))",
+}
+
+
+# Add or subtract stock of many products and stores, all or nothing
+def adjust_product_store_stock(stock_deltas, guard='none'):
+    r"""
+    Transaction to apply relative stock changes (+n / -n) to products of stores.
+
+    All the changes are applied with one UPDATE ... SET product_stock = product_stock + delta ... RETURNING,
+    so there is no read-compute-write window and no update is lost under concurrency. The deltas of
+    the same product and store are summed first. When the batch has more than one row, the rows are
+    locked in SQL_STOCK_LOCK_ORDER before the UPDATE, so two batches touching the same rows wait for
+    each other instead of deadlocking.
+
+    The batch is atomic: if an item is not valid, its store or product does not exist or the guard
+    fails for it, nothing is applied and the status of each item tells why.
+
+    :param stock_deltas: List of dictionaries with store_code, product_sku and delta.
+    :param guard: 'none' (a decrement can not take the units reserved), 'non_negative' (a decrement
+        can not leave the available stock below zero) or 'min_inventory' (nor below the
+        store_min_inventory of the store).
+    :return stock_adjusted: Dictionary with Applied, the guard and the result of each product and store.
+    """
+
+    cfg = Util.get_config_constant_file()
+
+    conn = None
+    cursor = None
+
+    store_table = cfg['DB_OBJECTS']['STORE_TABLE']
+    product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+
+    if guard not in STOCK_ADJUST_GUARDS:
+        raise mvc_exc.IntegrityError('Stock guard "{}" is not valid, use one of {}'.format(
+            guard, ', '.join(STOCK_ADJUST_GUARDS)))
+
+    stock_results = []
+    item_by_key = dict()
+    items_valid = True
+
+    for stock_delta in stock_deltas:
+        store_code = stock_delta.get('store_code')
+        product_sku = stock_delta.get('product_sku')
+        delta = Util.parse_stock_delta(stock_delta.get('delta'))
+
+        if not store_code or not product_sku or delta is None:
+            items_valid = False
+            stock_results.append({
+                "StoreCode": store_code,
+                "ProductSku": product_sku,
+                "StockDelta": stock_delta.get('delta'),
+                "Status": "invalid",
+            })
+            continue
+
+        item_index = item_by_key.get((store_code, product_sku))
+
+        if item_index is None:
+            item_index = item_by_key[(store_code, product_sku)] = len(stock_results)
+            stock_results.append({
+                "StoreCode": store_code,
+                "ProductSku": product_sku,
+                "StockDelta": delta,
+                "Status": "not_applied",
+            })
+        else:
+            stock_results[item_index]["StockDelta"] += delta
+
+    stock_adjusted = {
+        "Applied": False,
+        "Guard": guard,
+        "Results": stock_results,
+    }
+
+    if not items_valid or not item_by_key:
+        return stock_adjusted
+
+    stock_values = [(item_index, key[0], key[1], stock_results[item_index]["StockDelta"])
+                    for key, item_index in item_by_key.items()]
+
+    stock_template = '(%s::integer, %s::varchar, %s::varchar, %s::numeric)'
+
+    sql_lock_stock = " WITH stock_input (item_index, store_code, product_sku, stock_delta) AS (VALUES %s) " \
+                     " SELECT prod.product_id " \
+                     " FROM   {} prod " \
+                     " JOIN   {} store ON store.id_store = prod.product_store_id " \
+                     " JOIN   stock_input ON stock_input.store_code = store.store_code " \
+                     "                   AND stock_input.product_sku = prod.product_sku " \
+                     " ORDER BY {} " \
+                     " FOR UPDATE OF prod".format(product_table, store_table, SQL_STOCK_LOCK_ORDER)
+
+    sql_adjust_stock = " WITH stock_input (item_index, store_code, product_sku, stock_delta) AS (VALUES %s) " \
+                       " UPDATE {} prod " \
+                       " SET    product_stock = prod.product_stock + stock_input.stock_delta, " \
+                       "        last_update_date = now() " \
+                       " FROM   stock_input " \
+                       " JOIN   {} store ON store.store_code = stock_input.store_code " \
+                       " WHERE  prod.product_store_id = store.id_store " \
+                       " AND    prod.product_sku = stock_input.product_sku " \
+                       " AND    {} " \
+                       " RETURNING stock_input.item_index, prod.product_stock, " \
+                       "           prod.last_update_date".format(product_table, store_table, STOCK_ADJUST_GUARDS[guard])
+
+    sql_stock_rejected = " WITH stock_input (item_index, store_code, product_sku, stock_delta) AS (VALUES %s) " \
+                         " SELECT stock_input.item_index, " \
+                         "        prod.product_stock, " \
+                         "        CASE WHEN store.id_store IS NULL THEN 'unknown_store' " \
+                         "             WHEN prod.product_id IS NULL THEN 'unknown_sku' " \
+                         "             WHEN prod.product_reserved_stock > 0 " \
+                         "              AND prod.product_stock + stock_input.stock_delta " \
+                         "                  < prod.product_reserved_stock THEN 'below_reserved' " \
+                         "             WHEN prod.product_stock + stock_input.stock_delta < 0 THEN 'below_zero' " \
+                         "             ELSE 'below_min_inventory' END AS status " \
+                         " FROM   stock_input " \
+                         " LEFT JOIN {} store ON store.store_code = stock_input.store_code " \
+                         " LEFT JOIN {} prod ON prod.product_store_id = store.id_store " \
+                         "                  AND prod.product_sku = stock_input.product_sku".format(store_table,
+                                                                                                 product_table)
+
+    try:
+        conn = session_to_db()
+
+        cursor = create_cursor(conn)
+
+        # A rejected batch is undone up to here, the rest of the unit of work is kept
+        cursor.execute("SAVEPOINT stock_adjust")
+
+        if len(stock_values) > 1:
+            extras.execute_values(cursor, sql_lock_stock, stock_values, template=stock_template,
+                                  page_size=len(stock_values))
+
+        stock_rows = extras.execute_values(cursor, sql_adjust_stock, stock_values, template=stock_template,
+                                           page_size=len(stock_values), fetch=True)
+
+        for stock_row in stock_rows:
+            stock_results[stock_row['item_index']].update({
+                "ProductStock": stock_row['product_stock'],
+                "LastUpdateDate": stock_row['last_update_date'],
+                "Status": "adjusted",
+            })
+
+        if len(stock_rows) == len(stock_values):
+            notify_cache_change(cursor, 'stock', {stock_key[1] for stock_key in item_by_key})
+
+            commit_transaction(conn)
+
+            for product_sku in {stock_key[1] for stock_key in item_by_key}:
+                invalidate_stock_cache(product_sku)
+
+            stock_adjusted["Applied"] = True
+
+        else:
+            # The rows not updated keep their values (and locks) until the rollback to the savepoint
+            rejected_values = [stock_value for stock_value in stock_values
+                               if stock_results[stock_value[0]]["Status"] != "adjusted"]
+
+            rejected_rows = extras.execute_values(cursor, sql_stock_rejected, rejected_values,
+                                                  template=stock_template, page_size=len(rejected_values),
+                                                  fetch=True)
+
+            cursor.execute("ROLLBACK TO SAVEPOINT stock_adjust")
+
+            commit_transaction(conn)
+
+            for stock_result in stock_results:
+                stock_result.pop("ProductStock", None)
+                stock_result.pop("LastUpdateDate", None)
+                stock_result["Status"] = "not_applied"
+
+            for rejected_row in rejected_rows:
+                stock_results[rejected_row['item_index']].update({
+                    "ProductStock": rejected_row['product_stock'],
+                    "Status": rejected_row['status'],
+                })
+
+        close_cursor(cursor)
+
+    except SQLAlchemyError as error:
+        rollback_transaction(conn)
+        logger.exception('An exception occurred while execute transaction: %s', error)
+        raise SQLAlchemyError(
+            "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, product_table)
+        )
+    finally:
+        disconnect_from_db(conn)
+
+    logger.info('Stock adjusted: %s', 'Items: {}, Guard: {}, Applied: {}'.format(len(stock_values), guard,
+                                                                              stock_adjusted["Applied"]))
+
+    return stock_adjusted
+
+
+# Write the stock changes coalesced by the write-behind buffer
+def apply_buffered_stock_changes(stock_changes):
+    r"""
+    Transaction to write a flush of the stock write buffer (absolute stocks and summed deltas).
+
+    Each chunk of changes is applied with one UPDATE ... FROM (VALUES ...) that sets
+    product_stock = COALESCE(stock, product_stock) + delta, after locking the rows in
+    SQL_STOCK_LOCK_ORDER; the changes are sorted by SKU before they are cut in chunks
+    (Util.chunk_by_product_sku), so the locks of the whole flush follow that order, and all the
+    chunks are committed together. The changes of
+    unknown stores or products, and the ones that leave the stock lower than the units reserved, are
+    logged and discarded.
+
+    :param stock_changes: List of tuples (store_code, product_sku, stock, delta), one per store and product.
+    :return stock_flushed: Dictionary with the changes received and the rows updated.
+    """
+
+    cfg = Util.get_config_constant_file()
+
+    conn = None
+    cursor = None
+
+    store_table = cfg['DB_OBJECTS']['STORE_TABLE']
+    product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+    chunk_size = int(cfg['BULK_STOCK']['CHUNK_SIZE'])
+
+    stock_values = [(item_index,) + tuple(stock_change) for item_index, stock_change in enumerate(stock_changes)]
+
+    stock_template = '(%s::integer, %s::varchar, %s::varchar, %s::numeric, %s::numeric)'
+
+    sql_lock_buffered = " WITH stock_input (item_index, store_code, product_sku, product_stock, stock_delta) " \
+                        "      AS (VALUES %s) " \
+                        " SELECT prod.product_id " \
+                        " FROM   {} prod " \
+                        " JOIN   {} store ON store.id_store = prod.product_store_id " \
+                        " JOIN   stock_input ON stock_input.store_code = store.store_code " \
+                        "                   AND stock_input.product_sku = prod.product_sku " \
+                        " ORDER BY {} " \
+                        " FOR UPDATE OF prod".format(product_table, store_table, SQL_STOCK_LOCK_ORDER)
+
+    sql_buffered_stock = " WITH stock_input (item_index, store_code, product_sku, product_stock, stock_delta) " \
+                         "      AS (VALUES %s) " \
+                         " UPDATE {} prod " \
+                         " SET    product_stock = COALESCE(stock_input.product_stock, prod.product_stock) " \
+                         "                        + stock_input.stock_delta, " \
+                         "        last_update_date = now() " \
+                         " FROM   stock_input " \
+                         " JOIN   {} store ON store.store_code = stock_input.store_code " \
+                         " WHERE  prod.product_store_id = store.id_store " \
+                         " AND    prod.product_sku = stock_input.product_sku " \
+                         " AND    (prod.product_reserved_stock = 0 " \
+                         "         OR COALESCE(stock_input.product_stock, prod.product_stock) " \
+                         "            + stock_input.stock_delta >= prod.product_reserved_stock) " \
+                         " RETURNING stock_input.item_index".format(product_table, store_table)
+
+    items_updated = set()
+
+    try:
+        conn = session_to_db()
+
+        cursor = create_cursor(conn)
+
+        for stock_chunk in Util.chunk_by_product_sku(stock_values, 2, chunk_size):
+            extras.execute_values(cursor, sql_lock_buffered, stock_chunk, template=stock_template,
+                                  page_size=len(stock_chunk))
+
+            updated_rows = extras.execute_values(cursor, sql_buffered_stock, stock_chunk, template=stock_template,
+                                                 page_size=len(stock_chunk), fetch=True)
+
+            items_updated.update(updated_row['item_index'] for updated_row in updated_rows)
+
+        notify_cache_change(cursor, 'stock', {stock_change[1] for stock_change in stock_changes})
+
+        commit_transaction(conn)
+
+        for product_sku in {stock_change[1] for stock_change in stock_changes}:
+            invalidate_stock_cache(product_sku)
+
+        close_cursor(cursor)
+
+    except SQLAlchemyError as error:
+        rollback_transaction(conn)
+        logger.exception('An exception occurred while execute transaction: %s', error)
+        raise SQLAlchemyError(
+            "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, product_table)
+        )
+    finally:
+        disconnect_from_db(conn)
+
+    for item_index, stock_change in enumerate(stock_changes):
+        if item_index not in items_updated:
+            logger.warning('Buffered stock change discarded, store or product not exists '
+                           'or the stock is lower than the units reserved: %s',
+                           'StoreCode: {}, SKU: {}'.format(stock_change[0], stock_change[1]))
+
+    logger.info('Buffered stock flushed: %s', 'Received: {}, Updated: {}'.format(len(stock_changes),
+                                                                                len(items_updated)))
+
+    return {
+        "RowsReceived": len(stock_changes),
+        "RowsUpdated": len(items_updated),
+    }
+
+
+_stock_write_buffer_lock = threading.Lock()
+_stock_write_buffer = None
+
+# Errors of a flush that mean the database is not reachable, not that the changes are wrong
+STOCK_WRITE_BUFFER_RETRY_ERRORS = (mvc_exc.ConnectionError, mvc_exc.TimeoutError, psycopg2.OperationalError,
+                                   psycopg2.InterfaceError)
+
+
+def get_stock_write_buffer():
+    r"""
+    Get the stock write buffer of the process (STOCK_WRITE_BUFFER.ENABLED), started on the first use and
+    flushed at the process exit.
+
+    :return stock_write_buffer: StockWriteBuffer object, None when the write-behind mode is disabled.
+    """
+
+    global _stock_write_buffer
+
+    cfg = Util.get_config_constant_file()
+
+    if not cfg['STOCK_WRITE_BUFFER']['ENABLED']:
+        return None
+
+    with _stock_write_buffer_lock:
+        # A buffer inherited from the parent process (fork) is not started on this one
+        if _stock_write_buffer is None or _stock_write_buffer.pid != os.getpid():
+            _stock_write_buffer = StockWriteBuffer(apply_buffered_stock_changes,
+                                                   int(cfg['STOCK_WRITE_BUFFER']['FLUSH_INTERVAL_MS']),
+                                                   int(cfg['STOCK_WRITE_BUFFER']['MAX_ENTRIES']),
+                                                   int(cfg['STOCK_WRITE_BUFFER']['MAX_RETRIES']),
+                                                   STOCK_WRITE_BUFFER_RETRY_ERRORS)
+            _stock_write_buffer.start()
+
+            # Registered after the connection pool, so it runs before the pool is closed
+            atexit.register(_stock_write_buffer.close)
+
+        return _stock_write_buffer
+
+
+def close_background_work():
+    r"""
+    Flush the stock write buffer and stop the cache event listener of the process.
+
+    Called by the worker_exit hook of gunicorn (gunicorn.conf.py), before Python joins the threads and
+    runs the atexit functions; the atexit registrations are kept for the other servers, and closing
+    twice only flushes an empty buffer.
+    """
+
+    with _stock_write_buffer_lock:
+        stock_write_buffer = _stock_write_buffer
+
+    if stock_write_buffer is not None and stock_write_buffer.pid == os.getpid():
+        stock_write_buffer.close()
+
+    with _cache_event_listener_lock:
+        cache_event_listener = _cache_event_listener
+
+    if cache_event_listener is not None and cache_event_listener.pid == os.getpid():
+        cache_event_listener.close()
+
+
+# Hold stock of products of stores for a checkout, all or nothing
+def create_stock_reservation(reservation_items, ttl_seconds=None, order_reference=None):
+    r"""
+    Transaction to hold units of products of stores without decrementing their stock.
+
+    Each product and store is held with one UPDATE that adds the quantity to product_reserved_stock only
+    while the available stock (stock - reserved) covers it, so two checkouts can not hold the same
+    units. The quantities of the same product and store are summed, and the rows are locked in
+    SQL_STOCK_LOCK_ORDER when there is more than one, as adjust_product_store_stock does.
+    If a product can not be held nothing is held.
+
+    :param reservation_items: List of dictionaries with store_code, product_sku and quantity.
+    :param ttl_seconds: Seconds the units are held, STOCK_RESERVATION.TTL_SECONDS by default.
+    :param order_reference: Optional reference of the order of the checkout.
+    :return stock_reservation: Dictionary with the reservation id, its status (held or rejected), the
+        expiration and the result of each product and store.
+    """
+
+    cfg = Util.get_config_constant_file()
+
+    conn = None
+    cursor = None
 
-            product_id = product_data['product_id']
-            sku_product = product_data['product_sku']
-            product_unspc = product_data['product_unspc']
-            product_brand = product_data['product_brand']
-            category_id = product_data['category_id']
-            parent_category_id = product_data['parent_category_id']
-            unit_of_measure = product_data['unit_of_measure']
-            product_stock = product_data['product_stock']
-            product_store_code = product_data['store_code']
-            product_store_name = product_data['store_name']
-            product_name = product_data['product_name']
-            product_title = product_data['product_title']
-            product_long_description = product_data['product_long_description']
-            product_photo = product_data['product_photo']
-            product_price = product_data['product_price']
-            product_tax = product_data['product_tax']
-            product_currency = product_data['product_currency']
-            product_status = product_data['product_status']
-            product_published = product_data['product_published']
-            product_manage_stock = product_data['product_manage_stock']
-            product_length = product_data['product_length']
-            product_width = product_data['product_width']
-            product_height = product_data['product_height']
-            product_weight = product_data['product_weight']
-            fecha_creacion = datetime.strptime(str(product_data['creation_date']), "%Y-%m-%d %H:%M:%S")
-            fecha_actualizacion = datetime.strptime(str(product_data['last_update_date']), "%Y-%m-%d %H:%M:%S")
-
-            logger.info('Van Registered: %s', 'IdProduct: {}, '
-                                              'SKUProduct: {}, '
-                                              'UNSPC: {}, '
-                                              'NameProduct: {}, '
-                                              'TitleProduct: {}, '
-                                              'BrandProduct: {} '.format(product_id,
-                                                                         product_sku,
-                                                                         product_unspc,
-                                                                         product_name,
-                                                                         product_title,
-                                                                         product_brand))
-
-            product_data_by_sku += [{
-                "Product": {
-                    "IdProduct": product_id,
-                    "SKUProduct": sku_product,
-                    "UNSPC": product_unspc,
-                    "NameProduct": product_name,
-                    "TitleProduct": product_title,
-                    "BrandProduct": product_brand,
-                    "UOMProduct": unit_of_measure,
-                    "CategoryIdProduct": category_id,
-                    "ParentCategoryIdProduct": parent_category_id,
-                    "StockProduct": product_stock,
-                    "CodeStore": product_store_code,
-                    "NameStore": product_store_name,
-                    "LongDescriptionProduct": product_long_description,
-                    "PhotoProduct": product_photo,
-                    "Prices": {
-                        "PriceProduct": product_price,
-                        "TaxPriceProduct": product_tax,
-                        "CurrencyPriceProduct": product_currency,
-                    },
-                    "StatusProduct": product_status,
-                    "PublishedProduct": product_published,
-                    "ManageStockProduct": product_manage_stock,
-                    "Volumetry": {
-                        "LengthProduct": product_length,
-                        "WidthProduct": product_width,
-                        "HeightProduct": product_height,
-                        "WeightProduct": product_weight,
-                    },
-                    "CreationDate": fecha_creacion,
-                    "LastUpdateDate": fecha_actualizacion,
-                }
-            }]
+    store_table = cfg['DB_OBJECTS']['STORE_TABLE']
+    product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+    reservation_table = cfg['DB_OBJECTS']['STOCK_RESERVATION_TABLE']
 
-        close_cursor(cursor)
+    ttl_seconds = ttl_seconds if ttl_seconds is not None else int(cfg['STOCK_RESERVATION']['TTL_SECONDS'])
+
+    if isinstance(ttl_seconds, bool) or not isinstance(ttl_seconds, int) or \
+            not 0 < ttl_seconds <= int(cfg['STOCK_RESERVATION']['MAX_TTL_SECONDS']):
+        raise mvc_exc.IntegrityError('Reservation ttl_seconds "{}" is not valid'.format(ttl_seconds))
+
+    reservation_id = uuid7()
+
+    reservation_results = []
+    item_by_key = dict()
+    items_valid = True
+
+    for reservation_item in reservation_items:
+        store_code = reservation_item.get('store_code')
+        product_sku = reservation_item.get('product_sku')
+        quantity = Util.parse_stock_delta(reservation_item.get('quantity'))
+
+        if not store_code or not product_sku or quantity is None or quantity <= 0:
+            items_valid = False
+            reservation_results.append({
+                "StoreCode": store_code,
+                "ProductSku": product_sku,
+                "Quantity": reservation_item.get('quantity'),
+                "Status": "invalid",
+            })
+            continue
+
+        item_index = item_by_key.get((store_code, product_sku))
+
+        if item_index is None:
+            item_index = item_by_key[(store_code, product_sku)] = len(reservation_results)
+            reservation_results.append({
+                "StoreCode": store_code,
+                "ProductSku": product_sku,
+                "Quantity": quantity,
+                "Status": "not_held",
+            })
+        else:
+            reservation_results[item_index]["Quantity"] += quantity
+
+    stock_reservation = {
+        "ReservationId": reservation_id,
+        "ReservationStatus": "rejected",
+        "OrderReference": order_reference,
+        "ExpiresAt": None,
+        "Items": reservation_results,
+    }
+
+    if not items_valid or not item_by_key:
+        return stock_reservation
+
+    hold_values = [(item_index, key[0], key[1], reservation_results[item_index]["Quantity"])
+                   for key, item_index in item_by_key.items()]
+
+    hold_template = '(%s::integer, %s::varchar, %s::varchar, %s::numeric)'
+
+    sql_lock_hold = " WITH hold_input (item_index, store_code, product_sku, quantity) AS (VALUES %s) " \
+                    " SELECT prod.product_id " \
+                    " FROM   {} prod " \
+                    " JOIN   {} store ON store.id_store = prod.product_store_id " \
+                    " JOIN   hold_input ON hold_input.store_code = store.store_code " \
+                    "                  AND hold_input.product_sku = prod.product_sku " \
+                    " ORDER BY {} " \
+                    " FOR UPDATE OF prod".format(product_table, store_table, SQL_STOCK_LOCK_ORDER)
+
+    sql_hold_stock = " WITH hold_input (item_index, store_code, product_sku, quantity) AS (VALUES %s) " \
+                     " UPDATE {} prod " \
+                     " SET    product_reserved_stock = prod.product_reserved_stock + hold_input.quantity, " \
+                     "        last_update_date = now() " \
+                     " FROM   hold_input " \
+                     " JOIN   {} store ON store.store_code = hold_input.store_code " \
+                     " WHERE  prod.product_store_id = store.id_store " \
+                     " AND    prod.product_sku = hold_input.product_sku " \
+                     " AND    prod.product_stock - prod.product_reserved_stock >= hold_input.quantity " \
+                     " RETURNING hold_input.item_index, prod.product_store_id, " \
+                     "           prod.product_stock - prod.product_reserved_stock AS available_stock".format(
+                        product_table, store_table)
+
+    sql_insert_hold = " INSERT INTO {} " \
+                      " (reservation_id, product_sku, product_store_id, quantity, reservation_status, " \
+                      "  order_reference, expires_at, creation_date, last_update_date) " \
+                      " VALUES %s " \
+                      " RETURNING expires_at".format(reservation_table)
+
+    sql_hold_rejected = " WITH hold_input (item_index, store_code, product_sku, quantity) AS (VALUES %s) " \
+                        " SELECT hold_input.item_index, " \
+                        "        prod.product_stock - prod.product_reserved_stock AS available_stock, " \
+                        "        CASE WHEN store.id_store IS NULL THEN 'unknown_store' " \
+                        "             WHEN prod.product_id IS NULL THEN 'unknown_sku' " \
+                        "             ELSE 'insufficient_stock' END AS status " \
+                        " FROM   hold_input " \
+                        " LEFT JOIN {} store ON store.store_code = hold_input.store_code " \
+                        " LEFT JOIN {} prod ON prod.product_store_id = store.id_store " \
+                        "                  AND prod.product_sku = hold_input.product_sku".format(store_table,
+                                                                                              product_table)
+
+    try:
+        conn = session_to_db()
+
+        cursor = create_cursor(conn)
+
+        # A rejected reservation is undone up to here, the rest of the unit of work is kept
+        cursor.execute("SAVEPOINT stock_reservation")
+
+        if len(hold_values) > 1:
+            extras.execute_values(cursor, sql_lock_hold, hold_values, template=hold_template,
+                                  page_size=len(hold_values))
+
+        held_rows = extras.execute_values(cursor, sql_hold_stock, hold_values, template=hold_template,
+                                          page_size=len(hold_values), fetch=True)
+
+        for held_row in held_rows:
+            reservation_results[held_row['item_index']].update({
+                "AvailableStock": held_row['available_stock'],
+                "Status": "held",
+            })
 
-        data_product_all = json.dumps(product_data_by_sku)
+        if len(held_rows) == len(hold_values):
+            hold_lines = [(reservation_id, hold_values[held_row['item_index']][2], held_row['product_store_id'],
+                           hold_values[held_row['item_index']][3], order_reference, ttl_seconds)
+                          for held_row in held_rows]
+
+            expiration_rows = extras.execute_values(cursor, sql_insert_hold, hold_lines,
+                                                    template="(%s, %s, %s, %s, 'held', %s, "
+                                                             " now() + make_interval(secs => %s), now(), now())",
+                                                    page_size=len(hold_lines), fetch=True)
+
+            notify_cache_change(cursor, 'stock', {hold_key[1] for hold_key in item_by_key})
+
+            commit_transaction(conn)
+
+            stock_reservation.update({
+                "ReservationStatus": "held",
+                "ExpiresAt": expiration_rows[0]['expires_at'],
+            })
+
+            for product_sku in {hold_key[1] for hold_key in item_by_key}:
+                invalidate_stock_cache(product_sku)
+
+        else:
+            rejected_values = [hold_value for hold_value in hold_values
+                               if reservation_results[hold_value[0]]["Status"] != "held"]
+
+            rejected_rows = extras.execute_values(cursor, sql_hold_rejected, rejected_values, template=hold_template,
+                                                  page_size=len(rejected_values), fetch=True)
+
+            cursor.execute("ROLLBACK TO SAVEPOINT stock_reservation")
+
+            commit_transaction(conn)
+
+            for reservation_result in reservation_results:
+                reservation_result.pop("AvailableStock", None)
+                reservation_result["Status"] = "not_held"
+
+            for rejected_row in rejected_rows:
+                reservation_results[rejected_row['item_index']].update({
+                    "AvailableStock": rejected_row['available_stock'],
+                    "Status": rejected_row['status'],
+                })
+
+        close_cursor(cursor)
 
     except SQLAlchemyError as error:
-        conn.rollback()
+        rollback_transaction(conn)
         logger.exception('An exception occurred while execute transaction: %s', error)
         raise SQLAlchemyError(
-            "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, product_table)
+            "A SQL Exception {} occurred while transacting with the database on table {}.".format(error,
+                                                                                                  reservation_table)
         )
     finally:
         disconnect_from_db(conn)
 
-    return data_product_all
+    logger.info('Stock reservation: %s', 'Id: {}, Items: {}, Status: {}'.format(
+        reservation_id, len(hold_values), stock_reservation["ReservationStatus"]))
 
+    return stock_reservation
 
-# Update stock by product sku and store_code
-def update_product_store_stock(stock, product_sku, store_code):
+
+def confirm_stock_reservation(reservation_id):
     r"""
-    Transaction to update the stock/inventory of a product registered on database.
+    Confirm a reservation held (the payment cleared): its units are decremented from the stock.
 
-    :param stock: The number of stock or inventory to assign to the product.
-    :param product_sku: The SKU identifier to setup the stock updated.
-    :param store_code: The store code to looking for the store to update the inventory product.
+    :param reservation_id: Id of the reservation.
+    :return stock_reservation: Dictionary with the reservation status and the stock of each product and store.
+    """
 
-    :return product_stock_updated: The dictionary to view on the front of a product stock updated.
+    return finish_stock_reservation(reservation_id, 'confirmed')
+
+
+def release_stock_reservation(reservation_id):
+    r"""
+    Release a reservation held (the checkout was abandoned): its units are available again.
+
+    :param reservation_id: Id of the reservation.
+    :return stock_reservation: Dictionary with the reservation status and the stock of each product and store.
+    """
+
+    return finish_stock_reservation(reservation_id, 'released')
+
+
+def finish_stock_reservation(reservation_id, reservation_status):
+    r"""
+    Transaction to end a reservation held, as confirmed or released.
+
+    The product rows of the reservation are locked first, in SQL_STOCK_LOCK_ORDER, and then the
+    reservation lines, the same order expire_stock_reservations takes them, so a confirmation and a
+    sweep can not deadlock. A reservation already expired (even if the sweep did not reach it yet)
+    can not be confirmed: it is expired right there and its units released.
+
+    :param reservation_id: Id of the reservation.
+    :param reservation_status: 'confirmed' (decrements the stock) or 'released'.
+    :return stock_reservation: Dictionary with the reservation status (the previous one when it was
+        not held) and the stock of each product and store, None when the reservation does not exist.
     """
 
     cfg = Util.get_config_constant_file()
 
     conn = None
     cursor = None
-    product_stock_updated = dict()
+
+    product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+    reservation_table = cfg['DB_OBJECTS']['STOCK_RESERVATION_TABLE']
+
+    stock_reservation = None
+
+    # The products and stores of the lines never change, so they can be read before the lines are locked
+    sql_lock_reservation_stock = " SELECT prod.product_id " \
+                                 " FROM   {} prod " \
+                                 " WHERE  (prod.product_sku, prod.product_store_id) IN (" \
+                                 "        SELECT res.product_sku, res.product_store_id " \
+                                 "        FROM   {} res " \
+                                 "        WHERE  res.reservation_id = %s) " \
+                                 " ORDER BY {} " \
+                                 " FOR UPDATE OF prod".format(product_table, reservation_table, SQL_STOCK_LOCK_ORDER)
+
+    sql_lock_reservation = " SELECT reservation_status, " \
+                           "        expires_at <= now() AS expired " \
+                           " FROM   {} " \
+                           " WHERE  reservation_id = %s " \
+                           " FOR UPDATE".format(reservation_table)
+
+    sql_finish_reservation = " WITH finished AS (" \
+                             "   UPDATE {} " \
+                             "   SET    reservation_status = %s, " \
+                             "          last_update_date = now() " \
+                             "   WHERE  reservation_id = %s " \
+                             "   AND    reservation_status = 'held' " \
+                             "   RETURNING product_sku, product_store_id, quantity) " \
+                             " UPDATE {} prod " \
+                             " SET    product_stock = prod.product_stock " \
+                             "                        - CASE WHEN %s THEN finished.quantity ELSE 0 END, " \
+                             "        product_reserved_stock = GREATEST(prod.product_reserved_stock " \
+                             "                                          - finished.quantity, 0), " \
+                             "        last_update_date = now() " \
+                             " FROM   finished " \
+                             " WHERE  prod.product_sku = finished.product_sku " \
+                             " AND    prod.product_store_id = finished.product_store_id " \
+                             " RETURNING prod.product_sku, prod.product_stock, " \
+                             "           prod.product_stock - prod.product_reserved_stock AS available_stock".format(
+                                reservation_table, product_table)
 
     try:
         conn = session_to_db()
 
         cursor = create_cursor(conn)
 
-        last_update_date = get_datenow_from_db()
+        cursor.execute(sql_lock_reservation_stock, (reservation_id,))
+        cursor.execute(sql_lock_reservation, (reservation_id,))
 
-        store_table = cfg['DB_OBJECTS']['STORE_TABLE']
-        product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+        reservation_lines = cursor.fetchall()
 
-        if not Util.validate_store_code_syntax(store_code):
-            logger.error('Can not read the recordset: {}, because the store code is not valid: {}'.format(store_code,
-                                                                                                          store_table))
-            raise mvc_exc.ItemNotStored(
-                'Can\'t read "{}" because it\'s not stored in table "{}. SQL Exception"'.format(
-                    store_code, store_table
-                )
-            )
+        if reservation_lines:
+            current_status = reservation_lines[0]['reservation_status']
 
-        sql_update_stock = " UPDATE {}" \
-                           " SET	product_stock = %s, " \
-                           "        last_update_date = %s " \
-                           " WHERE product_store_id = (" \
-                           "        SELECT store.id_store " \
-                           "        FROM {} store" \
-                           "        WHERE store.store_code = %s)" \
-                           " AND product_sku = %s".format(product_table, store_table)
+            if current_status != 'held':
+                final_status = current_status
+            elif reservation_status == 'confirmed' and any(line['expired'] for line in reservation_lines):
+                final_status = 'expired'
+            else:
+                final_status = reservation_status
 
-        cursor.execute(sql_update_stock, (stock, last_update_date, "'" + store_code + "'", "'" + product_sku + "'",))
+            stock_rows = []
 
-        conn.commit()
+            if current_status == 'held':
+                cursor.execute(sql_finish_reservation, (final_status, reservation_id, final_status == 'confirmed',))
 
-        close_cursor(cursor)
+                stock_rows = cursor.fetchall()
 
-        row_exists = exists_row_registered(store_table, 'store_code', "'" + store_code + "'")
+            notify_cache_change(cursor, 'stock', {stock_row['product_sku'] for stock_row in stock_rows})
 
-        product_stock_updated = {
-            "StoreCode": store_code,
-            "ProductSku": product_sku,
-            "ProductStock": str(stock),
-            "LastUpdateDate": last_update_date,
-            "Message": "Product Stock Updated Successful",
-        }
+            commit_transaction(conn)
 
-        if not row_exists:
-            product_stock_updated = {
-                "StoreCode": store_code,
-                "ProductSku": product_sku,
-                "ProductStock": str(stock),
-                "LastUpdateDate": last_update_date,
-                "Message": "Store not exists",
+            for stock_row in stock_rows:
+                invalidate_stock_cache(stock_row['product_sku'])
+
+            stock_reservation = {
+                "ReservationId": reservation_id,
+                "ReservationStatus": final_status,
+                "Finished": current_status == 'held' and final_status == reservation_status,
+                "Items": [{
+                    "ProductSku": stock_row['product_sku'],
+                    "ProductStock": stock_row['product_stock'],
+                    "AvailableStock": stock_row['available_stock'],
+                } for stock_row in stock_rows],
             }
 
-            logger.error('Can not read the recordset: {}, because is not stored on table: {}'.format(store_code,
-                                                                                                     store_table))
+        close_cursor(cursor)
+
+    except SQLAlchemyError as error:
+        rollback_transaction(conn)
+        logger.exception('An exception occurred while execute transaction: %s', error)
+        raise SQLAlchemyError(
+            "A SQL Exception {} occurred while transacting with the database on table {}.".format(error,
+                                                                                                  reservation_table)
+        )
+    finally:
+        disconnect_from_db(conn)
+
+    logger.info('Stock reservation %s: %s', reservation_status, '{}, Status: {}'.format(
+        reservation_id, stock_reservation["ReservationStatus"] if stock_reservation else 'not found'))
+
+    return stock_reservation
+
+
+def expire_stock_reservations(batch_size=None):
+    r"""
+    Expire the reservations held past their expiration and release their units, a batch per transaction.
+
+    The product rows of the expired lines are locked first, in SQL_STOCK_LOCK_ORDER, and then the lines,
+    as finish_stock_reservation does. Both locks are taken with SKIP LOCKED, so the sweeps of several
+    workers run in parallel without waiting for each other (nor for a checkout on the same products);
+    the lines skipped are expired by a later sweep.
+
+    :param batch_size: Lines per transaction, STOCK_RESERVATION.SWEEP_BATCH_SIZE by default.
+    :return lines_expired: Number of reservation lines expired.
+    """
+
+    cfg = Util.get_config_constant_file()
+
+    product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+    reservation_table = cfg['DB_OBJECTS']['STOCK_RESERVATION_TABLE']
+
+    batch_size = batch_size or int(cfg['STOCK_RESERVATION']['SWEEP_BATCH_SIZE'])
+
+    lines_expired = 0
+
+    sql_select_expired = " SELECT reservation_id, product_sku, product_store_id " \
+                         " FROM   {} " \
+                         " WHERE  reservation_status = 'held' " \
+                         " AND    expires_at <= now() " \
+                         " ORDER BY expires_at " \
+                         " LIMIT  %s".format(reservation_table)
+
+    sql_lock_expired = " SELECT prod.product_sku, prod.product_store_id " \
+                       " FROM   {} prod " \
+                       " WHERE  (prod.product_sku, prod.product_store_id) IN (" \
+                       "        SELECT * FROM unnest(%s::varchar[], %s::uuid[])) " \
+                       " ORDER BY {} " \
+                       " FOR UPDATE OF prod SKIP LOCKED".format(product_table, SQL_STOCK_LOCK_ORDER)
+
+    # The status and expiration are checked again, a line can be finished after it was selected
+    sql_claim_expired = " SELECT res.reservation_id, res.product_sku, res.product_store_id " \
+                        " FROM   {} res " \
+                        " JOIN   unnest(%s::uuid[], %s::varchar[], %s::uuid[]) " \
+                        "        AS expired_line (reservation_id, product_sku, product_store_id) " \
+                        "        ON  res.reservation_id = expired_line.reservation_id " \
+                        "        AND res.product_sku = expired_line.product_sku " \
+                        "        AND res.product_store_id = expired_line.product_store_id " \
+                        " WHERE  res.reservation_status = 'held' " \
+                        " AND    res.expires_at <= now() " \
+                        " FOR UPDATE OF res SKIP LOCKED".format(reservation_table)
+
+    sql_expire_lines = " WITH expired AS (" \
+                       "   UPDATE {} res " \
+                       "   SET    reservation_status = 'expired', " \
+                       "          last_update_date = now() " \
+                       "   FROM   unnest(%s::uuid[], %s::varchar[], %s::uuid[]) " \
+                       "          AS expired_line (reservation_id, product_sku, product_store_id) " \
+                       "   WHERE  res.reservation_id = expired_line.reservation_id " \
+                       "   AND    res.product_sku = expired_line.product_sku " \
+                       "   AND    res.product_store_id = expired_line.product_store_id " \
+                       "   RETURNING res.product_sku, res.product_store_id, res.quantity), " \
+                       " released AS (" \
+                       "   SELECT product_sku, product_store_id, SUM(quantity) AS quantity " \
+                       "   FROM   expired " \
+                       "   GROUP BY product_sku, product_store_id) " \
+                       " UPDATE {} prod " \
+                       " SET    product_reserved_stock = GREATEST(prod.product_reserved_stock - released.quantity, 0), " \
+                       "        last_update_date = now() " \
+                       " FROM   released " \
+                       " WHERE  prod.product_sku = released.product_sku " \
+                       " AND    prod.product_store_id = released.product_store_id".format(reservation_table,
+                                                                                         product_table)
+
+    while True:
+        conn = None
+        cursor = None
+
+        try:
+            conn = session_to_db()
+
+            cursor = create_cursor(conn)
+
+            cursor.execute(sql_select_expired, (batch_size,))
+
+            candidate_lines = cursor.fetchall()
+
+            expired_lines = []
+
+            if candidate_lines:
+                cursor.execute(sql_lock_expired, ([line['product_sku'] for line in candidate_lines],
+                                                  [line['product_store_id'] for line in candidate_lines],))
+
+                stock_locked = {(stock_row['product_sku'], stock_row['product_store_id']) for stock_row in cursor}
+
+                candidate_lines = [line for line in candidate_lines
+                                   if (line['product_sku'], line['product_store_id']) in stock_locked]
+
+            if candidate_lines:
+                cursor.execute(sql_claim_expired, ([line['reservation_id'] for line in candidate_lines],
+                                                   [line['product_sku'] for line in candidate_lines],
+                                                   [line['product_store_id'] for line in candidate_lines],))
+
+                expired_lines = cursor.fetchall()
+
+            if expired_lines:
+                reservation_ids = [line['reservation_id'] for line in expired_lines]
+                product_skus = [line['product_sku'] for line in expired_lines]
+                store_ids = [line['product_store_id'] for line in expired_lines]
+
+                cursor.execute(sql_expire_lines, (reservation_ids, product_skus, store_ids,))
+
+                notify_cache_change(cursor, 'stock', set(product_skus))
+
+            commit_transaction(conn)
+
+            for product_sku in set(line['product_sku'] for line in expired_lines):
+                invalidate_stock_cache(product_sku)
+
+            close_cursor(cursor)
+
+        except SQLAlchemyError as error:
+            rollback_transaction(conn)
+            logger.exception('An exception occurred while execute transaction: %s', error)
             raise SQLAlchemyError(
-                "Can\'t read data because it\'s not stored in table {}. SQL Exception".format(store_table)
+                "A SQL Exception {} occurred while transacting with the database on table {}.".format(error,
+                                                                                                      reservation_table)
             )
+        finally:
+            disconnect_from_db(conn)
+
+        lines_expired += len(expired_lines)
+
+        if len(expired_lines) < batch_size:
+            break
+
+    if lines_expired:
+        logger.info('Stock reservations expired: %s lines', lines_expired)
+
+    return lines_expired
+
+
+def import_products_from_file(binary_stream, file_format):
+    r"""
+    Transaction to import a catalog of products from a CSV or NDJSON file.
+
+    The rows are streamed with COPY FROM STDIN into a temporary staging table, validated there
+    set-wise (required data, store code registered, status in PRODUCT_STATUS_CHECK_LIST, stock not
+    negative) and the valid ones are merged into the product table with one
+    INSERT ... ON CONFLICT (product_sku, product_store_id) DO UPDATE. Everything runs in the same
+    transaction, the memory used does not depend on the size of the file.
+
+    When the same product and store comes more than once, the last line wins and the previous ones
+    are rejected as superseded. A line whose stock is lower than the units reserved of the product is
+    rejected as below_reserved. A product_id that is the key of another product and store is rejected as
+    foreign_product_id, and when several lines carry the same product_id only the first one keeps it,
+    the others are rejected as duplicated_product_id.
+
+    :param binary_stream: File uploaded, opened in binary mode.
+    :param file_format: 'csv' or 'ndjson'.
+    :return products_imported: Dictionary with the rows received, inserted, updated and rejected.
+    """
+
+    cfg = Util.get_config_constant_file()
+
+    conn = None
+    cursor = None
+
+    store_table = cfg['DB_OBJECTS']['STORE_TABLE']
+    product_table = cfg['DB_OBJECTS']['PRODUCT_TABLE']
+    copy_buffer_size = int(cfg['PRODUCT_IMPORT']['COPY_BUFFER_SIZE'])
+    rejected_rows_limit = int(cfg['PRODUCT_IMPORT']['REJECTED_ROWS_LIMIT'])
+    product_status_list = list(cfg['PRODUCT_STATUS_CHECK_LIST'])
+
+    stage_table = 'product_import_stage'
+
+    sql_create_stage = " DROP TABLE IF EXISTS {0}; " \
+                       " CREATE TEMP TABLE {0} (" \
+                       "   line_no integer NOT NULL, " \
+                       "   product_id uuid, " \
+                       "   product_sku varchar, " \
+                       "   product_unspc varchar, " \
+                       "   product_brand varchar, " \
+                       "   category_id numeric, " \
+                       "   parent_category_id numeric, " \
+                       "   unit_of_measure varchar, " \
+                       "   product_stock numeric, " \
+                       "   product_store_code varchar, " \
+                       "   product_name varchar, " \
+                       "   product_title varchar, " \
+                       "   product_long_description varchar, " \
+                       "   product_photo varchar, " \
+                       "   product_price numeric, " \
+                       "   product_tax numeric, " \
+                       "   product_currency varchar, " \
+                       "   product_status varchar, " \
+                       "   product_published boolean, " \
+                       "   product_manage_stock boolean, " \
+                       "   product_length numeric, " \
+                       "   product_width numeric, " \
+                       "   product_height numeric, " \
+                       "   product_weight numeric, " \
+                       "   product_store_id uuid, " \
+                       "   reject_reason varchar) ON COMMIT DROP".format(stage_table)
+
+    sql_copy_stage = "COPY {} (line_no, {}) FROM STDIN".format(stage_table, ', '.join(IMPORT_PRODUCT_COLUMNS))
+
+    sql_resolve_store = " UPDATE {} stage " \
+                        " SET    product_store_id = store.id_store " \
+                        " FROM   {} store " \
+                        " WHERE  store.store_code = stage.product_store_code".format(stage_table, store_table)
+
+    sql_validate_stage = " UPDATE {} " \
+                         " SET reject_reason = CASE " \
+                         "   WHEN product_id IS NULL OR product_sku IS NULL OR product_store_code IS NULL " \
+                         "        OR product_name IS NULL OR product_title IS NULL OR product_stock IS NULL " \
+                         "        OR product_price IS NULL OR product_tax IS NULL THEN 'missing_required' " \
+                         "   WHEN product_store_id IS NULL THEN 'unknown_store' " \
+                         "   WHEN COALESCE(product_status, 'Activo') <> ALL(%s) THEN 'invalid_status' " \
+                         "   WHEN product_stock < 0 THEN 'invalid_stock' " \
+                         " END".format(stage_table)
+
+    sql_supersede_stage = " UPDATE {0} stage " \
+                          " SET    reject_reason = 'superseded' " \
+                          " FROM  (SELECT line_no, " \
+                          "               row_number() OVER (PARTITION BY product_sku, product_store_id " \
+                          "                                  ORDER BY line_no DESC) AS line_rank " \
+                          "        FROM   {0} " \
+                          "        WHERE  reject_reason IS NULL) duplicated " \
+                          " WHERE  duplicated.line_no = stage.line_no " \
+                          " AND    duplicated.line_rank > 1".format(stage_table)
+
+    # A product_id that is already the key of another product and store can not be inserted again
+    sql_foreign_id_stage = " UPDATE {} stage " \
+                           " SET    reject_reason = 'foreign_product_id' " \
+                           " FROM   {} prod " \
+                           " WHERE  prod.product_id = stage.product_id " \
+                           " AND   (prod.product_sku <> stage.product_sku " \
+                           "        OR prod.product_store_id <> stage.product_store_id) " \
+                           " AND    stage.reject_reason IS NULL".format(stage_table, product_table)
+
+    # The same product_id in lines of different products or stores: the first line keeps it
+    sql_duplicated_id_stage = " UPDATE {0} stage " \
+                              " SET    reject_reason = 'duplicated_product_id' " \
+                              " FROM  (SELECT line_no, " \
+                              "               row_number() OVER (PARTITION BY product_id " \
+                              "                                  ORDER BY line_no) AS line_rank " \
+                              "        FROM   {0} " \
+                              "        WHERE  reject_reason IS NULL) duplicated " \
+                              " WHERE  duplicated.line_no = stage.line_no " \
+                              " AND    duplicated.line_rank > 1".format(stage_table)
+
+    # The stock of a product with reservations can not go under the units reserved (V007)
+    sql_reserved_stage = " UPDATE {} stage " \
+                         " SET    reject_reason = 'below_reserved' " \
+                         " FROM   {} prod " \
+                         " WHERE  prod.product_sku = stage.product_sku " \
+                         " AND    prod.product_store_id = stage.product_store_id " \
+                         " AND    prod.product_reserved_stock > 0 " \
+                         " AND    stage.product_stock < prod.product_reserved_stock " \
+                         " AND    stage.reject_reason IS NULL".format(stage_table, product_table)
+
+    sql_rejected_stage = " SELECT line_no, product_sku, product_store_code, reject_reason, " \
+                         "        count(*) OVER () AS rows_rejected " \
+                         " FROM   {} " \
+                         " WHERE  reject_reason IS NOT NULL " \
+                         " ORDER BY line_no " \
+                         " LIMIT %s".format(stage_table)
+
+    sql_merge_stage = " WITH merged AS (" \
+                      "   INSERT INTO {0} " \
+                      "       (product_id, product_sku, product_unspc, product_brand, category_id, " \
+                      "        parent_category_id, unit_of_measure, product_stock, product_store_id, " \
+                      "        product_name, product_title, product_long_description, product_photo, " \
+                      "        product_price, product_tax, product_currency, product_status, product_published, " \
+                      "        product_manage_stock, product_length, product_width, product_height, " \
+                      "        product_weight, creation_date, last_update_date) " \
+                      "   SELECT product_id, product_sku, product_unspc, product_brand, category_id, " \
+                      "          parent_category_id, unit_of_measure, product_stock, product_store_id, " \
+                      "          product_name, product_title, product_long_description, product_photo, " \
+                      "          product_price, product_tax, COALESCE(product_currency, 'MX'), " \
+                      "          COALESCE(product_status, 'Activo'), COALESCE(product_published, true), " \
+                      "          COALESCE(product_manage_stock, true), product_length, product_width, " \
+                      "          product_height, product_weight, now(), now() " \
+                      "   FROM   {1} " \
+                      "   WHERE  reject_reason IS NULL " \
+                      "   ON CONFLICT (product_sku, product_store_id) DO UPDATE " \
+                      "   SET product_unspc=EXCLUDED.product_unspc, " \
+                      "       product_brand=EXCLUDED.product_brand, " \
+                      "       category_id=EXCLUDED.category_id, " \
+                      "       parent_category_id=EXCLUDED.parent_category_id, " \
+                      "       unit_of_measure=EXCLUDED.unit_of_measure, " \
+                      "       product_stock=EXCLUDED.product_stock, " \
+                      "       product_name=EXCLUDED.product_name, " \
+                      "       product_title=EXCLUDED.product_title, " \
+                      "       product_long_description=EXCLUDED.product_long_description, " \
+                      "       product_photo=EXCLUDED.product_photo, " \
+                      "       product_price=EXCLUDED.product_price, " \
+                      "       product_tax=EXCLUDED.product_tax, " \
+                      "       product_currency=EXCLUDED.product_currency, " \
+                      "       product_status=EXCLUDED.product_status, " \
+                      "       product_published=EXCLUDED.product_published, " \
+                      "       product_manage_stock=EXCLUDED.product_manage_stock, " \
+                      "       product_length=EXCLUDED.product_length, " \
+                      "       product_width=EXCLUDED.product_width, " \
+                      "       product_height=EXCLUDED.product_height, " \
+                      "       product_weight=EXCLUDED.product_weight, " \
+                      "       last_update_date=now() " \
+                      "   RETURNING (xmax = 0) AS inserted) " \
+                      " SELECT count(*) FILTER (WHERE inserted) AS rows_inserted, " \
+                      "        count(*) FILTER (WHERE NOT inserted) AS rows_updated " \
+                      " FROM merged".format(product_table, stage_table)
+
+    started_at = time.perf_counter()
+
+    try:
+        conn = session_to_db()
+
+        cursor = create_cursor(conn)
+
+        cursor.execute(sql_create_stage)
+
+        copy_stream = CopyRowsStream(read_import_rows(binary_stream, file_format))
+
+        cursor.copy_expert(sql_copy_stage, copy_stream, size=copy_buffer_size)
+
+        cursor.execute("ANALYZE {}".format(stage_table))
+
+        cursor.execute(sql_resolve_store)
+        cursor.execute(sql_validate_stage, (product_status_list,))
+        cursor.execute(sql_supersede_stage)
+        cursor.execute(sql_foreign_id_stage)
+        cursor.execute(sql_duplicated_id_stage)
+        cursor.execute(sql_reserved_stage)
+
+        cursor.execute(sql_rejected_stage, (rejected_rows_limit,))
+
+        rejected_rows = cursor.fetchall()
+
+        cursor.execute(sql_merge_stage)
 
+        merge_row = cursor.fetchone()
+
+        notify_cache_change(cursor, 'stock')
+
+        commit_transaction(conn)
+
+        invalidate_stock_cache()
+
+        close_cursor(cursor)
+
+    except (ValueError, psycopg2.DataError, psycopg2.IntegrityError) as error:
+        rollback_transaction(conn)
+        logger.error('The import file can not be loaded: %s', error)
+        raise mvc_exc.DatabaseError('The import file can not be loaded: {}'.format(error))
     except SQLAlchemyError as error:
-        conn.rollback()
+        rollback_transaction(conn)
         logger.exception('An exception occurred while execute transaction: %s', error)
         raise SQLAlchemyError(
             "A SQL Exception {} occurred while transacting with the database on table {}.".format(error, product_table)
@@ -1743,12 +3737,35 @@ def update_product_store_stock(stock, product_sku, store_code):
     finally:
         disconnect_from_db(conn)
 
-    return json.dumps(product_stock_updated)
+    elapsed_seconds = time.perf_counter() - started_at
+
+    products_imported = {
+        "RowsReceived": copy_stream.rows_read,
+        "RowsInserted": merge_row['rows_inserted'],
+        "RowsUpdated": merge_row['rows_updated'],
+        "RowsRejected": rejected_rows[0]['rows_rejected'] if rejected_rows else 0,
+        "ElapsedSeconds": round(elapsed_seconds, 6),
+        "RowsPerSecond": round(copy_stream.rows_read / elapsed_seconds, 2) if elapsed_seconds else None,
+        "Rejected": [{
+            "LineNumber": rejected_row['line_no'],
+            "ProductSku": rejected_row['product_sku'],
+            "StoreCode": rejected_row['product_store_code'],
+            "Reason": rejected_row['reject_reason'],
+        } for rejected_row in rejected_rows],
+    }
+
+    logger.info('Products imported: %s', 'Received: {}, Inserted: {}, Updated: {}, Rejected: {}'.format(
+        products_imported["RowsReceived"], products_imported["RowsInserted"],
+        products_imported["RowsUpdated"], products_imported["RowsRejected"]))
+
+    return products_imported
 
 
 def select_store_id(store_code):
     r"""
     Get the store identifier of a Store registered.
+    The identifier is served from the in-process cache when it is there, only a miss reads the
+    database and caches the result.
 
     :param store_code: Code store to find the Id.
     :return store_id_by_code: Id of the store by his code.
@@ -1763,37 +3780,46 @@ def select_store_id(store_code):
 
     store_table = cfg['DB_OBJECTS']['STORE_TABLE']
 
+    if not Util.validate_store_code_syntax(store_code):
+        logger.error('Can not read the recordset: {}, because the store code is not valid: {}'.format(store_code,
+                                                                                                      store_table))
+        raise mvc_exc.ItemNotStored(
+            'Can\'t read "{}" because it\'s not stored in table "{}. SQL Exception"'.format(
+                store_code, store_table
+            )
+        )
+
+    store_id_by_code = store_id_cache.get(store_code)
+
+    if store_id_by_code is not MISSING:
+        return store_id_by_code
+
     try:
         conn = session_to_db()
 
         cursor = create_cursor(conn)
 
-        if not Util.validate_store_code_syntax(store_code):
-            logger.error('Can not read the recordset: {}, because the store code is not valid: {}'.format(store_code,
-                                                                                                          store_table))
-            raise mvc_exc.ItemNotStored(
-                'Can\'t read "{}" because it\'s not stored in table "{}. SQL Exception"'.format(
-                    store_code, store_table
-                )
-            )
-
         sql_store_id = "SELECT id_store FROM {} WHERE store_code  = %s".format(store_table)
 
         cursor.execute(sql_store_id, (store_code,))
 
-        store_id_by_code = cursor.fetchone()[0]
+        store_row = cursor.fetchone()
 
-        if store_id_by_code is None:
+        if store_row is None:
             logger.error('Can not read the recordset: {}, '
                          'because is not stored on table: {}'.format(store_code, store_table))
             raise SQLAlchemyError(
                 "Can\'t read data because it\'s not stored in table {}. SQL Exception".format(store_table)
             )
 
+        store_id_by_code = store_row[0]
+
+        store_id_cache.set(store_code, store_id_by_code)
+
         close_cursor(cursor)
 
     except SQLAlchemyError as error:
-        conn.rollback()
+        rollback_transaction(conn)
         logger.exception('An exception occurred while execute transaction: %s', error)
         raise SQLAlchemyError(
             "A SQL Exception {} occurred while transacting with the database on table {}.".format(error,
@@ -1805,6 +3831,52 @@ def select_store_id(store_code):
     return store_id_by_code
 
 
+def warm_store_id_cache():
+    r"""
+    Load the identifiers of the stores registered into the in-process cache, up to its size.
+
+    :return stores_cached: Number of stores cached.
+    """
+
+    cfg = Util.get_config_constant_file()
+
+    conn = None
+    cursor = None
+
+    stores_cached = 0
+
+    store_table = cfg['DB_OBJECTS']['STORE_TABLE']
+
+    try:
+        conn = session_to_db()
+
+        cursor = create_cursor(conn)
+
+        sql_store_ids = "SELECT store_code, id_store FROM {} ORDER BY last_update_date DESC LIMIT %s".format(store_table)
+
+        cursor.execute(sql_store_ids, (store_id_cache.max_size,))
+
+        for store_row in cursor:
+            store_id_cache.set(store_row['store_code'], store_row['id_store'])
+            stores_cached += 1
+
+        close_cursor(cursor)
+
+    except SQLAlchemyError as error:
+        rollback_transaction(conn)
+        logger.exception('An exception occurred while execute transaction: %s', error)
+        raise SQLAlchemyError(
+            "A SQL Exception {} occurred while transacting with the database on table {}.".format(error,
+                                                                                                  store_table)
+        )
+    finally:
+        disconnect_from_db(conn)
+
+    logger.info('Store id cache warmed: %s stores', stores_cached)
+
+    return stores_cached
+
+
 def select_product_id(product_sku, product_store_id):
     r"""
     Get the product identifier of a Product registered.
@@ -1844,7 +3916,7 @@ def select_product_id(product_sku, product_store_id):
         close_cursor(cursor)
 
     except SQLAlchemyError as error:
-        conn.rollback()
+        rollback_transaction(conn)
         logger.exception('An exception occurred while execute transaction: %s', error)
         raise SQLAlchemyError(
             "A SQL Exception {} occurred while transacting with the database on table {}.".format(error,
@@ -1918,9 +3990,9 @@ def validate_user_exists(user_name):
 
     table_name = cfg['DB_AUTH_OBJECT']['USERS_AUTH']
 
-    sql_check = "SELECT EXISTS(SELECT 1 FROM {} WHERE username = {} LIMIT 1)".format(table_name, "'" + user_name + "'")
+    sql_check = "SELECT EXISTS(SELECT 1 FROM {} WHERE username = %s LIMIT 1)".format(table_name)
 
-    cursor.execute(sql_check)
+    cursor.execute(sql_check, (user_name,))
 
     result = cursor.fetchone()
 
@@ -1945,18 +4017,16 @@ def update_user_password_hashed(user_name, password_hash):
 
     cursor = create_cursor(conn)
 
-    last_update_date = get_datenow_from_db()
-
     table_name = cfg['DB_AUTH_OBJECT']['USERS_AUTH']
 
     # update row to database
-    sql_update_user = "UPDATE {} SET password_hash = %s, last_update_date = %s WHERE username = %s".format(
+    sql_update_user = "UPDATE {} SET password_hash = %s, last_update_date = now() WHERE username = %s".format(
         table_name
     )
 
-    cursor.execute(sql_update_user, (password_hash, last_update_date, user_name,))
+    cursor.execute(sql_update_user, (password_hash, user_name,))
 
-    conn.commit()
+    commit_transaction(conn)
 
     close_cursor(cursor)
     disconnect_from_db(conn)
@@ -1978,18 +4048,17 @@ def insert_user_authenticated(user_id, user_name, user_password, password_hash):
 
     cursor = create_cursor(conn)
 
-    last_update_date = get_datenow_from_db()
-
     table_name = cfg['DB_AUTH_OBJECT']['USERS_AUTH']
 
     data = (user_id, user_name, user_password, password_hash,)
 
-    sql_user_insert = 'INSERT INTO {} (user_id, username, password, password_hash) ' \
-                      'VALUES (%s, %s, %s, %s)'.format(table_name)
+    sql_user_insert = 'INSERT INTO {} ' \
+                      '(user_id, username, password, password_hash, creation_date, last_update_date) ' \
+                      'VALUES (%s, %s, %s, %s, now(), now())'.format(table_name)
 
     cursor.execute(sql_user_insert, data)
 
-    conn.commit()
+    commit_transaction(conn)
 
     logger.info('Usuario insertado %s', "{0}, User_Name: {1}".format(user_id, user_name))
 
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+
+Query plan check of the statements of database_backend.py.
+
+Reads the SQL statements of the module (the sql_* variables of every function, with the table and
+column names taken from the constants file), asks Postgres for their plan and fails if one of them
+reads a large table (QUERY_PLAN_CHECK.LARGE_TABLES) with a sequential scan.
+
+Documentation:
+    - Usage: python -m db_controller.query_plan_check (exit status 1 when a statement fails).
+    - Run it against a database with the migrations applied; it does not need data: the plans are
+      generic (plan_cache_mode = force_generic_plan) and the sequential scans are disabled, so a Seq
+      Scan left on the plan means there is no index the statement can use.
+    - Nothing is written: the statements are only explained, in a transaction that is rolled back.
+    - Statements built from values known only at run time (e.g. execute_values) are reported as skipped.
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A19.1 ($Rev: 1 $)"
+
+import ast
+import os
+import re
+import sys
+
+from db_controller.connection_pool import get_connection_pool
+from utilities.Utility import Utility as Util
+from utilities.product_import import IMPORT_PRODUCT_COLUMNS
+from logger_controller.logger_control import *
+
+logger = configure_db_logger()
+
+BACKEND_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database_backend.py')
+
+_explainable_regex = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE|INSERT)\b", re.I)
+_temp_table_regex = re.compile(r"\bCREATE\s+TEMP(ORARY)?\s+TABLE\b", re.I)
+_eval_builtins = {'str': str, 'int': int, 'len': len, 'list': list, 'tuple': tuple}
+
+
+def collect_statements(cfg, source_file=BACKEND_FILE):
+    r"""
+    Get the SQL statements assigned to sql_* variables in the functions of a module.
+
+    The assignments of each function are evaluated in source order with the module constants, the
+    default values of the parameters and the values read from cfg; a "+=" on a statement gives a new
+    variant of it.
+
+    :param cfg: Constants (Util.get_config_constant_file()).
+    :param source_file: Path of the module.
+    :return statements: List of tuples (function, variable, line, sql); sql is None when it can not be resolved.
+    """
+
+    with open(source_file, 'r') as backend_file:
+        tree = ast.parse(backend_file.read(), filename=source_file)
+
+    module_namespace = {'IMPORT_PRODUCT_COLUMNS': IMPORT_PRODUCT_COLUMNS}
+
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and _assigned_name(node).isupper():
+            module_namespace[_assigned_name(node)] = _evaluate(node.value, module_namespace)
+
+    statements = []
+
+    for function in ast.walk(tree):
+        if not isinstance(function, ast.FunctionDef):
+            continue
+
+        namespace = dict(module_namespace, cfg=cfg)
+
+        # The parameters with a default value (e.g. a mode) take it
+        arguments = function.args.args[len(function.args.args) - len(function.args.defaults):]
+
+        for argument, default_value in zip(arguments, function.args.defaults):
+            namespace[argument.arg] = _evaluate(default_value, module_namespace)
+
+        assignments = [node for node in ast.walk(function) if isinstance(node, (ast.Assign, ast.AugAssign))]
+
+        for node in sorted(assignments, key=lambda assignment: assignment.lineno):
+            name = _assigned_name(node)
+
+            if not name or name == 'cfg':
+                continue
+
+            if isinstance(node, ast.AugAssign):
+                value = _evaluate(ast.BinOp(left=ast.Name(id=name, ctx=ast.Load()), op=node.op, right=node.value),
+                                  namespace)
+            else:
+                value = _evaluate(node.value, namespace)
+
+            if value is not None:
+                namespace[name] = value
+            else:
+                namespace.pop(name, None)
+
+            if name.startswith('sql_'):
+                statements.append((function.name, name, node.lineno, value if isinstance(value, str) else None))
+
+    return statements
+
+
+def _assigned_name(node):
+    targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+
+    if len(targets) == 1 and isinstance(targets[0], ast.Name):
+        return targets[0].id
+
+    return ''
+
+
+def _evaluate(expression_node, namespace):
+    expression = ast.fix_missing_locations(ast.Expression(body=expression_node))
+
+    try:
+        return eval(compile(expression, '<sql>', 'eval'), {'__builtins__': _eval_builtins}, dict(namespace))
+    except Exception:
+        return None
+
+
+def to_prepared_statement(sql):
+    r"""
+    Convert the psycopg2 placeholders (%s) of a statement to positional parameters ($1, $2, ...).
+
+    :param sql: SQL statement with psycopg2 placeholders.
+    :return prepared: Tuple (statement, number of parameters).
+    """
+
+    parameters = 0
+    parts = re.split(r"(%s|%%)", sql)
+
+    for index, part in enumerate(parts):
+        if part == '%s':
+            parameters += 1
+            parts[index] = '${}'.format(parameters)
+        elif part == '%%':
+            parts[index] = '%'
+
+    return ''.join(parts), parameters
+
+
+def find_seq_scans(plan, large_tables):
+    r"""
+    Get the large tables read with a sequential scan in a plan.
+
+    :param plan: Plan node (EXPLAIN (FORMAT JSON) output, parsed).
+    :param large_tables: Names of the tables that must not be scanned.
+    :return tables: List of the tables scanned, in plan order.
+    """
+
+    tables = []
+
+    if isinstance(plan, list):
+        for node in plan:
+            tables.extend(find_seq_scans(node, large_tables))
+        return tables
+
+    if 'Plan' in plan:
+        return find_seq_scans(plan['Plan'], large_tables)
+
+    if plan.get('Node Type') == 'Seq Scan' and plan.get('Relation Name') in large_tables:
+        tables.append(plan['Relation Name'])
+
+    for child_plan in plan.get('Plans', []):
+        tables.extend(find_seq_scans(child_plan, large_tables))
+
+    return tables
+
+
+def check_query_plans(statements=None):
+    r"""
+    Explain the statements of database_backend.py and look for sequential scans on the large tables.
+
+    :param statements: Statements to check, collect_statements() by default.
+    :return results: List of tuples (function, variable, line, status, detail); status is ok, seq_scan,
+        error or skipped.
+    """
+
+    cfg = Util.get_config_constant_file()
+
+    large_tables = set(cfg['QUERY_PLAN_CHECK']['LARGE_TABLES'])
+
+    if statements is None:
+        statements = collect_statements(cfg)
+
+    results = []
+
+    pool_obj = get_connection_pool()
+    conn = pool_obj.getconn()
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL plan_cache_mode = force_generic_plan")
+
+            # The temporary tables (import staging) are created first, the statements that read them
+            # are explained after
+            for function_name, variable, line, sql in statements:
+                if sql and _temp_table_regex.search(sql):
+                    cursor.execute(sql)
+
+            for function_name, variable, line, sql in statements:
+                results.append((function_name, variable, line) + _check_statement(cursor, sql, large_tables))
+
+    finally:
+        conn.rollback()
+        pool_obj.putconn(conn)
+
+    return results
+
+
+def _check_statement(cursor, sql, large_tables):
+    if sql is None:
+        return 'skipped', 'not resolved from the source'
+
+    if not _explainable_regex.match(sql) or re.search(r"VALUES\s+%s", sql):
+        return 'skipped', 'not explainable'
+
+    prepared_sql, parameters = to_prepared_statement(sql)
+
+    cursor.execute("SAVEPOINT plan_check")
+
+    try:
+        cursor.execute("PREPARE plan_check AS {}".format(prepared_sql))
+        cursor.execute("EXPLAIN (FORMAT JSON) EXECUTE plan_check ({})".format(
+            ', '.join(['NULL'] * parameters)) if parameters else "EXPLAIN (FORMAT JSON) EXECUTE plan_check")
+
+        plan = cursor.fetchone()[0]
+
+        cursor.execute("DEALLOCATE plan_check")
+        cursor.execute("RELEASE SAVEPOINT plan_check")
+
+    except Exception as error:
+        cursor.execute("ROLLBACK TO SAVEPOINT plan_check")
+        # A prepared statement is not undone by the rollback
+        cursor.execute("DEALLOCATE ALL")
+        return 'error', str(error).strip()
+
+    tables_scanned = find_seq_scans(plan, large_tables)
+
+    if tables_scanned:
+        return 'seq_scan', ', '.join(tables_scanned)
+
+    return 'ok', ''
+
+
+if __name__ == "__main__":
+    plan_results = check_query_plans()
+
+    for result in plan_results:
+        logger.info('%s.%s (line %s): %s %s', *result)
+
+    failed = [result for result in plan_results if result[3] in ('seq_scan', 'error')]
+
+    logger.info('Query plans checked: %s, failed: %s', len(plan_results), len(failed))
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+
+Versioned schema migrations.
+
+Applies, in order, the SQL files of the migrations directory that are not registered yet on the
+schema_migration_api table.
+
+Documentation:
+    - Files are named V<version>__<description>.sql, e.g. V001__store_product_upsert_keys.sql.
+    - Each file runs in its own transaction, unless its first line is "-- migration: no-transaction"
+      (needed by CREATE INDEX CONCURRENTLY); then every statement, split by ";" at the end of a
+      line, runs in autocommit mode.
+    - Usage: python -m db_controller.schema_migrations
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A19.1 ($Rev: 1 $)"
+
+import os
+import re
+
+from db_controller.connection_pool import get_connection_pool
+from logger_controller.logger_control import *
+
+logger = configure_db_logger()
+
+MIGRATIONS_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+MIGRATIONS_TABLE = 'schema_migration_api'
+NO_TRANSACTION_MARK = '-- migration: no-transaction'
+
+_migration_file_regex = re.compile(r"^V(\d+)__(\w+)\.sql$")
+
+
+def list_migrations(directory=MIGRATIONS_DIRECTORY):
+    r"""
+    Get the migration files of the directory sorted by version.
+
+    :param directory: Path of the migrations directory.
+    :return migrations: List of tuples (version, description, path).
+    """
+
+    migrations = []
+
+    for file_name in os.listdir(directory):
+        match_file = _migration_file_regex.match(file_name)
+
+        if match_file:
+            migrations.append((match_file.group(1), match_file.group(2), os.path.join(directory, file_name)))
+
+    return sorted(migrations, key=lambda migration: int(migration[0]))
+
+
+def split_statements(sql_script):
+    r"""
+    Split a SQL script on the ";" that close a line.
+
+    :param sql_script: Content of a migration file.
+    :return statements: List of SQL statements.
+    """
+
+    statements = re.split(r";\s*$", sql_script, flags=re.M)
+
+    return [statement.strip() for statement in statements if _strip_comments(statement).strip()]
+
+
+def _strip_comments(sql_text):
+    return re.sub(r"--.*$", "", sql_text, flags=re.M)
+
+
+def apply_pending_migrations(directory=MIGRATIONS_DIRECTORY):
+    r"""
+    Apply the migrations not registered yet.
+
+    :param directory: Path of the migrations directory.
+    :return applied: List of the versions applied.
+    """
+
+    applied = []
+
+    pool_obj = get_connection_pool()
+    conn = pool_obj.getconn()
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("CREATE TABLE IF NOT EXISTS {} ("
+                           " version varchar NOT NULL PRIMARY KEY,"
+                           " description varchar NOT NULL,"
+                           " applied_date timestamp(0) NOT NULL DEFAULT now())".format(MIGRATIONS_TABLE))
+            cursor.execute("SELECT version FROM {}".format(MIGRATIONS_TABLE))
+            registered = {row[0] for row in cursor.fetchall()}
+        conn.commit()
+
+        for version, description, path in list_migrations(directory):
+            if version in registered:
+                continue
+
+            with open(path, 'r') as sql_file:
+                sql_script = sql_file.read()
+
+            logger.info('Applying migration V%s: %s', version, description)
+
+            if sql_script.lstrip().startswith(NO_TRANSACTION_MARK):
+                _apply_without_transaction(conn, sql_script)
+            else:
+                with conn.cursor() as cursor:
+                    cursor.execute(sql_script)
+
+            with conn.cursor() as cursor:
+                cursor.execute("INSERT INTO {} (version, description) VALUES (%s, %s)".format(MIGRATIONS_TABLE),
+                               (version, description,))
+            conn.commit()
+
+            applied.append(version)
+
+    except Exception as error:
+        conn.rollback()
+        logger.exception('Migration failed, the schema is kept on the last version applied: %s', error)
+        raise
+    finally:
+        conn.autocommit = False
+        pool_obj.putconn(conn)
+
+    return applied
+
+
+def _apply_without_transaction(conn, sql_script):
+    conn.autocommit = True
+
+    try:
+        with conn.cursor() as cursor:
+            for statement in split_statements(sql_script):
+                cursor.execute(statement)
+    finally:
+        conn.autocommit = False
+
+
+if __name__ == "__main__":
+    versions_applied = apply_pending_migrations()
+
+    logger.info('Migrations applied: %s', versions_applied or 'none, the schema is up to date')
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+
+Stock summary per SKU maintenance.
+
+The product_stock_summary table (migration V002) is kept up to date by triggers on product_api and
+store_api; this module rebuilds it from scratch, for recovery after a restore, a bulk load made
+with the triggers disabled, or any doubt about its content.
+
+Documentation:
+    - Usage: python -m db_controller.stock_summary
+    - The rebuild locks the summary table (the stock writes wait for it) and recomputes every SKU in
+      one transaction.
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A19.1 ($Rev: 1 $)"
+
+from db_controller.connection_pool import get_connection_pool
+from logger_controller.logger_control import *
+
+logger = configure_db_logger()
+
+
+def rebuild_stock_summary():
+    r"""
+    Recompute the stock summary of all the SKUs.
+
+    :return skus_summarized: Number of SKUs in the summary.
+    """
+
+    pool_obj = get_connection_pool()
+    conn = pool_obj.getconn()
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT product_stock_summary_rebuild()")
+            skus_summarized = cursor.fetchone()[0]
+        conn.commit()
+
+    except Exception as error:
+        conn.rollback()
+        logger.exception('Stock summary rebuild failed, the summary is kept as it was: %s', error)
+        raise
+    finally:
+        pool_obj.putconn(conn)
+
+    return skus_summarized
+
+
+if __name__ == "__main__":
+    skus_rebuilt = rebuild_stock_summary()
+
+    logger.info('Stock summary rebuilt: %s SKUs', skus_rebuilt)
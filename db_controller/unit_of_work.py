@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+
+Unit of work: one connection and one transaction per API call.
+
+While a unit of work is active on the current thread, session_to_db returns always the same
+connection, the commits of every backend function are deferred and the whole transaction is
+committed once when the unit of work ends.
+
+Documentation:
+    - Flask: begin_unit_of_work on before_request, commit_unit_of_work on after_request and
+      end_unit_of_work on teardown_request.
+    - Scripts or explicit use:
+
+        with UnitOfWork():
+            insert_new_store(store_dict)
+            update_product_store_stock(stock, product_sku, store_code)
+
+    - run_after_commit registers the work that must only happen once the data is committed, like
+      updating the in-process caches; it is discarded on rollback unless on_rollback is set (cache
+      invalidations, since a read of the same transaction could have cached uncommitted data).
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A19.1 ($Rev: 1 $)"
+
+import threading
+
+from db_controller.connection_pool import get_connection_pool
+from logger_controller.logger_control import *
+
+logger = configure_db_logger()
+
+_local = threading.local()
+
+
+class UnitOfWork:
+    r"""
+    Holds the connection and the transaction shared by all the backend calls of an API request.
+
+    The connection is checked out lazily from the pool, so a request that never touches the
+    database never holds a connection. Entering a unit of work while another one is active on
+    the same thread joins the outer one.
+    """
+
+    def __init__(self):
+        self.conn = None
+        self._outer = None
+        self._after_commit = []
+
+    def connection(self):
+        r"""
+        Get the connection of the unit of work, checking it out of the pool on first use.
+
+        :return conn: Connection shared by the unit of work.
+        """
+
+        if self.conn is None:
+            self.conn = get_connection_pool().getconn()
+
+        return self.conn
+
+    def owns(self, conn):
+        return conn is not None and conn is self.conn
+
+    def after_commit(self, callback, on_rollback=False):
+        self._after_commit.append((callback, on_rollback))
+
+    def commit(self):
+        if self.conn is not None:
+            self.conn.commit()
+
+        self._run_callbacks(rolled_back=False)
+
+    def rollback(self):
+        if self.conn is not None and not self.conn.closed:
+            self.conn.rollback()
+
+        self._run_callbacks(rolled_back=True)
+
+    def _run_callbacks(self, rolled_back):
+        callbacks, self._after_commit = self._after_commit, []
+
+        for callback, on_rollback in callbacks:
+            if rolled_back and not on_rollback:
+                continue
+
+            try:
+                callback()
+            except Exception as error:
+                logger.exception('An after transaction callback failed, the transaction is kept: %s', error)
+
+    def close(self):
+        r"""
+        Return the connection to the pool; any transaction still open is rolled back by the pool.
+        """
+
+        conn, self.conn = self.conn, None
+
+        if conn is not None:
+            get_connection_pool().putconn(conn)
+
+    def __enter__(self):
+        self._outer = current_unit_of_work()
+
+        if self._outer is not None:
+            return self._outer
+
+        _local.unit_of_work = self
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._outer is not None:
+            self._outer = None
+            return False
+
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        finally:
+            self.close()
+            _local.unit_of_work = None
+
+        return False
+
+
+def current_unit_of_work():
+    r"""
+    Get the unit of work active on the current thread.
+
+    :return unit_of_work: UnitOfWork object or None if there is not one active.
+    """
+
+    return getattr(_local, 'unit_of_work', None)
+
+
+def run_after_commit(callback, on_rollback=False):
+    r"""
+    Run callback once the transaction of the active unit of work is committed, or right away when
+    there is not one active (the backend functions commit by themselves then).
+
+    :param callback: Function without arguments.
+    :param on_rollback: Run it also when the transaction is rolled back.
+    """
+
+    unit_of_work = current_unit_of_work()
+
+    if unit_of_work is None:
+        callback()
+    else:
+        unit_of_work.after_commit(callback, on_rollback)
+
+
+def begin_unit_of_work():
+    r"""
+    Start a unit of work bound to the current thread (the Flask request).
+
+    :return unit_of_work: UnitOfWork object started.
+    """
+
+    unit_of_work = UnitOfWork()
+
+    return unit_of_work.__enter__()
+
+
+def commit_unit_of_work():
+    r"""
+    Commit the transaction of the active unit of work, if any.
+    """
+
+    unit_of_work = current_unit_of_work()
+
+    if unit_of_work is not None:
+        unit_of_work.commit()
+
+
+def release_unit_of_work_connection():
+    r"""
+    Commit the work done so far by the active unit of work and return its connection to the pool, before
+    a response that keeps the request open (a streamed body read on a connection of its own). The unit
+    of work stays active: a later backend call checks out a connection again.
+    """
+
+    unit_of_work = current_unit_of_work()
+
+    if unit_of_work is not None:
+        unit_of_work.commit()
+        unit_of_work.close()
+
+
+def end_unit_of_work(error=None):
+    r"""
+    Finish the active unit of work: roll back what was not committed and release the connection.
+
+    :param error: Exception raised while the request was processed, if any.
+    """
+
+    unit_of_work = current_unit_of_work()
+
+    if unit_of_work is None:
+        return
+
+    try:
+        unit_of_work.rollback()
+    finally:
+        unit_of_work.close()
+        _local.unit_of_work = None
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+
+Gunicorn settings, read from the working directory by "gunicorn app:app" (Procfile).
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A19.1 ($Rev: 1 $)"
+
+
+def worker_exit(server, worker):
+    # Runs on the worker process when it stops gracefully (SIGTERM, restart, scale down), before the
+    # interpreter exits: the stock changes of the write-behind buffer are written here
+    from app import stop_background_jobs
+
+    stop_background_jobs()
@@ -14,7 +14,7 @@ import errno
 import logging
 import os
 import sys
-from constants.constants import Constants as const
+from constants.settings import get_settings
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
 
@@ -245,15 +245,11 @@ def get_config_constant_file():
         para setear datos de constantes en archivo
         configurador
 
+        El archivo se lee una sola vez por proceso (constants.settings).
+
     :rtype: object
     """
 
-    # PROD
-    _constants_file = "/app/constants/constants.yml"
-
-    # TEST
-    # _constants_file = "/path/to/home/app/repository/constants/constants.yml"
-
-    cfg = const.get_constants_file(_constants_file)
+    cfg = get_settings().raw
 
     return cfg
@@ -0,0 +1,11 @@
+-- Unique keys used by the upserts of manage_store_data and manage_product_data:
+--   INSERT INTO store_api ... ON CONFLICT (store_code) DO UPDATE
+--   INSERT INTO product_api ... ON CONFLICT (product_sku, product_store_id) DO UPDATE
+-- Duplicated store codes or SKUs per store must be cleaned before applying it.
+
+ALTER TABLE store_api ADD CONSTRAINT store_api_store_code_un UNIQUE (store_code);
+
+-- The unique index of store_api_store_code_un replaces it
+DROP INDEX IF EXISTS store_api_store_code_idx;
+
+ALTER TABLE product_api ADD CONSTRAINT product_api_sku_store_un UNIQUE (product_sku, product_store_id);
@@ -0,0 +1,147 @@
+-- Stock summary per SKU, kept up to date by statement level triggers on product_api and store_api:
+--   total_stock, stores_count, stores_with_stock (stock > 0), stores_below_minimum (stock < store_min_inventory)
+-- The triggers recompute only the SKUs touched by each statement (from the transition tables).
+-- Recovery: SELECT product_stock_summary_rebuild(); or python -m db_controller.stock_summary
+
+CREATE TABLE product_stock_summary (
+    product_sku varchar NOT NULL,
+    total_stock numeric NOT NULL DEFAULT 0,
+    stores_count integer NOT NULL DEFAULT 0,
+    stores_with_stock integer NOT NULL DEFAULT 0,
+    stores_below_minimum integer NOT NULL DEFAULT 0,
+    last_update_date timestamp(0) NOT NULL DEFAULT now(),
+    CONSTRAINT product_stock_summary_pk PRIMARY KEY (product_sku)
+);
+
+COMMENT ON TABLE product_stock_summary IS 'Resumen de inventario por SKU en todas las tiendas';
+
+-- Recompute the summary of some SKUs. The advisory locks (taken in order, to avoid deadlocks)
+-- serialize the writers of the same SKU, and the aggregate runs after them with a new snapshot,
+-- so concurrent transactions on different stores of a SKU do not overwrite each other.
+CREATE OR REPLACE FUNCTION product_stock_summary_refresh(skus varchar[]) RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF skus IS NULL OR cardinality(skus) = 0 THEN
+        RETURN;
+    END IF;
+
+    PERFORM pg_advisory_xact_lock(hashtext('product_stock_summary'), hashtext(sku))
+    FROM (SELECT DISTINCT unnest(skus) AS sku ORDER BY 1) AS locked_skus;
+
+    DELETE FROM product_stock_summary summary
+    WHERE  summary.product_sku = ANY(skus)
+    AND    NOT EXISTS (SELECT 1 FROM product_api prod WHERE prod.product_sku = summary.product_sku);
+
+    INSERT INTO product_stock_summary AS summary
+        (product_sku, total_stock, stores_count, stores_with_stock, stores_below_minimum, last_update_date)
+    SELECT prod.product_sku,
+           COALESCE(SUM(prod.product_stock), 0),
+           COUNT(*),
+           COUNT(*) FILTER (WHERE prod.product_stock > 0),
+           COUNT(*) FILTER (WHERE prod.product_stock < store.store_min_inventory),
+           now()
+    FROM   product_api prod
+    JOIN   store_api store ON store.id_store = prod.product_store_id
+    WHERE  prod.product_sku = ANY(skus)
+    GROUP BY prod.product_sku
+    ON CONFLICT (product_sku) DO UPDATE
+    SET total_stock = EXCLUDED.total_stock,
+        stores_count = EXCLUDED.stores_count,
+        stores_with_stock = EXCLUDED.stores_with_stock,
+        stores_below_minimum = EXCLUDED.stores_below_minimum,
+        last_update_date = EXCLUDED.last_update_date;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION product_stock_summary_rebuild() RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+    skus_summarized integer;
+BEGIN
+    LOCK TABLE product_stock_summary IN EXCLUSIVE MODE;
+
+    DELETE FROM product_stock_summary;
+
+    INSERT INTO product_stock_summary
+        (product_sku, total_stock, stores_count, stores_with_stock, stores_below_minimum, last_update_date)
+    SELECT prod.product_sku,
+           COALESCE(SUM(prod.product_stock), 0),
+           COUNT(*),
+           COUNT(*) FILTER (WHERE prod.product_stock > 0),
+           COUNT(*) FILTER (WHERE prod.product_stock < store.store_min_inventory),
+           now()
+    FROM   product_api prod
+    JOIN   store_api store ON store.id_store = prod.product_store_id
+    GROUP BY prod.product_sku;
+
+    GET DIAGNOSTICS skus_summarized = ROW_COUNT;
+
+    RETURN skus_summarized;
+END;
+$$;
+
+-- Transition tables can only be declared on single event triggers, so one trigger per event.
+CREATE OR REPLACE FUNCTION product_stock_summary_sync() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM product_stock_summary_refresh(ARRAY(SELECT DISTINCT product_sku FROM new_rows));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM product_stock_summary_refresh(ARRAY(SELECT DISTINCT product_sku FROM old_rows));
+    ELSE
+        -- Only the rows whose stock, SKU or store changed move the summary
+        PERFORM product_stock_summary_refresh(ARRAY(
+            SELECT new_row.product_sku
+            FROM   new_rows new_row
+            JOIN   old_rows old_row ON old_row.product_id = new_row.product_id
+            WHERE  (new_row.product_stock, new_row.product_sku, new_row.product_store_id)
+                   IS DISTINCT FROM (old_row.product_stock, old_row.product_sku, old_row.product_store_id)
+            UNION
+            SELECT old_row.product_sku
+            FROM   new_rows new_row
+            JOIN   old_rows old_row ON old_row.product_id = new_row.product_id
+            WHERE  (new_row.product_sku, new_row.product_store_id)
+                   IS DISTINCT FROM (old_row.product_sku, old_row.product_store_id)));
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER product_stock_summary_insert_trg
+    AFTER INSERT ON product_api
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION product_stock_summary_sync();
+
+CREATE TRIGGER product_stock_summary_update_trg
+    AFTER UPDATE ON product_api
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION product_stock_summary_sync();
+
+CREATE TRIGGER product_stock_summary_delete_trg
+    AFTER DELETE ON product_api
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION product_stock_summary_sync();
+
+-- A new minimum inventory of a store changes stores_below_minimum of all its SKUs
+-- (deleting a store cascades to product_api, which fires the delete trigger above).
+CREATE OR REPLACE FUNCTION product_stock_summary_store_sync() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM product_stock_summary_refresh(ARRAY(
+        SELECT DISTINCT prod.product_sku
+        FROM   new_rows new_row
+        JOIN   old_rows old_row ON old_row.id_store = new_row.id_store
+        JOIN   product_api prod ON prod.product_store_id = new_row.id_store
+        WHERE  new_row.store_min_inventory IS DISTINCT FROM old_row.store_min_inventory));
+
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER product_stock_summary_store_update_trg
+    AFTER UPDATE ON store_api
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION product_stock_summary_store_sync();
+
+SELECT product_stock_summary_rebuild();
@@ -0,0 +1,7 @@
+-- migration: no-transaction
+-- Index of the keyset pagination of the products of a store (select_products_by_store):
+--   WHERE product_store_id = %s AND (product_store_id, product_sku) > (%s, %s)
+--   ORDER BY product_store_id, product_sku LIMIT %s
+-- Built CONCURRENTLY so the product table is not locked for writes while it is created.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS product_api_store_sku_idx ON product_api (product_store_id, product_sku);
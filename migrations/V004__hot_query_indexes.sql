@@ -0,0 +1,24 @@
+-- migration: no-transaction
+-- Indexes of the hot queries of database_backend.py, checked with python -m db_controller.query_plan_check
+--
+-- product_api_sku_store_stock_un: stock lookups by SKU (select_stock_in_product, select_all_stock_in_product,
+--   select_stock_in_products, select_stock_totals_in_products) and by (product_sku, product_store_id)
+--   (select_product_id, update_product_store_stock, the upserts ON CONFLICT). INCLUDE
+--   product_stock lets the stock reads be answered from the index (index only scan). Unique, so it is
+--   the arbiter of ON CONFLICT (product_sku, product_store_id) and replaces product_api_sku_store_un.
+-- product_api_store_sku_idx (V003) serves the join and the filter on product_store_id.
+-- user_auth_api_username_idx: validate_user_exists and update_user_password_hashed look users up by username.
+--
+-- Built CONCURRENTLY so the tables are not locked for writes while they are created; if a build
+-- fails the index is left INVALID, drop it and apply the migration again.
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS product_api_sku_store_stock_un
+    ON product_api (product_sku, product_store_id) INCLUDE (product_stock);
+
+ALTER TABLE product_api DROP CONSTRAINT IF EXISTS product_api_sku_store_un;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS user_auth_api_username_idx ON user_auth_api (username);
+
+ANALYZE product_api;
+
+ANALYZE user_auth_api;
@@ -0,0 +1,45 @@
+-- Stock reservations (holds) of the checkout flows:
+--   stock_reservation_api: one row per product and store of a reservation, held until it is confirmed
+--     (payment cleared, the stock is decremented), released, or it expires (swept by the API workers).
+--   product_api.product_reserved_stock: units held by the active reservations, kept by the same
+--     transactions that change the reservations, so the available stock is read from the product row
+--     (no aggregate over the reservations on each read).
+--   product_available_stock: available = stock - active holds.
+
+ALTER TABLE product_api ADD COLUMN product_reserved_stock numeric NOT NULL DEFAULT 0;
+
+COMMENT ON COLUMN product_api.product_reserved_stock IS 'Inventario apartado por reservaciones activas';
+
+CREATE TABLE stock_reservation_api (
+    reservation_id uuid NOT NULL,
+    product_sku varchar NOT NULL,
+    product_store_id uuid NOT NULL,
+    quantity numeric NOT NULL,
+    reservation_status varchar NOT NULL DEFAULT 'held',
+    order_reference varchar NULL,
+    expires_at timestamp(0) NOT NULL,
+    creation_date timestamp(0) NOT NULL DEFAULT now(),
+    last_update_date timestamp(0) NOT NULL DEFAULT now(),
+    CONSTRAINT stock_reservation_api_pk PRIMARY KEY (reservation_id, product_sku, product_store_id),
+    CONSTRAINT stock_reservation_api_quantity_check CHECK (quantity > 0),
+    CONSTRAINT stock_reservation_api_status_check
+        CHECK (reservation_status IN ('held', 'confirmed', 'released', 'expired')),
+    CONSTRAINT stock_reservation_api_fk FOREIGN KEY (product_store_id)
+        REFERENCES store_api (id_store) ON UPDATE CASCADE ON DELETE CASCADE
+);
+
+COMMENT ON TABLE stock_reservation_api IS 'Reservaciones de inventario por producto y tienda durante el checkout';
+
+-- The sweep of expired holds only reads the active ones
+CREATE INDEX stock_reservation_api_expiry_idx ON stock_reservation_api (expires_at) WHERE reservation_status = 'held';
+
+CREATE VIEW product_available_stock AS
+SELECT prod.product_id,
+       prod.product_sku,
+       prod.product_store_id,
+       prod.product_stock,
+       prod.product_reserved_stock,
+       prod.product_stock - prod.product_reserved_stock AS available_stock
+FROM   product_api prod;
+
+COMMENT ON VIEW product_available_stock IS 'Inventario disponible por producto y tienda (inventario - apartados)';
@@ -0,0 +1,9 @@
+-- migration: no-transaction
+-- The stock reads also return the reserved stock (V005), so the covering index of V004 includes it too,
+-- and the reads of the available stock are still answered from the index.
+-- The new unique index is the arbiter of ON CONFLICT (product_sku, product_store_id) once the old one is dropped.
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS product_api_sku_store_available_un
+    ON product_api (product_sku, product_store_id) INCLUDE (product_stock, product_reserved_stock);
+
+DROP INDEX CONCURRENTLY IF EXISTS product_api_sku_store_stock_un;
@@ -0,0 +1,13 @@
+-- migration: no-transaction
+-- The units reserved (V005) can not exceed the stock of the product: a write that lowers the stock under
+-- the units held fails with product_api_reserved_stock_check, and the API answers it with a conflict.
+-- A product without reservations can still go below zero (the 'none' guard of the stock adjustments).
+-- The constraint is added NOT VALID (no scan under the ACCESS EXCLUSIVE lock) and validated afterwards,
+-- which only takes a SHARE UPDATE EXCLUSIVE lock. If the validation fails, the rows to fix are:
+--   SELECT product_sku, product_store_id, product_stock, product_reserved_stock FROM product_api
+--   WHERE  product_reserved_stock < 0 OR product_reserved_stock > GREATEST(product_stock, 0);
+
+ALTER TABLE product_api ADD CONSTRAINT product_api_reserved_stock_check
+    CHECK (product_reserved_stock >= 0 AND product_reserved_stock <= GREATEST(product_stock, 0)) NOT VALID;
+
+ALTER TABLE product_api VALIDATE CONSTRAINT product_api_reserved_stock_check;
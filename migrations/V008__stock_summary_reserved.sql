@@ -0,0 +1,103 @@
+-- The stock summary per SKU (V002) also sums the units reserved (V005), so the availability of a SKU
+-- is read from the available stock (stock - reserved), the same as the reads of product_available_stock.
+-- The update trigger now refreshes the SKUs whose reserved stock changed too.
+
+ALTER TABLE product_stock_summary ADD COLUMN total_reserved_stock numeric NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION product_stock_summary_refresh(skus varchar[]) RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF skus IS NULL OR cardinality(skus) = 0 THEN
+        RETURN;
+    END IF;
+
+    PERFORM pg_advisory_xact_lock(hashtext('product_stock_summary'), hashtext(sku))
+    FROM (SELECT DISTINCT unnest(skus) AS sku ORDER BY 1) AS locked_skus;
+
+    DELETE FROM product_stock_summary summary
+    WHERE  summary.product_sku = ANY(skus)
+    AND    NOT EXISTS (SELECT 1 FROM product_api prod WHERE prod.product_sku = summary.product_sku);
+
+    INSERT INTO product_stock_summary AS summary
+        (product_sku, total_stock, total_reserved_stock, stores_count, stores_with_stock, stores_below_minimum,
+         last_update_date)
+    SELECT prod.product_sku,
+           COALESCE(SUM(prod.product_stock), 0),
+           COALESCE(SUM(prod.product_reserved_stock), 0),
+           COUNT(*),
+           COUNT(*) FILTER (WHERE prod.product_stock - prod.product_reserved_stock > 0),
+           COUNT(*) FILTER (WHERE prod.product_stock - prod.product_reserved_stock < store.store_min_inventory),
+           now()
+    FROM   product_api prod
+    JOIN   store_api store ON store.id_store = prod.product_store_id
+    WHERE  prod.product_sku = ANY(skus)
+    GROUP BY prod.product_sku
+    ON CONFLICT (product_sku) DO UPDATE
+    SET total_stock = EXCLUDED.total_stock,
+        total_reserved_stock = EXCLUDED.total_reserved_stock,
+        stores_count = EXCLUDED.stores_count,
+        stores_with_stock = EXCLUDED.stores_with_stock,
+        stores_below_minimum = EXCLUDED.stores_below_minimum,
+        last_update_date = EXCLUDED.last_update_date;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION product_stock_summary_rebuild() RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+    skus_summarized integer;
+BEGIN
+    LOCK TABLE product_stock_summary IN EXCLUSIVE MODE;
+
+    DELETE FROM product_stock_summary;
+
+    INSERT INTO product_stock_summary
+        (product_sku, total_stock, total_reserved_stock, stores_count, stores_with_stock, stores_below_minimum,
+         last_update_date)
+    SELECT prod.product_sku,
+           COALESCE(SUM(prod.product_stock), 0),
+           COALESCE(SUM(prod.product_reserved_stock), 0),
+           COUNT(*),
+           COUNT(*) FILTER (WHERE prod.product_stock - prod.product_reserved_stock > 0),
+           COUNT(*) FILTER (WHERE prod.product_stock - prod.product_reserved_stock < store.store_min_inventory),
+           now()
+    FROM   product_api prod
+    JOIN   store_api store ON store.id_store = prod.product_store_id
+    GROUP BY prod.product_sku;
+
+    GET DIAGNOSTICS skus_summarized = ROW_COUNT;
+
+    RETURN skus_summarized;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION product_stock_summary_sync() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM product_stock_summary_refresh(ARRAY(SELECT DISTINCT product_sku FROM new_rows));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM product_stock_summary_refresh(ARRAY(SELECT DISTINCT product_sku FROM old_rows));
+    ELSE
+        -- Only the rows whose stock, reserved stock, SKU or store changed move the summary
+        PERFORM product_stock_summary_refresh(ARRAY(
+            SELECT new_row.product_sku
+            FROM   new_rows new_row
+            JOIN   old_rows old_row ON old_row.product_id = new_row.product_id
+            WHERE  (new_row.product_stock, new_row.product_reserved_stock, new_row.product_sku,
+                    new_row.product_store_id)
+                   IS DISTINCT FROM (old_row.product_stock, old_row.product_reserved_stock, old_row.product_sku,
+                                     old_row.product_store_id)
+            UNION
+            SELECT old_row.product_sku
+            FROM   new_rows new_row
+            JOIN   old_rows old_row ON old_row.product_id = new_row.product_id
+            WHERE  (new_row.product_sku, new_row.product_store_id)
+                   IS DISTINCT FROM (old_row.product_sku, old_row.product_store_id)));
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+SELECT product_stock_summary_rebuild();
@@ -11,7 +11,7 @@ __version__ = "1.1.A19.1 ($Rev: 1 $)"
 
 
 from utilities.Utility import Utility as Util
-import uuid
+from utilities.identifiers import uuid7
 
 
 class ProductModel:
@@ -46,7 +46,7 @@ class ProductModel:
 
     cfg = None
 
-    product_id = int()
+    product_id = None
     product_sku = str()
     product_unspc = str()
     product_brand = str()
@@ -74,7 +74,7 @@ class ProductModel:
 
     def __init__(self, sku, product_unspc, brand, category_id, parent_cat_id, uom, stock, store_code, name, title,
                  long_desc, photo, price, tax, currency, status, published, manage_stock, length, width, height, weight):
-        self.product_id = uuid.uuid4().int
+        self.product_id = uuid7()
         self.product_sku = sku
         self.product_unspc = product_unspc
         self.product_brand = brand
@@ -98,189 +98,143 @@ class ProductModel:
         self.product_height = height
         self.product_weight = weight
 
-    @classmethod
-    def get_product_id(cls):
-        return cls.product_id
+    def get_product_id(self):
+        return self.product_id
 
-    @classmethod
-    def set_product_id(cls, product_id):
-        cls.product_id = product_id
+    def set_product_id(self, product_id):
+        self.product_id = product_id
 
-    @classmethod
-    def get_product_sku(cls):
-        return cls.product_sku
+    def get_product_sku(self):
+        return self.product_sku
 
-    @classmethod
-    def set_product_sku(cls, product_sku):
-        cls.product_sku = product_sku
+    def set_product_sku(self, product_sku):
+        self.product_sku = product_sku
 
-    @classmethod
-    def get_product_unspc(cls):
-        return cls.product_unspc
+    def get_product_unspc(self):
+        return self.product_unspc
 
-    @classmethod
-    def set_product_unspc(cls, product_unspc):
-        cls.product_unspc = product_unspc
+    def set_product_unspc(self, product_unspc):
+        self.product_unspc = product_unspc
 
-    @classmethod
-    def get_product_brand(cls):
-        return cls.product_brand
+    def get_product_brand(self):
+        return self.product_brand
 
-    @classmethod
-    def set_product_brand(cls, product_brand):
-        cls.product_brand = product_brand
+    def set_product_brand(self, product_brand):
+        self.product_brand = product_brand
 
-    @classmethod
-    def get_product_category_id(cls):
-        return cls.category_id
+    def get_product_category_id(self):
+        return self.category_id
 
-    @classmethod
-    def set_product_category_id(cls, product_category_id):
-        cls.category_id = product_category_id
+    def set_product_category_id(self, product_category_id):
+        self.category_id = product_category_id
 
-    @classmethod
-    def get_product_parent_cat_id(cls):
-        return cls.parent_category_id
+    def get_product_parent_cat_id(self):
+        return self.parent_category_id
 
-    @classmethod
-    def set_product_parent_cat_id(cls, product_parent_cat_id):
-        cls.parent_category_id = product_parent_cat_id
+    def set_product_parent_cat_id(self, product_parent_cat_id):
+        self.parent_category_id = product_parent_cat_id
 
-    @classmethod
-    def get_product_uom(cls):
-        return cls.unit_of_measure
+    def get_product_uom(self):
+        return self.unit_of_measure
 
-    @classmethod
-    def set_product_uom(cls, product_uom):
-        cls.unit_of_measure = product_uom
+    def set_product_uom(self, product_uom):
+        self.unit_of_measure = product_uom
 
-    @classmethod
-    def get_product_stock(cls):
-        return cls.product_stock
+    def get_product_stock(self):
+        return self.product_stock
 
-    @classmethod
-    def set_product_stock(cls, product_stock):
-        cls.product_stock = product_stock
+    def set_product_stock(self, product_stock):
+        self.product_stock = product_stock
 
-    @classmethod
-    def get_product_store_code(cls):
-        return cls.product_store_code
+    def get_product_store_code(self):
+        return self.product_store_code
 
-    @classmethod
-    def set_product_store_code(cls, product_store_code):
-        cls.product_store_code = product_store_code
+    def set_product_store_code(self, product_store_code):
+        self.product_store_code = product_store_code
 
-    @classmethod
-    def get_product_name(cls):
-        return cls.product_name
+    def get_product_name(self):
+        return self.product_name
 
-    @classmethod
-    def set_product_name(cls, product_name):
-        cls.product_name = product_name
+    def set_product_name(self, product_name):
+        self.product_name = product_name
 
-    @classmethod
-    def get_product_title(cls):
-        return cls.product_title
+    def get_product_title(self):
+        return self.product_title
 
-    @classmethod
-    def set_product_title(cls, product_title):
-        cls.product_title = product_title
+    def set_product_title(self, product_title):
+        self.product_title = product_title
 
-    @classmethod
-    def get_product_long_desc(cls):
-        return cls.product_long_description
+    def get_product_long_desc(self):
+        return self.product_long_description
 
-    @classmethod
-    def set_product_long_desc(cls, product_long_desc):
-        cls.product_long_description = product_long_desc
+    def set_product_long_desc(self, product_long_desc):
+        self.product_long_description = product_long_desc
 
-    @classmethod
-    def get_product_photo(cls):
-        return cls.product_photo
+    def get_product_photo(self):
+        return self.product_photo
 
-    @classmethod
-    def set_product_photo(cls, product_photo):
-        cls.product_photo = product_photo
+    def set_product_photo(self, product_photo):
+        self.product_photo = product_photo
 
-    @classmethod
-    def get_product_price(cls):
-        return cls.product_price
+    def get_product_price(self):
+        return self.product_price
 
-    @classmethod
-    def set_product_price(cls, product_price):
-        cls.product_price = product_price
+    def set_product_price(self, product_price):
+        self.product_price = product_price
 
-    @classmethod
-    def get_product_tax(cls):
-        return cls.product_tax
+    def get_product_tax(self):
+        return self.product_tax
 
-    @classmethod
-    def set_product_tax(cls, product_tax):
-        cls.product_tax = product_tax
+    def set_product_tax(self, product_tax):
+        self.product_tax = product_tax
 
-    @classmethod
-    def get_product_currency(cls):
-        return cls.product_currency
+    def get_product_currency(self):
+        return self.product_currency
 
-    @classmethod
-    def set_product_currency(cls, product_currency):
-        cls.product_currency = product_currency
+    def set_product_currency(self, product_currency):
+        self.product_currency = product_currency
 
-    @classmethod
-    def get_product_status(cls):
-        return cls.product_status
+    def get_product_status(self):
+        return self.product_status
 
-    @classmethod
-    def set_product_status(cls, product_status):
-        cls.product_status = product_status
+    def set_product_status(self, product_status):
+        self.product_status = product_status
 
-    @classmethod
-    def get_product_published(cls):
-        return cls.product_published
+    def get_product_published(self):
+        return self.product_published
 
-    @classmethod
-    def set_product_published(cls, product_published):
-        cls.product_published = product_published
+    def set_product_published(self, product_published):
+        self.product_published = product_published
 
-    @classmethod
-    def get_product_manage_stock(cls):
-        return cls.product_manage_stock
+    def get_product_manage_stock(self):
+        return self.product_manage_stock
 
-    @classmethod
-    def set_product_manage_stock(cls, product_manage_stock):
-        cls.product_manage_stock = product_manage_stock
+    def set_product_manage_stock(self, product_manage_stock):
+        self.product_manage_stock = product_manage_stock
 
-    @classmethod
-    def get_product_length(cls):
-        return cls.product_length
+    def get_product_length(self):
+        return self.product_length
 
-    @classmethod
-    def set_product_length(cls, product_length):
-        cls.product_length = product_length
+    def set_product_length(self, product_length):
+        self.product_length = product_length
 
-    @classmethod
-    def get_product_width(cls):
-        return cls.product_width
+    def get_product_width(self):
+        return self.product_width
 
-    @classmethod
-    def set_product_width(cls, product_width):
-        cls.product_width = product_width
+    def set_product_width(self, product_width):
+        self.product_width = product_width
 
-    @classmethod
-    def get_product_height(cls):
-        return cls.product_height
+    def get_product_height(self):
+        return self.product_height
 
-    @classmethod
-    def set_product_height(cls, product_height):
-        cls.product_height = product_height
+    def set_product_height(self, product_height):
+        self.product_height = product_height
 
-    @classmethod
-    def get_product_weight(cls):
-        return cls.product_height
+    def get_product_weight(self):
+        return self.product_height
 
-    @classmethod
-    def set_product_weight(cls, product_weight):
-        cls.product_weight = product_weight
+    def set_product_weight(self, product_weight):
+        self.product_weight = product_weight
 
     def valid_product_published(self, published):
         is_published = False
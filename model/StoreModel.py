@@ -11,7 +11,7 @@ __version__ = "1.1.A19.1 ($Rev: 1 $)"
 
 
 from utilities.Utility import Utility as Util
-import uuid
+from utilities.identifiers import uuid7
 
 
 class StoreModel:
@@ -31,7 +31,7 @@ class StoreModel:
     last_update_date: Fecha de actualizacion de los datos de tienda
     """
 
-    id_store = int()
+    id_store = None
     store_code = str()
     store_name = str()
     store_external_number = str()
@@ -55,7 +55,7 @@ class StoreModel:
                  zip_code_address,
                  minimum_inventory):
 
-        self.id_store = uuid.uuid4().int
+        self.id_store = uuid7()
         self.store_code = code_store
         self.store_name = name_store
         self.store_external_number = external_number_store
@@ -67,104 +67,84 @@ class StoreModel:
         self.store_min_inventory = minimum_inventory
 
     # getter method
-    @classmethod
-    def get_id_store(cls):
-        return cls.id_store
+    def get_id_store(self):
+        return self.id_store
 
     # setter method
-    @classmethod
-    def set_id_store(cls, store_id):
-        cls.id_store = store_id
+    def set_id_store(self, store_id):
+        self.id_store = store_id
 
     # getter method
-    @classmethod
-    def get_store_code(cls):
-        return cls.store_code
+    def get_store_code(self):
+        return self.store_code
 
     # setter method
-    @classmethod
-    def set_store_code(cls, code_store):
-        cls.store_code = code_store
+    def set_store_code(self, code_store):
+        self.store_code = code_store
 
     # getter method
-    @classmethod
-    def get_store_name(cls):
-        return cls.store_name
+    def get_store_name(self):
+        return self.store_name
 
     # setter method
-    @classmethod
-    def set_store_name(cls, name_store):
-        cls.store_name = name_store
+    def set_store_name(self, name_store):
+        self.store_name = name_store
 
     # getter method
-    @classmethod
-    def get_external_number(cls):
-        return cls.store_external_number
+    def get_external_number(self):
+        return self.store_external_number
 
     # setter method
-    @classmethod
-    def set_external_number(cls, external_number_address):
-        cls.store_external_number = external_number_address
+    def set_external_number(self, external_number_address):
+        self.store_external_number = external_number_address
 
     # getter method
-    @classmethod
-    def get_street_address(cls):
-        return cls.store_street_address
+    def get_street_address(self):
+        return self.store_street_address
 
     # setter method
-    @classmethod
-    def set_street_address(cls, street_address):
-        cls.store_street_address = street_address
+    def set_street_address(self, street_address):
+        self.store_street_address = street_address
 
     # getter method
-    @classmethod
-    def get_suburb_address(cls):
-        return cls.store_suburb_address
+    def get_suburb_address(self):
+        return self.store_suburb_address
 
     # setter method
-    @classmethod
-    def set_suburb_address(cls, suburb_address):
-        cls.store_suburb_address = suburb_address
+    def set_suburb_address(self, suburb_address):
+        self.store_suburb_address = suburb_address
 
     # getter method
-    @classmethod
-    def get_city_address(cls):
-        return cls.store_city_address
+    def get_city_address(self):
+        return self.store_city_address
 
     # setter method
-    @classmethod
-    def set_city_address(cls, city_address):
-        cls.store_city_address = city_address
+    def set_city_address(self, city_address):
+        self.store_city_address = city_address
 
     # getter method
-    @classmethod
-    def get_country_address(cls):
-        return cls.store_country_address
+    def get_country_address(self):
+        return self.store_country_address
 
     # setter method
-    @classmethod
-    def set_country_address(cls, country_address):
-        cls.store_country_address = country_address
+    def set_country_address(self, country_address):
+        self.store_country_address = country_address
 
     # getter method
-    @classmethod
-    def get_zip_postal_address(cls):
-        return cls.store_zippostal_code
+    def get_zip_postal_address(self):
+        return self.store_zippostal_code
 
     # setter method
-    @classmethod
-    def set_zip_postal_address(cls, zip_postal_address):
-        cls.store_zippostal_code = zip_postal_address
+    def set_zip_postal_address(self, zip_postal_address):
+        self.store_zippostal_code = zip_postal_address
 
     # getter method
-    @classmethod
-    def get_minimum_stock(cls):
-        return cls.store_min_inventory
+    def get_minimum_stock(self):
+        return self.store_min_inventory
 
     # setter method
-    @classmethod
-    def set_minimum_stock(cls, minimum_stock):
-        cls.store_min_inventory = minimum_stock
+    def set_minimum_stock(self, minimum_stock):
+        self.store_min_inventory = minimum_stock
 
     def validate_store_stock(self, product_stock):
         stock_valid = False
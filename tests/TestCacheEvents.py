@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A25.1 ($Rev: 1 $)"
+
+import json
+import unittest
+
+from utilities.cache_events import CacheEventListener, publish_cache_events, validate_channel
+
+
+class RecordingCursor:
+
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, sql, parameters=None):
+        self.executed.append((sql, parameters))
+
+
+class TestCacheEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.invalidated = []
+        self.listener = CacheEventListener(None, 'ecommerce_cache_events', reconnect_seconds=5)
+        self.listener.register('stock', lambda key: self.invalidated.append(('stock', key)))
+        self.listener.register('store', lambda key: self.invalidated.append(('store', key)))
+
+    def event(self, entity, key, origin='other-node:1'):
+        return json.dumps({"entity": entity, "key": key, "version": 42, "origin": origin})
+
+    def test_events_invalidate_by_entity(self):
+
+        self.assertTrue(self.listener.handle_payload(self.event('stock', 'SKU-1')))
+        self.assertTrue(self.listener.handle_payload(self.event('store', None)))
+
+        self.assertEqual([('stock', 'SKU-1'), ('store', None)], self.invalidated)
+        self.assertEqual(42, self.listener.stats()["LastVersion"])
+
+    def test_own_and_invalid_events_are_ignored(self):
+
+        self.assertFalse(self.listener.handle_payload(self.event('stock', 'SKU-1', origin=self.listener.origin)))
+        self.assertFalse(self.listener.handle_payload('not json'))
+
+        self.assertEqual([], self.invalidated)
+        self.assertEqual(2, self.listener.stats()["EventsIgnored"])
+
+    def test_invalidate_all_after_reconnect(self):
+
+        self.listener.invalidate_all()
+
+        self.assertEqual([('stock', None), ('store', None)], self.invalidated)
+
+    def test_publish_one_statement(self):
+
+        cursor = RecordingCursor()
+
+        publish_cache_events(cursor, 'ecommerce_cache_events', 'stock', ['SKU-1', 'SKU-2'])
+        publish_cache_events(cursor, 'ecommerce_cache_events', 'stock', [])
+        publish_cache_events(cursor, 'ecommerce_cache_events', 'store')
+
+        self.assertEqual(2, len(cursor.executed))
+        self.assertEqual(['SKU-1', 'SKU-2'], cursor.executed[0][1][3])
+        self.assertEqual([None], cursor.executed[1][1][3])
+
+        with self.assertRaises(ValueError):
+            validate_channel('cache; DROP TABLE product_api')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A25.1 ($Rev: 1 $)"
+
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from flask import Response
+
+from app import app, conditional_response
+from db_controller.unit_of_work import UnitOfWork, current_unit_of_work, release_unit_of_work_connection
+
+
+class RecordingConnection:
+
+    def __init__(self):
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+
+class RecordingPool:
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.returned = []
+
+    def getconn(self):
+        return self.conn
+
+    def putconn(self, conn):
+        self.returned.append(conn)
+
+
+class TestConditionalGet(unittest.TestCase):
+
+    def setUp(self):
+        self.built = []
+        self.entity_version = {"Version": "5d41402abc4b2a76b9719d911017c592",
+                               "LastModified": datetime(2021, 3, 1, 12, 30, 15)}
+
+    def build_response(self):
+        self.built.append(True)
+
+        return Response('[]', mimetype='application/json')
+
+    def test_matching_etag_is_not_modified(self):
+
+        etag = '"{}-json"'.format(self.entity_version["Version"])
+
+        with app.test_request_context(headers={"If-None-Match": etag}):
+            response = conditional_response(self.entity_version, 'json', self.build_response)
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual([], self.built)
+
+    def test_if_modified_since_is_not_evaluated(self):
+
+        # A write in the same second has the same Last-Modified, only the ETag tells them apart
+        with app.test_request_context(headers={"If-Modified-Since": "Mon, 01 Mar 2021 12:30:15 GMT"}):
+            response = conditional_response(self.entity_version, 'json', self.build_response)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([True], self.built)
+        self.assertEqual(self.entity_version["LastModified"], response.last_modified.replace(tzinfo=None))
+
+    def test_release_connection_before_streaming(self):
+
+        conn = RecordingConnection()
+        pool = RecordingPool(conn)
+
+        with mock.patch('db_controller.unit_of_work.get_connection_pool', return_value=pool):
+            with UnitOfWork() as unit_of_work:
+                unit_of_work.connection()
+
+                release_unit_of_work_connection()
+
+                self.assertEqual(1, conn.commits)
+                self.assertEqual([conn], pool.returned)
+                self.assertIs(unit_of_work, current_unit_of_work())
+                self.assertIsNone(unit_of_work.conn)
+
+        self.assertEqual([conn], pool.returned)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A25.1 ($Rev: 1 $)"
+
+import time
+import unittest
+import uuid
+
+from utilities.identifiers import uuid7, uuid7_timestamp
+
+
+class TestIdentifiers(unittest.TestCase):
+
+    def test_uuid7_layout(self):
+
+        before = time.time()
+        product_id = uuid7()
+
+        self.assertIsInstance(product_id, uuid.UUID)
+        self.assertEqual(7, product_id.version)
+        self.assertEqual(uuid.RFC_4122, product_id.variant)
+        self.assertAlmostEqual(before, uuid7_timestamp(product_id), delta=1)
+
+    def test_uuid7_increasing(self):
+
+        product_ids = [uuid7() for _ in range(10000)]
+
+        self.assertEqual(sorted(product_ids), product_ids)
+        self.assertEqual(len(product_ids), len(set(product_ids)))
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A25.1 ($Rev: 1 $)"
+
+import unittest
+
+from utilities.local_cache import MISSING, LocalCache
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLocalCache(unittest.TestCase):
+
+    def test_least_recently_used_is_evicted(self):
+
+        cache = LocalCache('test', max_size=2, ttl_seconds=60)
+
+        cache.set('A-01', 1)
+        cache.set('A-02', 2)
+        cache.get('A-01')
+        cache.set('A-03', 3)
+
+        self.assertEqual(1, cache.get('A-01'))
+        self.assertIs(MISSING, cache.get('A-02'))
+        self.assertEqual(1, cache.stats()['Evictions'])
+
+    def test_entries_expire(self):
+
+        clock = FakeClock()
+        cache = LocalCache('test', max_size=10, ttl_seconds=5, clock=clock)
+
+        cache.set('A-01', None)
+
+        self.assertIsNone(cache.get('A-01'))
+
+        clock.now = 5.0
+
+        self.assertIs(MISSING, cache.get('A-01'))
+        self.assertEqual(1, cache.stats()['Expirations'])
+
+    def test_stats(self):
+
+        cache = LocalCache('test', max_size=10, ttl_seconds=60)
+
+        cache.set('A-01', 1)
+        cache.get('A-01')
+        cache.get('A-02')
+        cache.delete('A-01')
+
+        stats = cache.stats()
+
+        self.assertEqual((1, 1, 0.5, 0), (stats['Hits'], stats['Misses'], stats['HitRatio'], stats['Size']))
+
+    def test_invalidate_group(self):
+
+        cache = LocalCache('test', max_size=10, ttl_seconds=60)
+
+        cache.set(('SKU-1',), 'all stores', group='SKU-1')
+        cache.set(('SKU-1', 'A-01'), 'one store', group='SKU-1')
+        cache.set(('SKU-2',), 'other product', group='SKU-2')
+
+        cache.invalidate_group('SKU-1')
+
+        self.assertIs(MISSING, cache.get(('SKU-1',)))
+        self.assertIs(MISSING, cache.get(('SKU-1', 'A-01')))
+        self.assertEqual('other product', cache.get(('SKU-2',)))
+
+    def test_read_before_invalidation_is_not_cached(self):
+
+        cache = LocalCache('test', max_size=10, ttl_seconds=60)
+
+        generation = cache.generation()
+
+        # A write of SKU-1 commits while its stock is read, the value read can be the old one
+        cache.invalidate_group('SKU-1')
+
+        cache.set(('SKU-1',), 'stale', group='SKU-1', generation=generation)
+        cache.set(('SKU-2',), 'other product', group='SKU-2', generation=generation)
+
+        self.assertIs(MISSING, cache.get(('SKU-1',)))
+        self.assertEqual('other product', cache.get(('SKU-2',)))
+        self.assertEqual(1, cache.stats()['StaleSets'])
+
+        cache.set(('SKU-1',), 'fresh', group='SKU-1', generation=cache.generation())
+
+        self.assertEqual('fresh', cache.get(('SKU-1',)))
+
+    def test_read_before_clear_is_not_cached(self):
+
+        cache = LocalCache('test', max_size=10, ttl_seconds=60)
+
+        generation = cache.generation()
+
+        cache.clear()
+
+        cache.set(('SKU-2',), 'stale', group='SKU-2', generation=generation)
+
+        self.assertIs(MISSING, cache.get(('SKU-2',)))
+
+    def test_forgotten_invalidations_raise_the_floor(self):
+
+        cache = LocalCache('test', max_size=2, ttl_seconds=60)
+
+        generation = cache.generation()
+
+        for product_sku in ('SKU-1', 'SKU-2', 'SKU-3'):
+            cache.invalidate_group(product_sku)
+
+        # SKU-1 is no longer remembered, the read is rejected by the floor instead
+        cache.set(('SKU-1',), 'stale', group='SKU-1', generation=generation)
+
+        self.assertIs(MISSING, cache.get(('SKU-1',)))
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A25.1 ($Rev: 1 $)"
+
+import unittest
+from unittest import mock
+
+from app import manage_product_requested_data, manage_store_requested_data
+
+
+class TestManageStore(unittest.TestCase):
+
+    def test_store_data_reaches_the_upsert(self):
+
+        store_data = {
+            "store_code": "A-01",
+            "store_name": "Tienda Centro",
+            "street_address": "Av. Juarez",
+            "external_number_address": "10",
+            "suburb_address": "Centro",
+            "city_address": "CDMX",
+            "country_address": "MX",
+            "zip_postal_code_address": "06000",
+            "minimum_inventory": 5,
+        }
+
+        store_upserted = [{"Store": {"CodeStore": "A-01", "Message": "Store Inserted Successful"}}]
+
+        with mock.patch('db_controller.database_backend.upsert_store_data',
+                        return_value=store_upserted) as upsert_store:
+            self.assertEqual(store_upserted, manage_store_requested_data(store_data))
+
+        data_store = upsert_store.call_args[0][0]
+
+        self.assertEqual("A-01", data_store["store_code"])
+        self.assertEqual("Av. Juarez", data_store["street_address"])
+        self.assertEqual("10", data_store["external_number_address"])
+        self.assertEqual("06000", data_store["zip_postal_code_address"])
+        self.assertEqual(5, data_store["minimum_inventory"])
+
+    def test_product_data_reaches_the_upsert(self):
+
+        product_data = {"product_sku": "SKU-1", "product_store_code": "A-01", "product_stock": 12,
+                        "product_name": "Producto", "product_title": "Producto 1", "product_price": 10.5,
+                        "product_tax": 1.68}
+
+        product_upserted = [{"Product": {"SKUProduct": "SKU-1", "Message": "Product Inserted Successful"}}]
+
+        with mock.patch('db_controller.database_backend.upsert_product_data',
+                        return_value=product_upserted) as upsert_product:
+            self.assertEqual(product_upserted, manage_product_requested_data(product_data))
+
+        data_product = upsert_product.call_args[0][0]
+
+        self.assertEqual("SKU-1", data_product["product_sku"])
+        self.assertEqual("A-01", data_product["product_store_code"])
+        self.assertEqual(12, data_product["product_stock"])
+        self.assertIsNotNone(data_product["product_id"])
+
+
+if __name__ == '__main__':
+    unittest.main()
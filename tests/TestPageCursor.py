@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A25.1 ($Rev: 1 $)"
+
+import unittest
+
+from utilities.Utility import Utility as Util
+
+
+class TestPageCursor(unittest.TestCase):
+
+    def test_cursor_round_trip(self):
+
+        page_cursor = Util.encode_page_cursor('8f7c2b1e-3a4d-4e5f-9a0b-1c2d3e4f5a6b', 'SKU/ñ 01')
+
+        self.assertNotIn('=', page_cursor)
+        self.assertEqual(['8f7c2b1e-3a4d-4e5f-9a0b-1c2d3e4f5a6b', 'SKU/ñ 01'], Util.decode_page_cursor(page_cursor))
+
+    def test_cursor_not_valid(self):
+
+        for page_cursor in ('not a cursor', 'e30', '%%%'):
+            with self.assertRaises(ValueError):
+                Util.decode_page_cursor(page_cursor)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A25.1 ($Rev: 1 $)"
+
+import io
+import unittest
+import uuid
+
+from utilities.product_import import CopyRowsStream, format_copy_line, format_copy_value, read_import_rows
+
+
+class TestProductImport(unittest.TestCase):
+
+    def test_read_csv_rows(self):
+
+        csv_file = io.BytesIO(b'\xef\xbb\xbfproduct_sku,product_store_code,product_name\n'
+                              b'SKU-1,A-01,"Name, with comma"\n'
+                              b'SKU-2,A-02,\n')
+
+        rows = list(read_import_rows(csv_file, 'csv'))
+
+        self.assertEqual(2, len(rows))
+        self.assertEqual((2, 'SKU-1'), (rows[0][0], rows[0][1]['product_sku']))
+        self.assertEqual('Name, with comma', rows[0][1]['product_name'])
+        self.assertEqual('', rows[1][1]['product_name'])
+
+    def test_read_ndjson_rows(self):
+
+        ndjson_file = io.BytesIO(b'{"product_sku": "SKU-1", "product_stock": 3}\n'
+                                 b'\n'
+                                 b'{"product_sku": "SKU-2", "product_published": false}\n'
+                                 b'[1, 2]\n')
+
+        rows = read_import_rows(ndjson_file, 'ndjson')
+
+        self.assertEqual(1, next(rows)[0])
+        self.assertEqual(3, next(rows)[0])
+
+        with self.assertRaises(ValueError):
+            next(rows)
+
+    def test_format_copy_value(self):
+
+        self.assertEqual('\\N', format_copy_value(None))
+        self.assertEqual('\\N', format_copy_value(''))
+        self.assertEqual('f', format_copy_value(False))
+        self.assertEqual('a\\tb\\nc\\\\d', format_copy_value('a\tb\nc\\d'))
+
+    def test_copy_line_fills_product_id(self):
+
+        # A line without product_id never reaches the NOT NULL column of the product table
+        for product_id in (None, ''):
+            line = format_copy_line(7, {'product_id': product_id, 'product_sku': 'SKU-7'},
+                                    columns=('product_id', 'product_sku'))
+
+            line_no, line_product_id, product_sku = line.rstrip('\n').split('\t')
+
+            self.assertEqual(('7', 'SKU-7'), (line_no, product_sku))
+            self.assertEqual(7, uuid.UUID(line_product_id).version)
+
+    def test_copy_stream_reads_by_size(self):
+
+        rows = ((line_no, {'product_id': 'id-{}'.format(line_no), 'product_sku': 'SKU-{}'.format(line_no)})
+                for line_no in range(1, 101))
+
+        copy_stream = CopyRowsStream(rows, columns=('product_id', 'product_sku'))
+
+        chunks = []
+        chunk = copy_stream.read(64)
+
+        while chunk:
+            self.assertLessEqual(len(chunk), 64)
+            chunks.append(chunk)
+            chunk = copy_stream.read(64)
+
+        lines = ''.join(chunks).splitlines()
+
+        self.assertEqual(100, copy_stream.rows_read)
+        self.assertEqual('1\tid-1\tSKU-1', lines[0])
+        self.assertEqual('100\tid-100\tSKU-100', lines[-1])
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A25.1 ($Rev: 1 $)"
+
+import unittest
+
+from constants.settings import DEFAULT_CONSTANTS_FILE, load_settings
+from db_controller.query_plan_check import collect_statements, find_seq_scans, to_prepared_statement
+
+
+class TestQueryPlanCheck(unittest.TestCase):
+
+    def test_collect_backend_statements(self):
+
+        cfg = load_settings(DEFAULT_CONSTANTS_FILE, environ={}).raw
+
+        statements = {(function_name, variable): sql for function_name, variable, line, sql in collect_statements(cfg)}
+
+        self.assertEqual("SELECT id_store FROM store_api WHERE store_code  = %s",
+                         statements[('select_store_id', 'sql_store_id')])
+        self.assertIn("FROM user_auth_api WHERE username = %s", statements[('validate_user_exists', 'sql_check')])
+        self.assertIn("prod.product_sku", statements[('iter_products_by_sku', 'sql_product_by_sku')])
+
+    def test_prepared_statement(self):
+
+        self.assertEqual(("SELECT 1 FROM t WHERE a = $1 AND b LIKE 'x%' AND c = ANY($2)", 2),
+                         to_prepared_statement("SELECT 1 FROM t WHERE a = %s AND b LIKE 'x%%' AND c = ANY(%s)"))
+
+    def test_find_seq_scans(self):
+
+        plan = [{"Plan": {"Node Type": "Nested Loop", "Plans": [
+            {"Node Type": "Seq Scan", "Relation Name": "store_api"},
+            {"Node Type": "Seq Scan", "Relation Name": "product_api"},
+            {"Node Type": "Index Only Scan", "Relation Name": "product_api"},
+        ]}}]
+
+        self.assertEqual(['product_api'], find_seq_scans(plan, {'product_api', 'user_auth_api'}))
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A25.1 ($Rev: 1 $)"
+
+import datetime
+import decimal
+import json
+import unittest
+import uuid
+
+from utilities import serializer
+
+
+class TestSerializer(unittest.TestCase):
+
+    def test_database_types(self):
+
+        product_id = uuid.uuid4()
+
+        data = {
+            "IdProduct": product_id,
+            "StockProduct": decimal.Decimal('12'),
+            "PriceProduct": decimal.Decimal('199.90'),
+            "CreationDate": datetime.datetime(2021, 3, 1, 10, 0, 0),
+            "NameProduct": 'Café',
+        }
+
+        self.assertEqual({
+            "IdProduct": str(product_id),
+            "StockProduct": 12,
+            "PriceProduct": 199.9,
+            "CreationDate": "2021-03-01T10:00:00",
+            "NameProduct": 'Café',
+        }, json.loads(serializer.dumps_bytes(data)))
+
+    def test_same_document_as_standard_library(self):
+
+        data = [{"Stock": decimal.Decimal('3.5'), "Date": datetime.date(2021, 3, 1), "Published": True, "Tax": None}]
+
+        self.assertEqual(json.dumps(data, default=serializer.encode_default, separators=(',', ':')),
+                         serializer.dumps(data))
+
+    def test_unknown_type(self):
+
+        with self.assertRaises(TypeError):
+            serializer.dumps({"Value": object()})
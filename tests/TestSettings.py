@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A25.1 ($Rev: 1 $)"
+
+import importlib.util
+import os
+import subprocess
+import sys
+import unittest
+
+from constants.settings import DEFAULT_CONSTANTS_FILE, load_settings
+
+
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_in_new_process(module_name):
+    return subprocess.run([sys.executable, '-c', 'import {}'.format(module_name)],
+                          cwd=ROOT_DIRECTORY, capture_output=True, text=True)
+
+
+class TestSettings(unittest.TestCase):
+
+    def test_logger_is_imported_first(self):
+
+        # app.py and the backend import the logger before any constants module
+        result = import_in_new_process('logger_controller.logger_control')
+
+        self.assertEqual(0, result.returncode, result.stderr)
+
+    @unittest.skipUnless(importlib.util.find_spec('flask') and importlib.util.find_spec('psycopg2'),
+                         'flask and psycopg2 are required to import the app')
+    def test_import_app(self):
+
+        result = import_in_new_process('app')
+
+        self.assertEqual(0, result.returncode, result.stderr)
+
+    def test_load_typed_settings(self):
+
+        settings = load_settings(DEFAULT_CONSTANTS_FILE, environ={})
+
+        self.assertEqual('store_api', settings.store_table)
+        self.assertEqual('product_api', settings.product_table)
+        self.assertEqual('product_sku', settings.product_columns['SKU'])
+        self.assertIn('Activo', settings.product_status_list)
+        self.assertEqual(int, type(settings.db_pool.max_connections))
+
+    def test_settings_are_read_only(self):
+
+        settings = load_settings(DEFAULT_CONSTANTS_FILE, environ={})
+
+        with self.assertRaises(TypeError):
+            settings.raw['DB_OBJECTS']['STORE_TABLE'] = 'other_table'
+
+        with self.assertRaises(AttributeError):
+            settings.store_table = 'other_table'
+
+    def test_environment_overrides(self):
+
+        environ = {
+            'ECOMMERCE__DB_RDS__HOST_DB': 'db.internal',
+            'ECOMMERCE__DB_POOL__MAX_CONNECTIONS': '25',
+            'OTHER_VARIABLE': 'ignored',
+        }
+
+        settings = load_settings(DEFAULT_CONSTANTS_FILE, environ=environ)
+
+        self.assertEqual('db.internal', settings.db.host)
+        self.assertEqual(25, settings.db_pool.max_connections)
+        self.assertEqual('db.internal', settings.raw['DB_RDS']['HOST_DB'])
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A25.1 ($Rev: 1 $)"
+
+import json
+from unittest import mock
+
+from flask_jwt_extended import create_access_token
+
+from app import app, stop_background_jobs
+from tests.BaseCase import BaseCase
+from utilities.stock_write_buffer import StockWriteBuffer
+
+
+class TestStockAdd(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+
+        with app.app_context():
+            access_token = create_access_token(identity='stock-test')
+
+        self.headers = {"Content-Type": "application/json", "Authorization": "Bearer {}".format(access_token)}
+        self.payload = json.dumps({"stock": 12, "product_sku": "SKU-1", "store_code": "A-01"})
+
+        self.flushed = []
+        self.buffer = StockWriteBuffer(self.flushed.extend, flush_interval_ms=60000, max_entries=100)
+
+    def test_post_with_write_buffer(self):
+
+        with mock.patch('app.get_stock_write_buffer', return_value=self.buffer), \
+                mock.patch('app.update_product_store_stock') as update_stock:
+            response = self.app.post('/api/ecommerce/stock/add/', headers=self.headers, data=self.payload)
+
+        self.assertEqual(202, response.status_code)
+        self.assertEqual("Product Stock Update Queued", response.json['Message'])
+        update_stock.assert_not_called()
+
+        self.assertEqual(1, self.buffer.flush())
+        self.assertEqual([('A-01', 'SKU-1', 12, 0)], self.flushed)
+
+    def test_invalid_change_is_not_queued(self):
+
+        for payload in ({"stock": 12, "product_sku": 101, "store_code": "A-01"},
+                        {"stock": "1e1000000", "product_sku": "SKU-1", "store_code": "A-01"},
+                        {"stock": "Infinity", "product_sku": "SKU-1", "store_code": "A-01"}):
+            with mock.patch('app.get_stock_write_buffer', return_value=self.buffer):
+                response = self.app.post('/api/ecommerce/stock/add/', headers=self.headers, data=json.dumps(payload))
+
+            self.assertEqual(409, response.status_code)
+
+        self.assertEqual(0, len(self.buffer))
+
+    def test_post_without_write_buffer(self):
+
+        stock_updated = {"StoreCode": "A-01", "ProductSku": "SKU-1", "ProductStock": "12",
+                         "Message": "Product Stock Updated Successful"}
+
+        with mock.patch('app.get_stock_write_buffer', return_value=None), \
+                mock.patch('app.update_product_store_stock', return_value=stock_updated) as update_stock:
+            response = self.app.post('/api/ecommerce/stock/add/', headers=self.headers, data=self.payload)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(stock_updated, response.json)
+        update_stock.assert_called_once_with(12, 'SKU-1', 'A-01')
+
+    def test_worker_exit_flushes_write_buffer(self):
+
+        self.buffer.set_stock('A-01', 'SKU-1', 7)
+
+        with mock.patch('db_controller.database_backend._stock_write_buffer', self.buffer):
+            stop_background_jobs()
+
+        self.assertEqual([('A-01', 'SKU-1', 7, 0)], self.flushed)
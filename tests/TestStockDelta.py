@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A25.1 ($Rev: 1 $)"
+
+import decimal
+import unittest
+
+from utilities.Utility import Utility as Util
+
+
+class TestStockDelta(unittest.TestCase):
+
+    def test_parse_stock_delta(self):
+
+        self.assertEqual(decimal.Decimal('5'), Util.parse_stock_delta(5))
+        self.assertEqual(decimal.Decimal('-2.5'), Util.parse_stock_delta('-2.5'))
+        self.assertEqual(decimal.Decimal('0.1'), Util.parse_stock_delta(0.1))
+
+    def test_invalid_stock_delta(self):
+
+        for delta in (None, True, 'ten', '', 'NaN', float('inf'), [1]):
+            self.assertIsNone(Util.parse_stock_delta(delta))
+
+    def test_stock_out_of_numeric_range(self):
+
+        for stock in ('Infinity', float('inf'), '1e1000000', '1e-20000', 'NaN', -1, True):
+            self.assertFalse(Util.is_valid_stock(stock))
+
+        # Parsed as text, '1e400' is a finite number that the numeric column stores
+        for stock in (0, 12, '12.5', 1e300, '1e400'):
+            self.assertTrue(Util.is_valid_stock(stock))
+
+    def test_chunks_follow_the_lock_order(self):
+
+        stock_values = [(0, 'A-02', 'SKU-B', 1), (1, 'A-01', 'SKU-a', 1), (2, 'A-01', 'SKU-B', 1),
+                        (3, 'A-03', 'SKU-A', 1), (4, 'A-01', 'SKU-C', 1)]
+
+        chunks = Util.chunk_by_product_sku(stock_values, 2, 2)
+
+        # Sorted by code point ("C" collation) and a SKU is never split between chunks
+        self.assertEqual([['SKU-A', 'SKU-B', 'SKU-B'], ['SKU-C', 'SKU-a']],
+                         [[stock_value[2] for stock_value in chunk] for chunk in chunks])
+        self.assertEqual([], Util.chunk_by_product_sku([], 2, 2))
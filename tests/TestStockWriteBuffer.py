@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A25.1 ($Rev: 1 $)"
+
+import threading
+import unittest
+
+from utilities.stock_write_buffer import StockWriteBuffer
+
+
+class TestStockWriteBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.flushed = []
+        self.buffer = StockWriteBuffer(self.flushed.extend, flush_interval_ms=60000, max_entries=100)
+
+    def test_coalesce_changes(self):
+
+        self.buffer.set_stock('A-01', 'SKU-1', 10)
+        self.buffer.set_stock('A-01', 'SKU-1', 12)
+        self.buffer.add_stock('A-01', 'SKU-1', -2)
+        self.buffer.add_stock('A-02', 'SKU-1', 3)
+        self.buffer.add_stock('A-02', 'SKU-1', 4)
+        self.buffer.add_stock('A-03', 'SKU-2', 5)
+        self.buffer.set_stock('A-03', 'SKU-2', 1)
+
+        self.assertEqual(3, self.buffer.flush())
+        self.assertEqual([('A-01', 'SKU-1', 12, -2), ('A-02', 'SKU-1', None, 7), ('A-03', 'SKU-2', 1, 0)],
+                         self.flushed)
+        self.assertEqual(0, len(self.buffer))
+
+    def test_failed_flush_is_retried(self):
+
+        def failing_flush(stock_changes):
+            raise RuntimeError('database down')
+
+        stock_buffer = StockWriteBuffer(failing_flush, flush_interval_ms=60000, max_entries=100)
+
+        stock_buffer.add_stock('A-01', 'SKU-1', 2)
+
+        self.assertEqual(0, stock_buffer.flush())
+
+        stock_buffer.add_stock('A-01', 'SKU-1', 3)
+        stock_buffer.set_stock('A-02', 'SKU-1', 8)
+
+        stock_buffer._flush_function = self.flushed.extend
+
+        self.assertEqual(2, stock_buffer.flush())
+        self.assertEqual([('A-01', 'SKU-1', None, 5), ('A-02', 'SKU-1', 8, 0)], self.flushed)
+        self.assertEqual(1, stock_buffer.stats()['FlushErrors'])
+
+    def test_failing_change_is_isolated_and_dropped(self):
+
+        def flush_function(stock_changes):
+            # One change the database rejects (numeric overflow, a SKU that is not text) fails the whole call
+            if any(not isinstance(stock_change[1], str) for stock_change in stock_changes):
+                raise TypeError('SKU is not text')
+
+            self.flushed.extend(stock_changes)
+
+        stock_buffer = StockWriteBuffer(flush_function, flush_interval_ms=60000, max_entries=100, max_retries=2)
+
+        stock_buffer.set_stock('A-01', 'SKU-1', 1)
+        stock_buffer.set_stock('A-01', 10, 2)
+        stock_buffer.set_stock('A-01', 'SKU-3', 3)
+
+        self.assertEqual(2, stock_buffer.flush())
+        self.assertEqual([('A-01', 'SKU-1', 1, 0), ('A-01', 'SKU-3', 3, 0)], sorted(self.flushed))
+        self.assertEqual(1, len(stock_buffer))
+
+        self.assertEqual(0, stock_buffer.flush())
+        self.assertEqual(0, len(stock_buffer))
+
+        stats = stock_buffer.stats()
+
+        self.assertEqual((2, 1, 2), (stats['FlushErrors'], stats['EntriesDropped'], stats['EntriesFlushed']))
+
+    def test_database_not_reachable_keeps_changes(self):
+
+        def failing_flush(stock_changes):
+            raise ConnectionError('database down')
+
+        stock_buffer = StockWriteBuffer(failing_flush, flush_interval_ms=60000, max_entries=100, max_retries=1,
+                                        retry_errors=(ConnectionError,))
+
+        stock_buffer.add_stock('A-01', 'SKU-1', 2)
+        stock_buffer.add_stock('A-02', 'SKU-2', 3)
+
+        for _ in range(3):
+            self.assertEqual(0, stock_buffer.flush())
+
+        self.assertEqual(2, len(stock_buffer))
+        self.assertEqual((3, 0), (stock_buffer.stats()['FlushErrors'], stock_buffer.stats()['EntriesDropped']))
+
+    def test_full_buffer_flushes_before_interval(self):
+
+        flushed_event = threading.Event()
+
+        def flush_function(stock_changes):
+            self.flushed.extend(stock_changes)
+            flushed_event.set()
+
+        stock_buffer = StockWriteBuffer(flush_function, flush_interval_ms=60000, max_entries=2)
+        stock_buffer.start()
+
+        stock_buffer.set_stock('A-01', 'SKU-1', 1)
+        stock_buffer.set_stock('A-01', 'SKU-2', 2)
+
+        self.assertTrue(flushed_event.wait(5))
+
+        stock_buffer.close()
+
+        self.assertEqual(2, len(self.flushed))
+
+    def test_close_flushes_pending_changes(self):
+
+        self.buffer.start()
+        self.buffer.add_stock('A-01', 'SKU-1', 1)
+
+        self.buffer.close()
+
+        self.assertEqual([('A-01', 'SKU-1', None, 1)], self.flushed)
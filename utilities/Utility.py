@@ -9,9 +9,12 @@ __license__ = ""
 __history__ = """ """
 __version__ = "1.1.A19.1 ($Rev: 1 $)"
 
-import re
+import base64
+import binascii
+import decimal
 import json
-from constants.constants import Constants as Const
+import re
+from constants.settings import get_settings
 
 
 class Utility:
@@ -44,7 +47,7 @@ class Utility:
     @staticmethod
     def set_data_input_store_dict(store_obj):
 
-        store_id = store_obj.get_id_store()
+        store_id = store_obj.id_store
         store_code = store_obj.get_store_code()
         store_name = store_obj.get_store_name()
         store_external_number = store_obj.get_external_number()
@@ -59,8 +62,8 @@ class Utility:
             "store_id": store_id,
             "store_code": store_code,
             "store_name": store_name,
-            "street_address": store_external_number,
-            "external_number_address": store_street_address,
+            "street_address": store_street_address,
+            "external_number_address": store_external_number,
             "suburb_address": store_suburb_address,
             "city_address": store_city_address,
             "country_address": store_country_address,
@@ -68,11 +71,12 @@ class Utility:
             "minimum_inventory": store_min_inventory,
         }
 
-        return json.dumps(store_dict)
+        return store_dict
 
     @staticmethod
     def set_data_input_product_dict(product_obj):
 
+        product_id = product_obj.product_id
         product_sku = product_obj.get_product_sku()
         product_unspc = product_obj.get_product_unspc()
         product_brand = product_obj.get_product_brand()
@@ -97,6 +101,7 @@ class Utility:
         product_weight = product_obj.get_product_weight()
 
         product_dict = {
+            'product_id': product_id,
             'product_sku': product_sku,
             'product_unspc': product_unspc,
             'product_brand': product_brand,
@@ -121,27 +126,95 @@ class Utility:
             'product_weight': product_weight,
         }
 
-        return json.dumps(product_dict)
+        return product_dict
 
     @staticmethod
     def decimal_formatting(value):
         return ('%.2f' % value).rstrip('0').rstrip('.')
 
+    # Valid store code and SKU of a stock change: text not empty (the stock changes are sorted by SKU)
+    @staticmethod
+    def is_valid_stock_key(store_code, product_sku):
+        return isinstance(store_code, str) and isinstance(product_sku, str) and bool(store_code) and \
+            bool(product_sku)
+
+    # Valid stock value: finite number not negative, that fits the numeric column
+    @staticmethod
+    def is_valid_stock(stock):
+        stock_value = Utility.parse_stock_delta(stock)
+
+        return stock_value is not None and stock_value >= 0
+
+    # Relative stock change (+n / -n) as Decimal, None when it is not a finite number or it does not fit
+    # the PostgreSQL numeric type (up to 131072 digits before the decimal point and 16383 after it)
+    @staticmethod
+    def parse_stock_delta(delta):
+        if isinstance(delta, bool) or delta is None:
+            return None
+
+        try:
+            stock_delta = decimal.Decimal(str(delta))
+        except decimal.InvalidOperation:
+            return None
+
+        if not stock_delta.is_finite() or stock_delta.adjusted() >= 131072 or \
+                stock_delta.as_tuple().exponent < -16383:
+            return None
+
+        return stock_delta
+
+    # Chunks of stock rows in the lock order of the database (product_sku COLLATE "C", product_store_id):
+    # sorted by SKU (code point order, the same as the "C" collation) and cut only where the SKU changes,
+    # so the rows locked by a chunk always come after the rows of the chunks before it
+    @staticmethod
+    def chunk_by_product_sku(stock_values, sku_position, chunk_size):
+        stock_values = sorted(stock_values, key=lambda stock_value: stock_value[sku_position])
+
+        chunks = []
+        chunk = []
+
+        for stock_value in stock_values:
+            if len(chunk) >= chunk_size and chunk[-1][sku_position] != stock_value[sku_position]:
+                chunks.append(chunk)
+                chunk = []
+
+            chunk.append(stock_value)
+
+        if chunk:
+            chunks.append(chunk)
+
+        return chunks
+
+    # Opaque cursor of the keyset pagination: the values of the last key read
+    @staticmethod
+    def encode_page_cursor(*key_values):
+        key_json = json.dumps(list(key_values), separators=(',', ':'))
+
+        return base64.urlsafe_b64encode(key_json.encode('utf-8')).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_page_cursor(page_cursor):
+        try:
+            padding = '=' * (-len(page_cursor) % 4)
+            key_values = json.loads(base64.urlsafe_b64decode(page_cursor + padding).decode('utf-8'))
+        except (TypeError, ValueError, binascii.Error):
+            raise ValueError('The page cursor is not valid: {}'.format(page_cursor))
+
+        if not isinstance(key_values, list):
+            raise ValueError('The page cursor is not valid: {}'.format(page_cursor))
+
+        return key_values
+
     # Define y obtiene el configurador para las constantes del sistema:
     @staticmethod
     def get_config_constant_file():
         """
         Get the config object to charge the constants configurator.
+        The constants file is parsed once per process, see constants.settings.
 
-        :return object: cfg object, contain the Map to the constants allowed in Constants File configuration.
+        :return object: cfg object, contain the read-only Map to the constants allowed in Constants File configuration.
         """
 
-        # PROD
-        _constants_file = "/app/constants/constants.yml"
-
-        # TEST
-        # _constants_file = "/home/jorgemm/Documentos/tech_test_vacants/cargamos_api_test/constants/constants.yml"
-
-        cfg = Const.get_constants_file(_constants_file)
+        cfg = get_settings().raw
 
         return cfg
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+
+Cache invalidation events between processes (Postgres LISTEN/NOTIFY).
+
+The backend publishes an event (entity, key, version) with pg_notify on the same transaction of every
+write, so it is delivered to the listeners only when the transaction is committed and never when it
+is rolled back. Each worker process runs a listener thread with a dedicated connection (not taken
+from the pool) that invalidates its in-process caches when another worker or node changes the data.
+
+Documentation:
+    - Payload: JSON object {"entity": "stock" | "store", "key": SKU or store code (null for all the
+      entries), "version": id of the transaction that made the change, "origin": "host:pid"}.
+    - The events of the own process are ignored, its caches are invalidated by the write itself.
+    - When the connection is lost the listener reconnects every RECONNECT_SECONDS and, because the
+      events sent meanwhile are lost, invalidates all the entries of every entity once it is back.
+    - Postgres drops the same payload sent twice in a transaction, so repeated keys cost nothing.
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A19.1 ($Rev: 1 $)"
+
+import os
+import re
+import select
+import socket
+import threading
+
+from logger_controller.logger_control import *
+from utilities import serializer
+
+logger = configure_db_logger()
+
+_channel_regex = re.compile(r"^[a-z_][a-z0-9_]{0,62}$")
+
+
+def get_cache_event_origin():
+    r"""
+    Get the name of the current process on the events it publishes.
+
+    :return origin: String "host:pid".
+    """
+
+    return '{}:{}'.format(socket.gethostname(), os.getpid())
+
+
+def validate_channel(channel):
+    r"""
+    Validate the name of a notification channel, it is written on the LISTEN statement as is.
+
+    :param channel: Name of the channel.
+    :return channel: Same name, if it is a lowercase identifier.
+    """
+
+    if not isinstance(channel, str) or not _channel_regex.match(channel):
+        raise ValueError('Invalid notification channel name: {}'.format(channel))
+
+    return channel
+
+
+def publish_cache_events(cursor, channel, entity, keys=None):
+    r"""
+    Publish the change of some keys of an entity, delivered when the transaction of cursor is committed.
+
+    :param cursor: Cursor of the transaction that writes the data.
+    :param channel: Notification channel.
+    :param entity: Entity changed (stock, store).
+    :param keys: Keys changed, None to invalidate all the entries of the entity.
+    """
+
+    keys = [None] if keys is None else [str(key) for key in keys]
+
+    if not keys:
+        return
+
+    # One statement for all the keys, the version is the id of the transaction
+    sql_publish_events = "SELECT pg_notify(%s, json_build_object('entity', %s::text, " \
+                         "                                     'key', change_key, " \
+                         "                                     'version', txid_current(), " \
+                         "                                     'origin', %s::text)::text) " \
+                         "FROM unnest(%s::text[]) AS change_key"
+
+    cursor.execute(sql_publish_events, (validate_channel(channel), entity, get_cache_event_origin(), keys,))
+
+
+class CacheEventListener:
+    r"""
+    Background thread that listens a notification channel and calls the handlers registered per entity
+    with the key of each event (None for all the keys).
+
+    connect_function returns a new psycopg2 connection, used only by the listener.
+    """
+
+    def __init__(self, connect_function, channel, reconnect_seconds, poll_seconds=5):
+        self.pid = os.getpid()
+        self.origin = get_cache_event_origin()
+        self.channel = validate_channel(channel)
+        self.reconnect_seconds = reconnect_seconds
+        self.poll_seconds = poll_seconds
+
+        self._connect_function = connect_function
+        self._handlers = dict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._conn = None
+
+        self.connected = False
+        self.connections = 0
+        self.events_received = 0
+        self.events_ignored = 0
+        self.handler_errors = 0
+        self.last_version = None
+
+    def register(self, entity, handler):
+        r"""
+        Register the function that invalidates the cache of an entity.
+
+        :param entity: Entity of the events (stock, store).
+        :param handler: Function with one argument, the key changed or None for all.
+        """
+
+        with self._lock:
+            self._handlers.setdefault(entity, []).append(handler)
+
+    def handle_payload(self, payload):
+        r"""
+        Dispatch an event received to the handlers of its entity.
+
+        :param payload: JSON payload of the notification.
+        :return handled: True if the event was dispatched, False if it is ignored.
+        """
+
+        try:
+            event = serializer.loads(payload)
+            entity = event['entity']
+        except (ValueError, TypeError, KeyError):
+            logger.warning('Cache event ignored, invalid payload: %s', payload)
+            self.events_ignored += 1
+            return False
+
+        self.events_received += 1
+        self.last_version = event.get('version')
+
+        if event.get('origin') == self.origin:
+            self.events_ignored += 1
+            return False
+
+        self._dispatch(entity, event.get('key'))
+
+        return True
+
+    def invalidate_all(self):
+        r"""
+        Call every handler with None, for the events that could be lost while disconnected.
+        """
+
+        with self._lock:
+            entities = list(self._handlers)
+
+        for entity in entities:
+            self._dispatch(entity, None)
+
+    def _dispatch(self, entity, key):
+        with self._lock:
+            handlers = list(self._handlers.get(entity, ()))
+
+        for handler in handlers:
+            try:
+                handler(key)
+            except Exception as error:
+                self.handler_errors += 1
+                logger.exception('Cache event handler failed for %s %s: %s', entity, key, error)
+
+    def start(self):
+        r"""
+        Start the background thread that listens the channel.
+        """
+
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            self._thread = threading.Thread(target=self._run, name='cache-event-listener', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception as error:
+                if self._stop.is_set():
+                    break
+
+                logger.warning('Cache event listener disconnected, retry in %s seconds: %s',
+                               self.reconnect_seconds, error)
+
+            self._disconnect()
+            self._stop.wait(self.reconnect_seconds)
+
+    def _listen(self):
+        conn = self._conn = self._connect_function()
+        conn.autocommit = True
+
+        with conn.cursor() as cursor:
+            cursor.execute('LISTEN {}'.format(self.channel))
+
+        self.connected = True
+        self.connections += 1
+
+        if self.connections > 1:
+            self.invalidate_all()
+
+        logger.info('Cache event listener of process %s listening on channel %s', self.pid, self.channel)
+
+        while not self._stop.is_set():
+            if select.select([conn], [], [], self.poll_seconds) == ([], [], []):
+                continue
+
+            conn.poll()
+
+            while conn.notifies:
+                self.handle_payload(conn.notifies.pop(0).payload)
+
+    def _disconnect(self):
+        conn, self._conn = self._conn, None
+        self.connected = False
+
+        if conn is not None and not conn.closed:
+            try:
+                conn.close()
+            except Exception as error:
+                logger.warning('Cache event listener connection not closed: %s', error)
+
+    def close(self):
+        r"""
+        Stop the background thread and close its connection.
+        """
+
+        self._stop.set()
+
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.poll_seconds + 1)
+
+        self._disconnect()
+
+    def stats(self):
+        r"""
+        Get the counters of the listener.
+
+        :return stats: Dictionary with the connection state and the events received.
+        """
+
+        return {
+            "Channel": self.channel,
+            "Connected": self.connected,
+            "Connections": self.connections,
+            "EventsReceived": self.events_received,
+            "EventsIgnored": self.events_ignored,
+            "HandlerErrors": self.handler_errors,
+            "LastVersion": self.last_version,
+        }
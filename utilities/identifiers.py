@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+
+Time ordered identifiers.
+
+The ids of the products and stores are UUIDs with the layout of version 7 (RFC 9562): the first
+48 bits are the Unix time in milliseconds, so the new keys land on the right edge of the primary key
+B-tree instead of on a random page, as the version 4 ones do. Bulk loads then touch few index pages
+and the index stays dense.
+
+Documentation:
+    - uuid7() returns uuid.UUID, adapted by psycopg2 to the uuid type (register_uuid, see connection_pool).
+    - The ids of a process are strictly increasing: 12 bits count the ids of the same millisecond and
+      the clock is not allowed to go back.
+    - Use uuid7().int for the numeric id columns (user_auth_api.user_id).
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A19.1 ($Rev: 1 $)"
+
+import os
+import threading
+import time
+import uuid
+
+_COUNTER_BITS = 12
+_COUNTER_MAX = (1 << _COUNTER_BITS) - 1
+
+_lock = threading.Lock()
+_last_millis = 0
+_counter = 0
+
+
+def uuid7():
+    r"""
+    Generate a time ordered UUID (version 7).
+
+    Layout: 48 bits of Unix milliseconds, version, 12 bits of counter, variant, 62 random bits.
+
+    :return uuid_value: uuid.UUID object.
+    """
+
+    global _last_millis, _counter
+
+    random_bits = int.from_bytes(os.urandom(8), 'big') & ((1 << 62) - 1)
+
+    with _lock:
+        millis = time.time_ns() // 1000000
+
+        if millis > _last_millis:
+            _last_millis = millis
+            # Random start, so the ids of different processes in the same millisecond rarely collide
+            _counter = random_bits >> 52
+        else:
+            _counter += 1
+
+            if _counter > _COUNTER_MAX:
+                _last_millis += 1
+                _counter = 0
+
+        millis = _last_millis
+        counter = _counter
+
+    value = (millis & ((1 << 48) - 1)) << 80
+    value |= 0x7 << 76
+    value |= counter << 64
+    value |= 0b10 << 62
+    value |= random_bits
+
+    return uuid.UUID(int=value)
+
+
+def uuid7_timestamp(uuid_value):
+    r"""
+    Get the creation time of a version 7 UUID.
+
+    :param uuid_value: uuid.UUID generated by uuid7.
+    :return seconds: Unix time in seconds (millisecond precision).
+    """
+
+    return (uuid_value.int >> 80) / 1000
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+
+In-process caches.
+
+Bounded maps with least recently used eviction and a time to live per entry, shared by the threads
+of a worker process. Each worker has its own copy, so the TTL is the safety net for the changes
+made by other workers or directly on the database.
+
+Documentation:
+    - Every cache is registered by name and publishes its counters with get_local_caches_stats().
+    - Sizes and TTLs are configured on the LOCAL_CACHE section of the constants file.
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A19.1 ($Rev: 1 $)"
+
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+_caches_lock = threading.Lock()
+_caches = dict()
+
+
+class LocalCache:
+    r"""
+    Thread safe LRU map with expiration.
+
+    get returns MISSING when the key is not cached or it is expired, so None can be cached too.
+    An entry can belong to a group, so all the entries of the group are invalidated at once.
+
+    A read-through takes generation() before querying the database and passes it to set: when the
+    group was invalidated (or the cache cleared) meanwhile, the value read can be older than the
+    change and it is not stored. Only the last max_size invalidated groups are remembered, the
+    older ones raise the floor every generation is compared with.
+    """
+
+    def __init__(self, name, max_size, ttl_seconds, clock=time.monotonic):
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._groups = dict()
+
+        self._generation = 0
+        self._invalidated_groups = OrderedDict()
+        self._invalidated_floor = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_sets = 0
+
+    def get(self, key):
+        r"""
+        Get the value cached for key.
+
+        :param key: Key to look for.
+        :return value: Value cached or MISSING.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return MISSING
+
+            value, expires_at, group = entry
+
+            if expires_at <= self._clock():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+    def generation(self):
+        r"""
+        Get the current generation, to be taken before reading the value that will be cached.
+
+        :return generation: Number increased by every invalidate_group and clear.
+        """
+
+        with self._lock:
+            return self._generation
+
+    def set(self, key, value, group=None, generation=None):
+        r"""
+        Cache value for key, evicting the least recently used entries above max_size.
+
+        :param key: Key to cache.
+        :param value: Value to cache.
+        :param group: Group of the entry, to invalidate it with invalidate_group.
+        :param generation: generation() taken before reading value. The value is not stored when its
+            group was invalidated or the cache cleared after it.
+        """
+
+        with self._lock:
+            if generation is not None and generation < max(self._invalidated_floor,
+                                                           self._invalidated_groups.get(group, 0)):
+                self.stale_sets += 1
+                return
+
+            self._remove(key)
+
+            self._entries[key] = (value, self._clock() + self.ttl_seconds, group)
+
+            if group is not None:
+                self._groups.setdefault(group, set()).add(key)
+
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_group(self, group):
+        r"""
+        Remove all the entries of a group.
+
+        :param group: Group to invalidate.
+        """
+
+        with self._lock:
+            for key in list(self._groups.get(group, ())):
+                self._remove(key)
+
+            self._generation += 1
+            self._invalidated_groups.pop(group, None)
+            self._invalidated_groups[group] = self._generation
+
+            while len(self._invalidated_groups) > self.max_size:
+                _, invalidated_at = self._invalidated_groups.popitem(last=False)
+                self._invalidated_floor = max(self._invalidated_floor, invalidated_at)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+
+            self._generation += 1
+            self._invalidated_groups.clear()
+            self._invalidated_floor = self._generation
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+
+        if entry is None or entry[2] is None:
+            return
+
+        group_keys = self._groups.get(entry[2])
+
+        if group_keys is not None:
+            group_keys.discard(key)
+
+            if not group_keys:
+                del self._groups[entry[2]]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        r"""
+        Get the counters of the cache.
+
+        :return stats: Dictionary with size, hits, misses, hit ratio, evictions, expirations and the
+            values not stored because they were read before an invalidation.
+        """
+
+        with self._lock:
+            lookups = self.hits + self.misses
+
+            return {
+                "Name": self.name,
+                "Size": len(self._entries),
+                "MaxSize": self.max_size,
+                "TtlSeconds": self.ttl_seconds,
+                "Hits": self.hits,
+                "Misses": self.misses,
+                "HitRatio": round(self.hits / lookups, 4) if lookups else None,
+                "Evictions": self.evictions,
+                "Expirations": self.expirations,
+                "StaleSets": self.stale_sets,
+            }
+
+
+def get_local_cache(name, max_size, ttl_seconds):
+    r"""
+    Get the cache registered with name, creating it the first time.
+
+    :param name: Name of the cache.
+    :param max_size: Maximum number of entries.
+    :param ttl_seconds: Seconds an entry is valid.
+    :return cache: LocalCache object.
+    """
+
+    with _caches_lock:
+        cache = _caches.get(name)
+
+        if cache is None:
+            cache = _caches[name] = LocalCache(name, max_size, ttl_seconds)
+
+        return cache
+
+
+def get_local_caches_stats():
+    r"""
+    Get the counters of all the caches of the process.
+
+    :return caches_stats: List of dictionaries, one per cache.
+    """
+
+    with _caches_lock:
+        caches = list(_caches.values())
+
+    return [cache.stats() for cache in caches]
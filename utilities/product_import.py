@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+
+Streaming readers for the bulk product import.
+
+The uploaded file is never loaded in memory: the rows are read one by one (CSV or NDJSON) and
+encoded on demand in the text format of COPY FROM STDIN by CopyRowsStream, the file-like object
+handed to cursor.copy_expert.
+
+Documentation:
+    - CSV: first line with the column names of IMPORT_PRODUCT_COLUMNS, empty values are NULL.
+    - NDJSON: one JSON object per line with the same keys, missing keys or null are NULL.
+    - Every row carries line_no, the line of the source file, to report the rejected rows.
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A19.1 ($Rev: 1 $)"
+
+import codecs
+import csv
+import json
+
+from utilities.identifiers import uuid7
+
+IMPORT_FILE_FORMATS = ('csv', 'ndjson')
+
+IMPORT_PRODUCT_COLUMNS = (
+    'product_id',
+    'product_sku',
+    'product_unspc',
+    'product_brand',
+    'category_id',
+    'parent_category_id',
+    'unit_of_measure',
+    'product_stock',
+    'product_store_code',
+    'product_name',
+    'product_title',
+    'product_long_description',
+    'product_photo',
+    'product_price',
+    'product_tax',
+    'product_currency',
+    'product_status',
+    'product_published',
+    'product_manage_stock',
+    'product_length',
+    'product_width',
+    'product_height',
+    'product_weight',
+)
+
+_copy_escapes = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def get_import_file_format(file_name, content_type=None):
+    r"""
+    Detect the format of the uploaded file by his extension or content type.
+
+    :param file_name: Name of the file uploaded.
+    :param content_type: Mime type sent by the client.
+    :return file_format: 'csv', 'ndjson' or None if it is not supported.
+    """
+
+    file_name = (file_name or '').lower()
+    content_type = (content_type or '').lower()
+
+    if file_name.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+
+    if file_name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type or 'jsonlines' in content_type:
+        return 'ndjson'
+
+    return None
+
+
+def read_csv_rows(binary_stream, encoding='utf-8-sig'):
+    r"""
+    Read the rows of a CSV file with header.
+
+    :param binary_stream: File object opened in binary mode.
+    :param encoding: Encoding of the file.
+    :return rows: Generator of tuples (line_no, dictionary of the row).
+    """
+
+    reader = csv.DictReader(codecs.iterdecode(binary_stream, encoding))
+
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_ndjson_rows(binary_stream, encoding='utf-8-sig'):
+    r"""
+    Read the rows of a NDJSON file, the blank lines are skipped.
+
+    :param binary_stream: File object opened in binary mode.
+    :param encoding: Encoding of the file.
+    :return rows: Generator of tuples (line_no, dictionary of the row).
+    """
+
+    for line_no, line in enumerate(codecs.iterdecode(binary_stream, encoding), start=1):
+        if not line.strip():
+            continue
+
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            raise ValueError('Line {} is not a valid JSON object: {}'.format(line_no, error))
+
+        if not isinstance(row, dict):
+            raise ValueError('Line {} is not a JSON object'.format(line_no))
+
+        yield line_no, row
+
+
+def read_import_rows(binary_stream, file_format):
+    r"""
+    Read the rows of the uploaded file according to his format.
+
+    :param binary_stream: File object opened in binary mode.
+    :param file_format: 'csv' or 'ndjson'.
+    :return rows: Generator of tuples (line_no, dictionary of the row).
+    """
+
+    if file_format == 'csv':
+        return read_csv_rows(binary_stream)
+
+    if file_format == 'ndjson':
+        return read_ndjson_rows(binary_stream)
+
+    raise ValueError('Import file format not supported: {}'.format(file_format))
+
+
+def format_copy_value(value):
+    r"""
+    Encode a value in the text format of COPY: NULL as \N and the special characters escaped.
+
+    :param value: Value of a column.
+    :return copy_value: String to write in the COPY stream.
+    """
+
+    if value is None:
+        return '\\N'
+
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+
+    value = str(value)
+
+    if value == '':
+        return '\\N'
+
+    return value.translate(_copy_escapes)
+
+
+def format_copy_line(line_no, row, columns=IMPORT_PRODUCT_COLUMNS):
+    r"""
+    Encode a row of the file as a line of COPY, line_no first and then the columns in order.
+    The rows without product_id get a new one.
+
+    :param line_no: Line of the source file.
+    :param row: Dictionary of the row.
+    :param columns: Columns to write.
+    :return copy_line: Line terminated by a new line.
+    """
+
+    values = [str(line_no)]
+
+    for column in columns:
+        value = row.get(column)
+
+        if column == 'product_id' and not value:
+            value = uuid7()
+
+        values.append(format_copy_value(value))
+
+    return '\t'.join(values) + '\n'
+
+
+class CopyRowsStream:
+    r"""
+    Read-only file-like object that produces the COPY lines of a generator of rows on demand,
+    so only a buffer of about the size requested by copy_expert is kept in memory.
+    """
+
+    def __init__(self, rows, columns=IMPORT_PRODUCT_COLUMNS):
+        self._lines = (format_copy_line(line_no, row, columns) for line_no, row in rows)
+        self._buffer = ''
+        self.rows_read = 0
+
+    def _next_line(self):
+        line = next(self._lines, '')
+
+        if line:
+            self.rows_read += 1
+
+        return line
+
+    def readline(self, size=-1):
+        if self._buffer:
+            line, new_line, self._buffer = self._buffer.partition('\n')
+            return line + new_line
+
+        return self._next_line()
+
+    def read(self, size=-1):
+        chunks = [self._buffer]
+        length = len(self._buffer)
+
+        while size is None or size < 0 or length < size:
+            line = self._next_line()
+
+            if not line:
+                break
+
+            chunks.append(line)
+            length += len(line)
+
+        data = ''.join(chunks)
+
+        if size is None or size < 0:
+            self._buffer = ''
+            return data
+
+        data, self._buffer = data[:size], data[size:]
+
+        return data
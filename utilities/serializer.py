@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+
+JSON serialization of the API responses.
+
+Uses orjson when it is installed (pip install orjson) and the standard library otherwise; both
+produce the same document for the types returned by the database:
+
+    - Decimal (numeric columns): JSON number, integer when it has no fraction.
+    - datetime / date (timestamp columns): ISO 8601 string, e.g. "2021-03-01T10:00:00".
+    - UUID (uuid columns): canonical string.
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A19.1 ($Rev: 1 $)"
+
+import datetime
+import decimal
+import json
+import uuid
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def encode_default(value):
+    r"""
+    Encode the values that the JSON encoder does not know natively.
+
+    :param value: Value to encode.
+    :return encoded: JSON compatible value.
+    """
+
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+
+    if isinstance(value, uuid.UUID):
+        return str(value)
+
+    raise TypeError('Object of type {} is not JSON serializable'.format(type(value).__name__))
+
+
+if orjson is not None:
+
+    def dumps_bytes(data):
+        r"""
+        Encode data as JSON.
+
+        :param data: Data to encode.
+        :return json_bytes: JSON document encoded in UTF-8.
+        """
+
+        return orjson.dumps(data, default=encode_default, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(json_data):
+        return orjson.loads(json_data)
+
+else:
+
+    _encoder = json.JSONEncoder(default=encode_default, ensure_ascii=False, separators=(',', ':'))
+
+    def dumps_bytes(data):
+        r"""
+        Encode data as JSON.
+
+        :param data: Data to encode.
+        :return json_bytes: JSON document encoded in UTF-8.
+        """
+
+        return _encoder.encode(data).encode('utf-8')
+
+    def loads(json_data):
+        return json.loads(json_data)
+
+
+def dumps(data):
+    r"""
+    Encode data as a JSON string.
+
+    :param data: Data to encode.
+    :return json_string: JSON document.
+    """
+
+    return dumps_bytes(data).decode('utf-8')
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Requires Python 3.8 or later
+
+Write-behind buffer of stock changes.
+
+The stock changes received by a worker process are kept in memory and coalesced per store and product
+(the last absolute stock wins and replaces the deltas before it, the deltas are summed), and a
+background thread writes them to the database in batches every FLUSH_INTERVAL_MS, or as soon as the
+buffer holds MAX_ENTRIES products.
+
+Durability:
+    - A change is acknowledged (HTTP 202) when it is in the buffer, not when it is in the database.
+    - A graceful stop of the worker (SIGTERM, gunicorn restart or scale down) flushes the buffer in the
+      worker_exit hook of gunicorn.conf.py; with other servers it is flushed by an atexit function, which
+      only runs once the process has no other non-daemon threads left.
+    - A crash of the process (SIGKILL, OOM, power loss) loses the changes not flushed yet: up to
+      FLUSH_INTERVAL_MS of traffic or MAX_ENTRIES products.
+    - A flush that fails because the database is not reachable (retry_errors) is merged back into the
+      buffer (the newer changes keep precedence) and retried on the next interval.
+    - A flush that fails for other reasons is split in halves until the changes that fail are isolated;
+      the rest is written. A change that fails MAX_RETRIES flushes is dropped and logged, with the
+      changes merged into it meanwhile.
+    - The reads see a change once it is flushed; there is no read-your-writes until then.
+"""
+
+__author__ = "Jorge Morfinez Mojica (jorge.morfinez.m@gmail.com)"
+__copyright__ = "Copyright 2021, Jorge Morfinez Mojica"
+__license__ = ""
+__history__ = """ """
+__version__ = "1.1.A19.1 ($Rev: 1 $)"
+
+import os
+import threading
+from collections import OrderedDict
+
+from logger_controller.logger_control import *
+
+logger = configure_db_logger()
+
+
+class StockWriteBuffer:
+    r"""
+    Thread safe coalescing buffer of stock changes per (store_code, product_sku), flushed by a
+    background thread.
+
+    flush_function receives a list of tuples (store_code, product_sku, stock, delta): the new stock is
+    stock + delta, or the stock of the database + delta when stock is None.
+
+    retry_errors are the exceptions of flush_function that mean the database is not reachable: the
+    changes are kept as they are. Any other exception is blamed on the changes sent.
+    """
+
+    def __init__(self, flush_function, flush_interval_ms, max_entries, max_retries=3, retry_errors=()):
+        self.pid = os.getpid()
+        self.flush_interval_ms = flush_interval_ms
+        self.max_entries = max_entries
+        self.max_retries = max_retries
+
+        self._flush_function = flush_function
+        self._retry_errors = tuple(retry_errors)
+        self._failed_tries = dict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._entries = OrderedDict()
+        self._thread = None
+        self._closed = False
+
+        self.changes_received = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.entries_flushed = 0
+        self.entries_dropped = 0
+
+    def set_stock(self, store_code, product_sku, stock):
+        r"""
+        Buffer an absolute stock, it replaces the changes buffered before for the same product and store.
+
+        :param store_code: Code of the store.
+        :param product_sku: SKU of the product.
+        :param stock: New stock.
+        """
+
+        self.enqueue([(store_code, product_sku, stock, 0)])
+
+    def add_stock(self, store_code, product_sku, delta):
+        r"""
+        Buffer a relative stock change, summed to the changes buffered before for the same product and store.
+
+        :param store_code: Code of the store.
+        :param product_sku: SKU of the product.
+        :param delta: Units to add (negative to subtract).
+        """
+
+        self.enqueue([(store_code, product_sku, None, delta)])
+
+    def enqueue(self, stock_changes):
+        r"""
+        Buffer many changes at once, so all of them are written by the same flush.
+
+        :param stock_changes: List of tuples (store_code, product_sku, stock, delta); stock None for a delta.
+        """
+
+        with self._lock:
+            for store_code, product_sku, stock, delta in stock_changes:
+                self._merge(self._entries, (store_code, product_sku), stock, delta)
+
+            self.changes_received += len(stock_changes)
+            buffer_full = len(self._entries) >= self.max_entries
+
+        if buffer_full:
+            self._wakeup.set()
+
+    @staticmethod
+    def _merge(entries, key, stock, delta):
+        entry = entries.get(key)
+
+        if entry is None or stock is not None:
+            entries[key] = [stock, delta]
+        else:
+            entry[1] += delta
+
+    def flush(self):
+        r"""
+        Write the changes buffered, one call to flush_function for all of them. When it fails, the
+        changes are split in halves to write the ones that do not fail.
+
+        :return entries_flushed: Number of products and stores written.
+        """
+
+        with self._flush_lock:
+            with self._lock:
+                entries, self._entries = self._entries, OrderedDict()
+
+            if not entries:
+                return 0
+
+            failed_entries = OrderedDict()
+            entries_written = 0
+
+            batches = [list(entries.items())]
+
+            while batches:
+                batch = batches.pop()
+
+                try:
+                    self._flush_function([key + tuple(entry) for key, entry in batch])
+                except self._retry_errors as error:
+                    batch += [item for batch_left in batches for item in batch_left]
+                    batches = []
+
+                    logger.error('Stock write buffer flush failed, %s changes kept to retry: %s', len(batch), error)
+
+                    failed_entries.update(batch)
+                except Exception as error:
+                    if len(batch) > 1:
+                        middle = len(batch) // 2
+                        batches += [batch[middle:], batch[:middle]]
+                        continue
+
+                    key, entry = batch[0]
+                    tries = self._failed_tries.get(key, 0) + 1
+
+                    if tries < self.max_retries:
+                        self._failed_tries[key] = tries
+                        failed_entries[key] = entry
+
+                        logger.exception('Stock write buffer change failed %s times, kept to retry: %s',
+                                         tries, 'StoreCode: {}, SKU: {}, Error: {}'.format(key[0], key[1], error))
+                    else:
+                        self._failed_tries.pop(key, None)
+                        self.entries_dropped += 1
+
+                        logger.exception('Stock write buffer change dropped after %s failed flushes: %s',
+                                         tries, 'StoreCode: {}, SKU: {}, Stock: {}, Delta: {}, Error: {}'.format(
+                                             key[0], key[1], entry[0], entry[1], error))
+                else:
+                    entries_written += len(batch)
+
+                    for key, _ in batch:
+                        self._failed_tries.pop(key, None)
+
+            if failed_entries or len(entries) > entries_written:
+                self.flush_errors += 1
+
+            if entries_written:
+                self.flushes += 1
+                self.entries_flushed += entries_written
+
+            if failed_entries:
+                self._restore(failed_entries)
+
+            return entries_written
+
+    def _restore(self, failed_entries):
+        with self._lock:
+            newer_entries, self._entries = self._entries, failed_entries
+
+            for key, (stock, delta) in newer_entries.items():
+                self._merge(self._entries, key, stock, delta)
+
+    def start(self):
+        r"""
+        Start the background thread that flushes the buffer.
+        """
+
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            self._thread = threading.Thread(target=self._run, name='stock-write-buffer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval_ms / 1000)
+            self._wakeup.clear()
+
+            self.flush()
+
+    def close(self):
+        r"""
+        Stop the background thread and flush what is left (registered to run at the process exit).
+        """
+
+        self._closed = True
+        self._wakeup.set()
+
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval_ms / 1000 + 5)
+
+        self.flush()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        r"""
+        Get the counters of the buffer.
+
+        :return stats: Dictionary with the entries pending and the changes received, flushed and dropped.
+        """
+
+        with self._lock:
+            return {
+                "Pending": len(self._entries),
+                "ChangesReceived": self.changes_received,
+                "Flushes": self.flushes,
+                "FlushErrors": self.flush_errors,
+                "EntriesFlushed": self.entries_flushed,
+                "EntriesDropped": self.entries_dropped,
+                "MaxRetries": self.max_retries,
+                "FlushIntervalMs": self.flush_interval_ms,
+                "MaxEntries": self.max_entries,
+            }